@@ -0,0 +1,129 @@
+"""
+Benchmark de memoria de los modelos Solicitud y Sesion
+Compara los modelos compactos (__slots__, sin fábricas por defecto, textos
+compartidos) con el equivalente clásico (dataclass con __dict__)
+
+Uso:
+    python benchmarks/bench_models_memory.py [filas ...]
+"""
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, field, make_dataclass, MISSING
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.solicitud_real import Solicitud
+from src.models.sesion import Sesion
+
+SERVICIOS = [
+    "Irradiación a dosis menores de 10 Gy",
+    "Irradiación a dosis mayores de 10 Gy",
+    "Gestión dosimétrica",
+    "Contador Gamma < 1h",
+]
+ESTADOS = ["⏳ Pendiente", "🕓 En progreso", "✅ Completado", "❌ Cancelado"]
+ORGANISMOS = [f"Facultad {n}" for n in range(40)]
+
+
+def filas_solicitudes(n: int) -> list:
+    """Filas como las devuelve la API (cada celda es un texto nuevo)"""
+    filas = []
+    for i in range(n):
+        organismo = random.choice(ORGANISMOS)
+        filas.append([
+            f"IRC-Sol-{i:07x}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", random.choice(ESTADOS),
+            random.choice(SERVICIOS), f"{random.uniform(20, 900):.2f}",
+            json.dumps({'canisters': i % 5 + 1}), f"Solicitante {i}", f"usuario{i}@ucm.es",
+            f"6{i:08d}", organismo, f"Departamento {i % 90}", f"Investigador {i % 400}",
+            random.choice(["UCM", "OPI"]), organismo, f"Departamento {i % 90}", "Q2818014I",
+            "Av. Séneca 2", "Av. Séneca 2", "GE0001", "GE0002", "GE0003", f"PR{i % 700}",
+            f"{i:010d}", "" if i % 3 else "Entrega urgente",
+        ])
+    # Pasar por JSON, como la respuesta real: sin textos compartidos entre filas
+    return json.loads(json.dumps(filas))
+
+
+def filas_sesiones(n: int) -> list:
+    filas = []
+    for i in range(n):
+        filas.append([
+            f"IRC-Ses-{i:07x}", f"IRC-Sol-{i // 4:07x}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            random.choice(["Realizada", "Planificada"]), random.choice(SERVICIOS),
+            f"Solicitante {i // 4}", str(i % 5), f"{i % 40}.5", f"2024-{i % 12 + 1:02d}",
+            str(i % 3), "1.5", "", "" if i % 5 else "Sin incidencias", f"Operador {i % 6}",
+        ])
+    return json.loads(json.dumps(filas))
+
+
+def clase_clasica(cls):
+    """Dataclass equivalente sin __slots__ (como eran los modelos antes)"""
+    campos = []
+    for f in fields(cls):
+        if f.default_factory is not MISSING:
+            campos.append((f.name, f.type, field(default_factory=f.default_factory)))
+        else:
+            campos.append((f.name, f.type, field(default=f.default)))
+    return make_dataclass(cls.__name__ + "Clasica", campos)
+
+
+def medir_memoria(construir, filas: list) -> int:
+    """
+    Memoria retenida (bytes) por un objeto por fila.
+
+    Las filas ya existen (están en la caché de SheetsManager): solo cuenta
+    lo que añaden los modelos.
+    """
+    gc.collect()
+    tracemalloc.start()
+    objetos = [construir(fila) for fila in filas]
+    gc.collect()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    return memoria
+
+
+def medir_tiempo(construir, filas: list) -> float:
+    inicio = time.perf_counter()
+    [construir(fila) for fila in filas]
+    return time.perf_counter() - inicio
+
+
+def comparar(nombre: str, cls, filas: list):
+    clasica = clase_clasica(cls)
+    # Campos que vienen de la hoja; el resto los rellenaban las fábricas por defecto
+    de_la_hoja = [f.name for f in fields(cls) if f.name not in ('creado_por', 'fecha_creacion')]
+
+    def construir_clasico(fila):
+        # Mismos valores que el compacto; el resto de campos, con sus fábricas
+        modelo = cls.from_sheet_row(fila)
+        return clasica(**{campo: getattr(modelo, campo) for campo in de_la_hoja})
+
+    memoria_clasica = medir_memoria(construir_clasico, filas)
+    memoria_compacta = medir_memoria(cls.from_sheet_row, filas)
+    segundos = medir_tiempo(cls.from_sheet_row, filas)
+
+    n = len(filas)
+    ahorro = 1 - memoria_compacta / memoria_clasica if memoria_clasica else 0.0
+    print(f"{nombre:<10} {n:>8} filas  clásico {memoria_clasica / 2**20:8.1f} MB "
+          f"({memoria_clasica / n:6.0f} B/fila)  compacto {memoria_compacta / 2**20:8.1f} MB "
+          f"({memoria_compacta / n:6.0f} B/fila)  ahorro {ahorro:5.1%}  "
+          f"decodificación {segundos * 1000:7.0f} ms")
+
+
+def main():
+    tamanos = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    random.seed(42)
+    for n in tamanos:
+        comparar("Solicitud", Solicitud, filas_solicitudes(n))
+        comparar("Sesion", Sesion, filas_sesiones(n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark de decodificación de filas
+Compara la decodificación fila a fila (from_sheet_row, que usa el mismo
+decodificador con un lote de una fila) con la de todo el lote por columnas
+(row_codec)
+
+Uso:
+    python benchmarks/bench_row_codec.py [filas ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_models_memory import filas_solicitudes, filas_sesiones
+from src.constants_real import HEADERS_SOLICITUDES
+from src.models.solicitud_real import Solicitud
+from src.models.sesion import Sesion
+from src.utils.row_codec import get_codec
+
+
+def cronometrar(funcion, repeticiones: int = 3):
+    """Mejor tiempo de varias ejecuciones y el resultado de la última"""
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def comparar(hoja: str, cls, encabezados: list, filas: list):
+    codec = get_codec(hoja, encabezados)
+
+    t_por_fila, referencia = cronometrar(lambda: [cls.from_sheet_row(fila) for fila in filas])
+    t_codec, modelos = cronometrar(lambda: codec.decode(filas))
+
+    # Mismas columnas en otro orden: mismo resultado
+    orden = list(range(len(encabezados)))
+    random.shuffle(orden)
+    reordenadas = [[fila[i] if i < len(fila) else "" for i in orden] for fila in filas]
+    codec_reordenado = get_codec(hoja, [encabezados[i] for i in orden])
+    t_reordenado, modelos_reordenados = cronometrar(lambda: codec_reordenado.decode(reordenadas))
+
+    iguales = modelos == referencia and modelos_reordenados == referencia
+    print(f"{hoja:<12} {len(filas):>7} filas  from_sheet_row {t_por_fila * 1000:7.0f} ms  "
+          f"row_codec {t_codec * 1000:7.0f} ms (x{t_por_fila / t_codec:4.1f})  "
+          f"reordenadas {t_reordenado * 1000:7.0f} ms  "
+          f"{'mismos modelos' if iguales else 'DIFERENCIAS'}")
+
+
+def main():
+    tamanos = [int(arg) for arg in sys.argv[1:]] or [50_000]
+    random.seed(42)
+    for n in tamanos:
+        comparar('Solicitudes', Solicitud, HEADERS_SOLICITUDES, filas_solicitudes(n))
+        comparar('Sesiones', Sesion, Sesion.get_sheet_headers(), filas_sesiones(n))
+
+
+if __name__ == "__main__":
+    main()
@@ -23,9 +23,45 @@ SHEETS_CONFIG = {
     'SPREADSHEET_ID': '',  # Se configura en primera ejecución
     'SHEET_SOLICITUDES': 'Solicitudes',
     'SHEET_SESIONES': 'Sesiones',
-    'SCOPES': ['https://www.googleapis.com/auth/spreadsheets']
+    'SCOPES': ['https://www.googleapis.com/auth/spreadsheets'],
+    'BACKEND': 'sheets',  # 'sheets' (Google Sheets) o 'sqlite' (base de datos local)
+    # Cuota de la API (Google permite 60 lecturas/minuto por usuario)
+    'RATE_LIMIT_PER_MINUTE': 55,
+    'RATE_LIMIT_BURST': 10,
+    'RATE_LIMIT_BACKGROUND_RESERVE': 0.3,  # Fracción reservada a acciones del usuario
+    'RATE_LIMIT_MAX_WAIT_SECONDS': 60,
+    'UI_MAX_WAIT_SECONDS': 2,  # Espera máxima (cuota y reintentos) desde el hilo de la interfaz
+    # Reintentos ante 429/5xx
+    'MAX_RETRIES': 5,
+    'RETRY_BASE_SECONDS': 1.0,
+    'RETRY_MAX_SECONDS': 32.0,
+    # Conexión: timeout de cada petición y detección de falta de red
+    'HTTP_TIMEOUT_SECONDS': 20,
+    'OFFLINE_AFTER_FAILURES': 3,  # Fallos de red seguidos para pasar a "sin conexión"
+    'OFFLINE_PROBE_SECONDS': 15,  # Cada cuánto se comprueba si ha vuelto la red
+    'OFFLINE_PROBE_TIMEOUT_SECONDS': 3,
+    # Sincronización incremental (SheetsManager.sync_sheet)
+    'SYNC_BLOCK_SIZE': 100,  # Filas por bloque al comparar y volver a descargar
+    'SYNC_SAMPLE_BLOCKS': 2,  # Bloques completos revisados en cada sincronización (rotan)
+    # Columna opcional con un hash por fila (p. ej. una fórmula), por hoja:
+    # {'Solicitudes': 'Checksum'}. Con ella se detecta cualquier edición; sin
+    # ella el botón Actualizar lee la hoja completa.
+    'SYNC_CHECKSUM_COLUMNS': {},
+    # Leer los datos de los paneles sin formato (fechas como número de serie):
+    # se decodifican sin analizar texto, pero cada cambio remoto detectado
+    # obliga a volver a descargar la hoja completa en ese formato
+    'TYPED_READS': False,
 }
 
+# Base de datos local (backend 'sqlite')
+SQLITE_DB_FILE = DATA_DIR / "gestion_irc.db"
+
+# Instantáneas de las hojas para arranque rápido
+SNAPSHOTS_DIR = DATA_DIR / "snapshots"
+
+# Diario de escrituras pendientes de enviar (trabajo sin conexión)
+JOURNAL_FILE = DATA_DIR / "journal.jsonl"
+
 # Archivos de credenciales
 if getattr(sys, 'frozen', False):
     # Si es ejecutable empaquetado
@@ -55,6 +91,10 @@ APP_CONFIG = {
     'BACKUP_INTERVAL_HOURS': 24,
     'CACHE_ENABLED': True,
     'CACHE_TTL_MINUTES': 5,
+    'CACHE_MAX_ENTRIES': 64,
+    'SNAPSHOTS_ENABLED': True,
+    'LOADER_WORKERS': 3,  # Descargas en paralelo (un cliente de la API por hilo)
+    'JOURNAL_RETRY_SECONDS': 30,  # Reintento de envío de cambios pendientes
 }
 
 # Configuración de la interfaz
@@ -87,4 +127,7 @@ LOG_CONFIG = {
     'FILE': LOGS_DIR / 'gestion_irc.log',
     'MAX_BYTES': 10 * 1024 * 1024,  # 10 MB
     'BACKUP_COUNT': 5,
+    # Métricas de la API de Google Sheets: una línea JSON cada N minutos (0 = desactivado)
+    'METRICS_FILE': LOGS_DIR / 'metrics.jsonl',
+    'METRICS_INTERVAL_MINUTES': 0,
 }
@@ -9,7 +9,7 @@ import json
 
 from src.models.solicitud_real import Solicitud
 from src.constants_real import TIPOS_SERVICIOS, ESTADOS_SOLICITUD, TIPOS_USUARIO
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
 from src.utils.logger import logger
 
 
@@ -24,6 +24,7 @@ class BusquedaPanel:
         self.resultados: List[Solicitud] = []
         
         self.build_ui()
+        data_store.subscribe(self._on_store_change, ['Solicitudes'])
         self.load_data()
     
     def build_ui(self):
@@ -43,10 +44,14 @@ class BusquedaPanel:
         btn_refresh = self.theme.create_secondary_button(
             header_frame,
             "🔄 Actualizar Datos",
-            self.load_data
+            lambda: self.load_data(force=True)
         )
         btn_refresh.pack(side=tk.RIGHT)
         
+        # Indicador de carga
+        self.loading_label = self.theme.create_loading_label(header_frame)
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
+        
         # Panel de filtros
         self.create_filters_panel(main_frame)
         
@@ -274,28 +279,40 @@ class BusquedaPanel:
         # Eventos
         self.tree.bind('<Double-1>', self.on_double_click)
     
-    def load_data(self):
-        """Carga todas las solicitudes"""
-        try:
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status("Cargando solicitudes...")
-            
-            data = sheets_manager.get_all_data('Solicitudes')
-            
-            if len(data) > 1:
-                self.todas_solicitudes = [Solicitud.from_sheet_row(row) for row in data[1:]]
-            else:
-                self.todas_solicitudes = []
-            
-            self.aplicar_filtros()
-            
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status(f"✅ {len(self.todas_solicitudes)} solicitudes cargadas")
-            
-        except Exception as e:
-            logger.error(f"Error al cargar solicitudes: {e}")
-            self.todas_solicitudes = []
-            self.aplicar_filtros()
+    def load_data(self, force: bool = False):
+        """
+        Carga todas las solicitudes en segundo plano.
+        
+        Args:
+            force: Si es True se buscan cambios en la hoja aunque la caché
+                siga vigente (botón Actualizar)
+        """
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status("Cargando solicitudes...")
+        
+        self.loading_label.config(text="⏳ Cargando...")
+        data_store.refresh(['Solicitudes'], key='busqueda',
+                           on_done=self._on_data_loaded, on_error=self._on_load_error,
+                           sync=force)
+    
+    def _on_data_loaded(self, events):
+        """Fin de la carga (el filtrado llega por _on_store_change)"""
+        self.loading_label.config(text="")
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status(f"✅ {len(self.todas_solicitudes)} solicitudes cargadas")
+    
+    def _on_store_change(self, events):
+        """Vuelve a aplicar los filtros cuando cambian las solicitudes"""
+        self.todas_solicitudes = data_store.solicitudes
+        self.aplicar_filtros()
+    
+    def _on_load_error(self, e: Exception):
+        """Fallo en la carga en segundo plano"""
+        self.loading_label.config(text="")
+        logger.error(f"Error al cargar solicitudes: {e}")
+        # Se mantienen los últimos datos cargados
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status(f"⚠️ No se pudieron actualizar las solicitudes: {e}")
     
     def aplicar_filtros(self):
         """Aplica todos los filtros y actualiza resultados"""
@@ -9,9 +9,10 @@ from typing import List
 import json
 
 from src.models.solicitud_real import Solicitud
-from src.models.sesion import Sesion
+from src.models.sesion import Sesion, resumir_sesiones
 from src.utils.calculador_estados import CalculadorEstados
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
+from src.utils.session_table import TIPO_REALIZADA, MES
 from src.utils.logger import logger
 
 
@@ -26,6 +27,7 @@ class DashboardSincronizado:
         self.sesiones: List[Sesion] = []
         
         self.build_ui()
+        data_store.subscribe(self._on_store_change, ['Solicitudes', 'Sesiones'])
         self.load_data()
     
     def build_ui(self):
@@ -62,10 +64,14 @@ class DashboardSincronizado:
         btn_refresh = self.theme.create_secondary_button(
             header_frame,
             "🔄 Actualizar",
-            self.load_data
+            lambda: self.load_data(force=True)
         )
         btn_refresh.pack(side=tk.RIGHT)
         
+        # Indicador de carga
+        self.loading_label = self.theme.create_loading_label(header_frame)
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
+        
         # KPIs principales
         self.create_kpi_section(scrollable_frame)
         
@@ -244,28 +250,40 @@ class DashboardSincronizado:
         self.activity_frame = tk.Frame(card, bg=self.theme.COLORS['card_bg'])
         self.activity_frame.pack(fill=tk.X)
     
-    def load_data(self):
-        """Carga datos desde Google Sheets"""
+    def load_data(self, force: bool = False):
+        """
+        Carga datos desde Google Sheets en segundo plano.
+        
+        Args:
+            force: Si es True se buscan cambios en la hoja aunque la caché
+                siga vigente (botón Actualizar)
+        """
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status("Cargando datos del dashboard...")
+        
+        self.loading_label.config(text="⏳ Cargando...")
+        data_store.refresh(['Solicitudes', 'Sesiones'], key='dashboard',
+                           on_done=self._on_data_loaded, on_error=self._on_load_error,
+                           sync=force)
+    
+    def _on_data_loaded(self, events):
+        """Fin de la carga (el repintado llega por _on_store_change)"""
+        self.loading_label.config(text="")
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status("✅ Dashboard actualizado")
+    
+    def _on_load_error(self, error: Exception):
+        """Fallo en la carga en segundo plano"""
+        self.loading_label.config(text="")
+        logger.error(f"Error al cargar datos del dashboard: {error}")
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status(f"❌ Error al cargar el dashboard: {error}")
+    
+    def _on_store_change(self, events):
+        """Repinta el dashboard cuando cambian solicitudes o sesiones"""
         try:
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status("Cargando datos del dashboard...")
-            
-            # Limpiar caché
-            sheets_manager.clear_cache()
-            
-            # Cargar solicitudes
-            data_solicitudes = sheets_manager.get_all_data('Solicitudes')
-            if len(data_solicitudes) > 1:
-                self.solicitudes = [Solicitud.from_sheet_row(row) for row in data_solicitudes[1:]]
-            else:
-                self.solicitudes = []
-            
-            # Cargar sesiones
-            data_sesiones = sheets_manager.get_all_data('Sesiones')
-            if len(data_sesiones) > 1:
-                self.sesiones = [Sesion.from_sheet_row(row) for row in data_sesiones[1:]]
-            else:
-                self.sesiones = []
+            self.solicitudes = data_store.solicitudes
+            self.sesiones = data_store.sesiones
             
             logger.info(f"📊 Dashboard: {len(self.solicitudes)} solicitudes, {len(self.sesiones)} sesiones")
             
@@ -275,18 +293,16 @@ class DashboardSincronizado:
             self.update_chart()
             self.update_activity()
             
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status("✅ Dashboard actualizado")
-            
         except Exception as e:
-            logger.error(f"Error al cargar datos del dashboard: {e}")
+            logger.error(f"Error al actualizar el dashboard: {e}")
             import traceback
             logger.error(traceback.format_exc())
     
     def update_kpis(self):
         """Actualiza los KPIs usando el calculador centralizado"""
         # Calcular resumen con calculador centralizado
-        resumen = CalculadorEstados.calcular_resumen_general(self.solicitudes, self.sesiones)
+        resumen = CalculadorEstados.calcular_resumen_general(self.solicitudes, self.sesiones,
+                                                             data_store.session_table)
         
         # Actualizar valores
         self.kpi_total.config(text=str(resumen['total_solicitudes']))
@@ -307,19 +323,16 @@ class DashboardSincronizado:
         for widget in self.alerts_frame.winfo_children():
             widget.destroy()
         
-        # Agrupar sesiones por solicitud
-        sesiones_por_solicitud = {}
-        for sesion in self.sesiones:
-            if sesion.id_solicitud not in sesiones_por_solicitud:
-                sesiones_por_solicitud[sesion.id_solicitud] = []
-            sesiones_por_solicitud[sesion.id_solicitud].append(sesion)
+        # Totales de sesiones por solicitud (tabla columnar)
+        resumenes = data_store.session_table.resumen_por_solicitud()
+        sin_sesiones = resumir_sesiones([])
         
         # Encontrar solicitudes que necesitan atención
         alertas = []
         
         for solicitud in self.solicitudes:
-            sesiones = sesiones_por_solicitud.get(solicitud.id_solicitud, [])
-            info = CalculadorEstados.calcular_estado_y_progreso(solicitud, sesiones)
+            resumen = resumenes.get(solicitud.id_solicitud, sin_sesiones)
+            info = CalculadorEstados.calcular_estado_desde_resumen(solicitud, resumen)
             
             if info['necesita_atencion']:
                 problema = ""
@@ -413,32 +426,24 @@ class DashboardSincronizado:
             # Preparar datos
             # Últimos 6 meses
             hoy = date.today()
-            meses = []
-            sesiones_realizadas_por_mes = []
-            sesiones_planificadas_por_mes = []
+            mes_inicio = hoy.month - 5
+            anio_inicio = hoy.year
+            while mes_inicio <= 0:
+                mes_inicio += 12
+                anio_inicio -= 1
+            inicio = date(anio_inicio, mes_inicio, 1)
             
-            for i in range(5, -1, -1):
-                mes = hoy.month - i
-                anio = hoy.year
-                while mes <= 0:
-                    mes += 12
-                    anio -= 1
-                
+            meses = []
+            for i in range(6):
+                mes = (mes_inicio - 1 + i) % 12 + 1
+                anio = anio_inicio + (mes_inicio - 1 + i) // 12
                 meses.append(f"{mes:02d}/{anio}")
-                
-                # Contar sesiones del mes
-                realizadas = 0
-                planificadas = 0
-                
-                for sesion in self.sesiones:
-                    if sesion.fecha_sesion.month == mes and sesion.fecha_sesion.year == anio:
-                        if sesion.tipo_sesion == "Realizada":
-                            realizadas += 1
-                        else:
-                            planificadas += 1
-                
-                sesiones_realizadas_por_mes.append(realizadas)
-                sesiones_planificadas_por_mes.append(planificadas)
+            
+            # Sesiones por mes (los tipos distintos de Realizada cuentan como planificadas)
+            tabla = data_store.session_table
+            realizadas = tabla.es_tipo(TIPO_REALIZADA)
+            sesiones_realizadas_por_mes = tabla.agrupar_por_fecha(inicio, len(meses), MES, realizadas).tolist()
+            sesiones_planificadas_por_mes = tabla.agrupar_por_fecha(inicio, len(meses), MES, ~realizadas).tolist()
             
             # Crear gráfico
             fig = Figure(figsize=(10, 4), dpi=80)
@@ -0,0 +1,108 @@
+"""
+Diálogo de Diagnóstico
+Muestra las métricas de uso de la API de Google Sheets y de la caché
+"""
+import tkinter as tk
+
+from src.utils.sheets_manager import sheets_manager
+from src.utils.metrics import format_report
+
+
+class DialogoDiagnostico:
+    """Diálogo con llamadas a la API, latencias, bytes, caché y cuota"""
+
+    def __init__(self, parent, main_window):
+        self.parent = parent
+        self.main_window = main_window
+        self.theme = main_window.theme
+        
+        # Crear ventana (no modal: puede quedarse abierta mientras se trabaja)
+        self.window = tk.Toplevel(parent)
+        self.window.title("📈 Diagnóstico")
+        self.window.transient(parent)
+        
+        # Centrar
+        self.center_window()
+        
+        # Construir interfaz
+        self.build_ui()
+        
+        # Cargar métricas actuales
+        self.actualizar()
+    
+    def center_window(self):
+        """Centra la ventana"""
+        self.window.update_idletasks()
+        width = 760
+        height = 560
+        x = (self.window.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.window.winfo_screenheight() // 2) - (height // 2)
+        self.window.geometry(f"{width}x{height}+{x}+{y}")
+    
+    def build_ui(self):
+        """Construye la interfaz"""
+        main_frame = tk.Frame(self.window, bg=self.theme.COLORS['bg_main'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Título
+        title = self.theme.create_header_label(main_frame, "📈 Diagnóstico de rendimiento")
+        title.pack(anchor=tk.W, pady=(0, 5))
+        
+        ayuda = tk.Label(
+            main_frame,
+            text="Para medir una acción: reinicia los contadores, realiza la acción y pulsa Actualizar.",
+            font=(self.theme.FONTS['family'], self.theme.FONTS['size_small']),
+            fg=self.theme.COLORS['text_secondary'],
+            bg=self.theme.COLORS['bg_main']
+        )
+        ayuda.pack(anchor=tk.W, pady=(0, 10))
+        
+        # Informe (solo lectura, fuente monoespaciada para alinear)
+        self.text = self.theme.create_text(main_frame, height=20)
+        self.text.configure(font=('Consolas', 9), wrap=tk.NONE)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        
+        # Botones
+        btn_frame = tk.Frame(main_frame, bg=self.theme.COLORS['bg_main'])
+        btn_frame.pack(fill=tk.X, pady=(15, 0))
+        
+        btn_reset = self.theme.create_secondary_button(
+            btn_frame,
+            "🧹 Reiniciar contadores",
+            self.reiniciar
+        )
+        btn_reset.pack(side=tk.LEFT)
+        
+        btn_refresh = self.theme.create_primary_button(
+            btn_frame,
+            "🔄 Actualizar",
+            self.actualizar
+        )
+        btn_refresh.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Espaciador
+        tk.Frame(btn_frame, bg=self.theme.COLORS['bg_main']).pack(side=tk.LEFT, expand=True)
+        
+        btn_close = self.theme.create_secondary_button(
+            btn_frame,
+            "Cerrar",
+            self.window.destroy
+        )
+        btn_close.pack(side=tk.LEFT)
+    
+    def actualizar(self):
+        """Vuelve a pintar las métricas"""
+        diagnostico = sheets_manager.api_diagnostics()
+        lineas = [f"Backend: {sheets_manager.backend.name}  ·  "
+                  f"cambios pendientes de enviar: {sheets_manager.pending_writes()}", ""]
+        lineas += format_report(diagnostico['api'], diagnostico['cache'], diagnostico['quota'])
+        
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', "\n".join(lineas))
+        self.text.configure(state=tk.DISABLED)
+    
+    def reiniciar(self):
+        """Pone a cero los contadores de la API y de la caché"""
+        sheets_manager.reset_diagnostics()
+        self.actualizar()
@@ -6,10 +6,11 @@ from tkinter import ttk, messagebox
 from datetime import datetime, date
 from typing import Optional
 import json
+import copy
 
 from src.models.sesion import Sesion
 from src.models.solicitud_real import Solicitud
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
 from src.utils.logger import logger
 
 
@@ -63,12 +64,13 @@ class FormularioSesion:
         """Carga las solicitudes disponibles"""
         try:
             logger.info("Cargando solicitudes para formulario...")
-            data = sheets_manager.get_all_data('Solicitudes')
+            # Normalmente los paneles ya las han cargado; las sesiones se
+            # piden también (una sola petición) para tenerlas en caché al guardar
+            data_store.ensure_loaded(['Solicitudes', 'Sesiones'])
             
-            if len(data) > 1:
-                self.solicitudes = [Solicitud.from_sheet_row(row) for row in data[1:]]
+            if data_store.solicitudes:
                 # Filtrar solo solicitudes activas o en progreso
-                self.solicitudes = [s for s in self.solicitudes if s.estado == "En proceso"]
+                self.solicitudes = [s for s in data_store.solicitudes if s.estado == "En proceso"]
                 logger.info(f"✅ {len(self.solicitudes)} solicitudes cargadas")
             else:
                 self.solicitudes = []
@@ -652,7 +654,9 @@ class FormularioSesion:
             
             # Crear o actualizar sesión
             if self.es_edicion:
-                sesion = self.sesion
+                # Copia completa: el modelo original es el compartido por los
+                # paneles y no debe cambiar antes de guardar
+                sesion = copy.deepcopy(self.sesion)
             else:
                 sesion = Sesion()
             
@@ -711,56 +715,26 @@ class FormularioSesion:
             # Notas
             sesion.notas = self.notas_text.get('1.0', tk.END).strip()
             
-            # Guardar en Google Sheets
+            # Guardar: alta o modificación por ID. El cambio se anota en el
+            # diario local y se envía a Google Sheets en segundo plano
             try:
-                if self.es_edicion:
-                    # Actualizar fila existente
-                    logger.info(f"📝 Actualizando sesión: {sesion.id_sesion}")
-                    row = sesion.to_sheet_row()
-                    
-                    # Buscar índice
-                    data = sheets_manager.get_all_data('Sesiones')
-                    row_index = None
-                    
-                    for i, data_row in enumerate(data[1:], start=2):
-                        if len(data_row) > 0 and data_row[0] == sesion.id_sesion:
-                            row_index = i
-                            break
-                    
-                    if row_index:
-                        resultado = sheets_manager.update_row('Sesiones', row_index, row)
-                        if resultado:
-                            logger.info(f"✅ Sesión actualizada correctamente")
-                        else:
-                            raise Exception("No se pudo actualizar en Google Sheets")
-                    else:
-                        # Si no se encuentra, añadir como nueva
-                        resultado = sheets_manager.append_row('Sesiones', row)
-                        if not resultado:
-                            raise Exception("No se pudo añadir en Google Sheets")
-                else:
-                    # Añadir nueva fila
-                    logger.info(f"➕ Añadiendo nueva sesión: {sesion.id_sesion}")
-                    row = sesion.to_sheet_row()
-                    
-                    resultado = sheets_manager.append_row('Sesiones', row)
-                    if resultado:
-                        logger.info(f"✅ Nueva sesión añadida correctamente")
-                    else:
-                        raise Exception("No se pudo añadir en Google Sheets")
+                accion = "Actualizando" if self.es_edicion else "Añadiendo nueva"
+                logger.info(f"📝 {accion} sesión: {sesion.id_sesion}")
+                row = sesion.to_sheet_row()
                 
-                # Actualizar panel
-                self.sesiones_panel.load_data()
+                # Todos los paneles ven el cambio al momento
+                if not data_store.save('Sesiones', row):
+                    raise Exception("No se pudo registrar el cambio en el diario local")
                 
                 messagebox.showinfo("Éxito", "Sesión guardada correctamente")
                 self.window.destroy()
                 
             except Exception as e_sheets:
-                logger.error(f"❌ Error al guardar en Sheets: {e_sheets}")
+                logger.error(f"❌ Error al guardar: {e_sheets}")
                 messagebox.showerror(
                     "Error al Guardar",
-                    f"No se pudo guardar en Google Sheets:\n\n{e_sheets}\n\n"
-                    "Verifica la conexión y permisos."
+                    f"No se pudo guardar la sesión:\n\n{e_sheets}\n\n"
+                    "Verifica que la carpeta de datos de la aplicación permite escritura."
                 )
                 return
             
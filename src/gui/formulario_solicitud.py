@@ -6,13 +6,14 @@ from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime
 from typing import Optional
 import json
+import copy
 
 from src.models.solicitud_real import Solicitud
 from src.constants_real import (
     TIPOS_SERVICIOS, TIPOS_USUARIO, ESTADOS_SOLICITUD,
     TARIFAS_SERVICIOS, ORGANISMOS_COMUNES, DEPARTAMENTOS_UCM
 )
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
 from src.utils.logger import logger
 
 
@@ -471,7 +472,9 @@ class FormularioSolicitud:
             
             # Crear o actualizar solicitud
             if self.es_edicion:
-                solicitud = self.solicitud
+                # Copia completa (también los detalles JSON): el modelo original
+                # es el compartido por los paneles
+                solicitud = copy.deepcopy(self.solicitud)
             else:
                 # Si ya tenemos una solicitud (ej: desde PDF), usarla
                 if self.solicitud:
@@ -544,67 +547,28 @@ class FormularioSolicitud:
                 messagebox.showerror("Error de Validación", mensaje)
                 return
             
-            # Guardar en Google Sheets
+            # Guardar: alta o modificación por ID. El cambio se anota en el
+            # diario local y se envía a Google Sheets en segundo plano (si no
+            # hay conexión, se reenvía al volver)
             try:
-                if self.es_edicion:
-                    # Actualizar fila existente
-                    logger.info(f"📝 Actualizando solicitud: {solicitud.id_solicitud}")
-                    row = solicitud.to_sheet_row()
-                    logger.info(f"   Fila generada con {len(row)} columnas")
-                    
-                    # Buscar el índice de la fila en Google Sheets
-                    data = sheets_manager.get_all_data('Solicitudes')
-                    logger.info(f"   Datos obtenidos: {len(data)} filas")
-                    
-                    row_index = None
-                    
-                    for i, data_row in enumerate(data[1:], start=2):  # Empezar desde fila 2
-                        if len(data_row) > 0 and data_row[0] == solicitud.id_solicitud:
-                            row_index = i
-                            logger.info(f"   ✅ Encontrada en fila {row_index}")
-                            break
-                    
-                    if row_index:
-                        resultado = sheets_manager.update_row('Solicitudes', row_index, row)
-                        if resultado:
-                            logger.info(f"✅ Solicitud actualizada correctamente")
-                        else:
-                            logger.error(f"❌ Error al actualizar en Sheets")
-                            raise Exception("No se pudo actualizar en Google Sheets")
-                    else:
-                        # Si no se encuentra, añadir como nueva
-                        logger.warning(f"⚠️ No se encontró la fila para {solicitud.id_solicitud}, añadiendo como nueva")
-                        resultado = sheets_manager.append_row('Solicitudes', row)
-                        if not resultado:
-                            raise Exception("No se pudo añadir en Google Sheets")
-                else:
-                    # Añadir nueva fila
-                    logger.info(f"➕ Añadiendo nueva solicitud: {solicitud.id_solicitud}")
-                    row = solicitud.to_sheet_row()
-                    logger.info(f"   Fila generada con {len(row)} columnas")
-                    
-                    resultado = sheets_manager.append_row('Solicitudes', row)
-                    if resultado:
-                        logger.info(f"✅ Nueva solicitud añadida correctamente")
-                    else:
-                        logger.error(f"❌ Error al añadir en Sheets")
-                        raise Exception("No se pudo añadir en Google Sheets")
+                accion = "Actualizando" if self.es_edicion else "Añadiendo nueva"
+                logger.info(f"📝 {accion} solicitud: {solicitud.id_solicitud}")
+                row = solicitud.to_sheet_row()
+                logger.info(f"   Fila generada con {len(row)} columnas")
                 
-                # Actualizar lista
-                self.solicitudes_panel.load_data()
+                # Todos los paneles ven el cambio al momento
+                if not data_store.save('Solicitudes', row):
+                    raise Exception("No se pudo registrar el cambio en el diario local")
                 
                 messagebox.showinfo("Éxito", "Solicitud guardada correctamente")
                 self.window.destroy()
                 
             except Exception as e_sheets:
-                logger.error(f"❌ Error al guardar en Sheets: {e_sheets}")
+                logger.error(f"❌ Error al guardar: {e_sheets}")
                 messagebox.showerror(
                     "Error al Guardar", 
-                    f"La solicitud se validó correctamente pero no se pudo guardar en Google Sheets:\n\n{e_sheets}\n\n"
-                    "Verifica:\n"
-                    "1. Conexión a Google Sheets\n"
-                    "2. Permisos de escritura\n"
-                    "3. El Spreadsheet ID en ⚙️ Configuración"
+                    f"La solicitud se validó correctamente pero no se pudo guardar:\n\n{e_sheets}\n\n"
+                    "Verifica que la carpeta de datos de la aplicación permite escritura."
                 )
                 return
             
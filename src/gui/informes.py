@@ -4,7 +4,6 @@ Panel de Informes y Exportación
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-import pandas as pd
 
 from src.utils.sheets_manager import sheets_manager
 from src.utils.logger import logger
@@ -84,9 +83,15 @@ class InformesPanel:
     
     def informe_general(self):
         """Genera informe general"""
-        data = sheets_manager.get_all_data('Solicitudes')
+        # Solo las columnas que se agregan (sin detalles ni observaciones)
+        nombres = ['ID de Solicitud', 'Estado', 'Coste_Estimado_IVA_0']
+        columnas = sheets_manager.read_columns('Solicitudes', nombres)
+        faltan = [nombre for nombre in nombres if nombre not in columnas]
+        if faltan:
+            # Sin la columna el informe saldría con ceros que parecen datos
+            raise ValueError(f"No se pudieron leer de Solicitudes las columnas: {', '.join(faltan)}")
         
-        total = len(data) - 1
+        total = sum(1 for id_solicitud in columnas['ID de Solicitud'] if id_solicitud)
         
         self.preview_text.insert(tk.END, f"""
 ╔══════════════════════════════════════════════════════════╗
@@ -101,13 +106,12 @@ RESUMEN GENERAL:
 📊 Total de Solicitudes: {total}
 
 🔄 Estados:
-   • Pendientes: {self._contar_por_estado(data, 'Pendiente')}
-   • En Proceso: {self._contar_por_estado(data, 'En Proceso')}
-   • Completadas: {self._contar_por_estado(data, 'Completada')}
+   • Pendientes: {self._contar_por_estado(columnas, 'Pendiente')}
+   • En Proceso: {self._contar_por_estado(columnas, 'En Proceso')}
+   • Completadas: {self._contar_por_estado(columnas, 'Completada')}
 
 💰 Facturación:
-   • Total Calculado: {self._calcular_total_facturacion(data):.2f} €
-   • Pendiente de Facturar: {self._calcular_pendiente(data):.2f} €
+   • Total Calculado: {self._calcular_total_facturacion(columnas):.2f} €
 
         """)
     
@@ -123,38 +127,20 @@ RESUMEN GENERAL:
         """Genera informe mensual"""
         self.preview_text.insert(tk.END, "Generando informe mensual...\n")
     
-    def _contar_por_estado(self, data, estado):
+    def _contar_por_estado(self, columnas, estado):
         """Cuenta solicitudes por estado"""
-        count = 0
-        for row in data[1:]:
-            if len(row) > 16 and row[16] == estado:
-                count += 1
-        return count
+        return sum(1 for valor in columnas['Estado'] if valor == estado)
     
-    def _calcular_total_facturacion(self, data):
+    def _calcular_total_facturacion(self, columnas):
         """Calcula la facturación total"""
         total = 0
-        for row in data[1:]:
-            if len(row) > 18:
-                try:
-                    total += float(row[18]) if row[18] else 0
-                except:
-                    pass
+        for coste in columnas['Coste_Estimado_IVA_0']:
+            try:
+                total += float(coste) if coste else 0
+            except:
+                pass
         return total
     
-    def _calcular_pendiente(self, data):
-        """Calcula la facturación pendiente"""
-        pendiente = 0
-        for row in data[1:]:
-            if len(row) > 20:
-                facturada = row[20].lower() if row[20] else ""
-                if facturada not in ["sí", "si", "yes"]:
-                    try:
-                        pendiente += float(row[18]) if len(row) > 18 and row[18] else 0
-                    except:
-                        pass
-        return pendiente
-    
     def exportar_excel(self):
         """Exporta los datos a Excel"""
         filename = filedialog.asksaveasfilename(
@@ -165,9 +151,13 @@ RESUMEN GENERAL:
         
         if filename:
             try:
+                # pandas solo se carga al exportar
+                import pandas as pd
+                
                 # Leer datos
-                solicitudes = sheets_manager.get_all_data('Solicitudes')
-                sesiones = sheets_manager.get_all_data('Sesiones')
+                datos = sheets_manager.get_many(['Solicitudes', 'Sesiones'])
+                solicitudes = datos['Solicitudes']
+                sesiones = datos['Sesiones']
                 
                 # Crear Excel con múltiples hojas
                 with pd.ExcelWriter(filename, engine='openpyxl') as writer:
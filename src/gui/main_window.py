@@ -9,9 +9,14 @@ from pathlib import Path
 # Añadir el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from config import APP_CONFIG, UI_CONFIG
+from config import APP_CONFIG, UI_CONFIG, LOG_CONFIG
 from src.utils.logger import logger
 from src.utils.sheets_manager import sheets_manager
+from src.utils.snapshot_store import has_changes
+from src.utils import rate_limiter
+from src.utils.metrics import api_metrics
+from src.utils.data_loader import data_loader
+from src.utils.data_store import data_store
 from src.gui.theme import Microsoft365Theme
 from src.gui.dashboard_sincronizado import DashboardSincronizado as DashboardPanel
 from src.gui.solicitudes_real import SolicitudesRealPanel
@@ -25,6 +30,9 @@ class MainWindow:
     
     def __init__(self):
         self.root = tk.Tk()
+        # Las cargas de datos se ejecutan en segundo plano y vuelven a este hilo
+        data_loader.attach(self.root)
+        data_store.conflict_handler = self.show_conflicts
         self.setup_window()
         self.apply_theme()
         self.check_authentication()
@@ -94,6 +102,16 @@ class MainWindow:
             # Fallback al método antiguo
             self._show_old_config_dialog()
     
+    def show_diagnostics_dialog(self):
+        """Muestra las métricas de la API y de la caché"""
+        from src.gui.dialogo_diagnostico import DialogoDiagnostico
+        
+        try:
+            DialogoDiagnostico(self.root, self)
+        except Exception as e:
+            logger.error(f"Error al abrir diagnóstico: {e}")
+            messagebox.showerror("Error", f"Error al abrir diagnóstico:\n{e}")
+    
     def _show_old_config_dialog(self):
         """Método antiguo de configuración (fallback)"""
         from tkinter import filedialog
@@ -189,12 +207,25 @@ class MainWindow:
         self.notebook = ttk.Notebook(content_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
+        # Arranque rápido: los paneles se pintan con la última copia en disco
+        hojas_instantanea = sheets_manager.warm_start(['Solicitudes', 'Sesiones'])
+        
         # Crear paneles
         self.create_panels()
         
         # Barra de estado
         self.create_statusbar(main_frame)
         
+        if hojas_instantanea:
+            self.start_background_refresh(hojas_instantanea)
+        
+        # Cambios de una sesión anterior que no se llegaron a enviar
+        self.retry_pending_writes()
+        
+        # Registro periódico de métricas (opcional)
+        if LOG_CONFIG.get('METRICS_INTERVAL_MINUTES', 0) > 0:
+            self.schedule_metrics_log()
+        
         logger.info("✅ Interfaz construida correctamente")
         
     def create_header(self, parent):
@@ -247,6 +278,22 @@ class MainWindow:
         )
         config_btn.pack(side=tk.RIGHT, padx=5)
         
+        # Botón de diagnóstico (métricas de la API)
+        diagnostico_btn = tk.Button(
+            btn_frame,
+            text="📈 Diagnóstico",
+            command=self.show_diagnostics_dialog,
+            bg=self.theme.COLORS['primary_dark'],
+            fg=self.theme.COLORS['text_white'],
+            font=(self.theme.FONTS['family'], self.theme.FONTS['size_normal']),
+            relief='flat',
+            bd=0,
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        )
+        diagnostico_btn.pack(side=tk.RIGHT, padx=5)
+        
     def create_panels(self):
         """Crea los paneles de la aplicación"""
         try:
@@ -285,6 +332,21 @@ class MainWindow:
         statusbar_frame.pack(side=tk.BOTTOM, fill=tk.X)
         statusbar_frame.pack_propagate(False)
         
+        # Estado de la conexión (a la derecha)
+        self.connection_label = tk.Label(
+            statusbar_frame,
+            text="",
+            font=(self.theme.FONTS['family'], self.theme.FONTS['size_small'], 'bold'),
+            bg=self.theme.COLORS['bg_secondary'],
+            padx=20,
+            cursor='hand2'
+        )
+        self.connection_label.pack(side=tk.RIGHT)
+        # Sin conexión, un clic comprueba si ha vuelto sin esperar
+        self.connection_label.bind('<Button-1>', lambda e: sheets_manager.check_connection_now())
+        self._connection_state = None
+        self.watch_connection()
+        
         self.statusbar = tk.Label(
             statusbar_frame,
             text="✅ Listo",
@@ -296,22 +358,120 @@ class MainWindow:
         )
         self.statusbar.pack(fill=tk.BOTH, expand=True)
         
+    def watch_connection(self):
+        """
+        Refleja en la barra de estado si hay conexión con Google Sheets.
+        
+        El cortacircuitos cambia de estado desde otros hilos; aquí se
+        consulta periódicamente desde el hilo de Tk.
+        """
+        estado = sheets_manager.connection_state()
+        if estado != self._connection_state:
+            anterior = self._connection_state
+            self._connection_state = estado
+            if estado == 'online':
+                self.connection_label.config(text="📶 En línea", fg=self.theme.COLORS['success'])
+            else:
+                self.connection_label.config(text="📴 Sin conexión", fg=self.theme.COLORS['error'])
+                self.update_status("📴 Sin conexión: se muestran los datos locales; "
+                                   "los cambios se enviarán al recuperarla")
+            if anterior == 'offline' and estado == 'online':
+                self._on_reconnected()
+        self.root.after(1000, self.watch_connection)
+    
+    def _on_reconnected(self):
+        """Al volver la conexión: envía lo pendiente y sincroniza"""
+        self.update_status("📶 Conexión recuperada, sincronizando...")
+        if sheets_manager.pending_writes():
+            data_store.flush_pending(on_done=self._on_pending_flushed)
+        self.refresh_all()
+    
     def update_status(self, message: str):
         """Actualiza el mensaje de la barra de estado"""
         if hasattr(self, 'statusbar'):
             self.statusbar.config(text=message)
             self.root.update_idletasks()
         
+    def start_background_refresh(self, sheet_names):
+        """Sincroniza en segundo plano las hojas cargadas desde instantánea"""
+        self.update_status("🔄 Mostrando copia local, sincronizando...")
+        
+        def sincronizar():
+            # Solo se descargan las filas que difieren de la instantánea
+            with rate_limiter.background():
+                return sheets_manager.sync_many(sheet_names)
+        
+        data_loader.submit(
+            'sincronizacion',
+            sincronizar,
+            self._apply_background_refresh,
+            lambda error: self.update_status("⚠️ No se pudo sincronizar: mostrando la última copia local")
+        )
+    
+    def _apply_background_refresh(self, diffs):
+        """Avisa en el hilo de Tk de los cambios encontrados al sincronizar"""
+        try:
+            # La caché ya tiene los datos nuevos: el almacén avisa a los
+            # paneles afectados y solo decodifica las filas cambiadas
+            cambiadas = [sheet_name for sheet_name, diff in diffs.items() if has_changes(diff)]
+            if cambiadas:
+                data_store.refresh(cambiadas)
+            self.update_status("✅ Datos sincronizados")
+        except Exception as e:
+            logger.error(f"Error al aplicar la sincronización: {e}")
+            self.update_status(f"❌ Error: {e}")
+        
+    def retry_pending_writes(self):
+        """Reintenta periódicamente el envío de los cambios guardados sin conexión"""
+        if sheets_manager.pending_writes():
+            data_store.flush_pending(on_done=self._on_pending_flushed)
+        self.root.after(APP_CONFIG.get('JOURNAL_RETRY_SECONDS', 30) * 1000, self.retry_pending_writes)
+    
+    def _on_pending_flushed(self, resultado):
+        """Resultado del envío de cambios pendientes (hilo de Tk)"""
+        if resultado['pending']:
+            self.update_status(f"📴 Sin conexión: {resultado['pending']} cambios pendientes de enviar")
+        elif resultado['applied']:
+            self.update_status(f"✅ {resultado['applied']} cambios pendientes enviados")
+    
+    def show_conflicts(self, conflictos):
+        """Pregunta qué hacer con los cambios que chocan con ediciones remotas"""
+        # Un registro editado varias veces tiene varias entradas: vale la última
+        por_registro = {(entrada['sheet'], entrada['id']): entrada for entrada in conflictos}
+        for entrada in por_registro.values():
+            accion = "eliminado" if entrada['op'] == 'delete' else "modificado"
+            remota = "ya no existe" if entrada.get('remote') is None else "ha cambiado"
+            mantener = messagebox.askyesno(
+                "Conflicto al sincronizar",
+                f"Has {accion} {entrada['id']} ({entrada['sheet']}), pero antes de "
+                f"poder enviarlo la versión de Google Sheets {remota}.\n\n"
+                f"¿Aplicar tu cambio de todas formas?\n\n"
+                f"Sí: se sobrescribe la versión remota\n"
+                f"No: se descarta tu cambio y se mantiene la remota"
+            )
+            data_store.resolve_conflict(entrada['sheet'], entrada['id'], mantener)
+    
+    def schedule_metrics_log(self):
+        """Escribe las métricas de la API en el registro y programa la siguiente"""
+        diagnostico = sheets_manager.api_diagnostics()
+        api_metrics.write_log(LOG_CONFIG['METRICS_FILE'],
+                              {'cache': diagnostico['cache'], 'quota': diagnostico['quota']})
+        self.root.after(int(LOG_CONFIG['METRICS_INTERVAL_MINUTES'] * 60 * 1000), self.schedule_metrics_log)
+    
     def refresh_all(self):
         """Refresca todos los paneles"""
+        if not sheets_manager.is_online():
+            # Se muestran los datos locales y se comprueba ya la conexión
+            sheets_manager.check_connection_now()
         try:
-            if hasattr(self, 'dashboard'):
-                self.dashboard.load_data()
-            if hasattr(self, 'solicitudes'):
-                self.solicitudes.load_data()
-            if hasattr(self, 'sesiones'):
-                self.sesiones.load_data()
-            self.update_status("✅ Datos actualizados")
+            # Una sola sincronización incremental: los paneles están suscritos
+            # al almacén y se repintan con los cambios que encuentre
+            data_store.refresh(
+                ['Solicitudes', 'Sesiones'], key='actualizar_todo', sync=True,
+                on_done=lambda events: self.update_status("✅ Datos actualizados"),
+                on_error=lambda error: self.update_status(f"❌ Error al actualizar: {error}")
+            )
+            self.update_status("🔄 Actualizando datos...")
         except Exception as e:
             logger.error(f"Error al refrescar: {e}")
             self.update_status(f"❌ Error: {e}")
@@ -320,6 +480,7 @@ class MainWindow:
         """Maneja el cierre de la aplicación"""
         if messagebox.askokcancel("Salir", "¿Deseas cerrar la aplicación?"):
             logger.info("Cerrando aplicación...")
+            data_loader.shutdown()
             self.root.quit()
             self.root.destroy()
             import sys
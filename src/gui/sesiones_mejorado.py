@@ -4,12 +4,12 @@ Panel de Sesiones MEJORADO - Con cards visuales y progreso avanzado
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 import calendar
 
 from src.models.sesion import Sesion, SolicitudConProgreso
 from src.models.solicitud_real import Solicitud
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
 from src.utils.logger import logger
 
 
@@ -32,6 +32,7 @@ class SesionesPanelMejorado:
         self.filtro_busqueda = ""
         
         self.build_ui()
+        data_store.subscribe(self._on_store_change, ['Sesiones', 'Solicitudes'])
         self.load_data()
     
     def build_ui(self):
@@ -103,35 +104,33 @@ class SesionesPanelMejorado:
         btn_refresh = self.theme.create_secondary_button(
             btn_frame,
             "🔄 Actualizar",
-            self.load_data
+            lambda: self.load_data(force=True)
         )
         btn_refresh.pack(side=tk.LEFT)
+        
+        # Indicador de carga
+        self.loading_label = self.theme.create_loading_label(header_frame)
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
     
     def update_summary(self):
         """Actualiza el resumen ejecutivo"""
         # Contar solicitudes activas
-        solicitudes_con_sesiones = {}
-        for sesion in self.sesiones:
-            if sesion.id_solicitud not in solicitudes_con_sesiones:
-                solicitudes_con_sesiones[sesion.id_solicitud] = []
-            solicitudes_con_sesiones[sesion.id_solicitud].append(sesion)
-        
-        activas = len(solicitudes_con_sesiones)
+        tabla = data_store.session_table
+        activas = len(tabla.ids_solicitud)
         
         # Contar atrasadas (sin sesiones en últimos 7 días y con progreso < 100%)
         atrasadas = 0
         hace_7_dias = date.today() - timedelta(days=7)
+        resumenes = tabla.resumen_por_solicitud()
         
         for solicitud in self.solicitudes:
-            if solicitud.id_solicitud in solicitudes_con_sesiones:
-                sesiones_sol = solicitudes_con_sesiones[solicitud.id_solicitud]
-                sesiones_realizadas = [s for s in sesiones_sol if s.tipo_sesion == "Realizada"]
-                
-                if sesiones_realizadas:
-                    ultima_fecha = max(s.fecha_sesion for s in sesiones_realizadas)
+            resumen = resumenes.get(solicitud.id_solicitud)
+            if resumen:
+                if resumen['realizadas']:
+                    ultima_fecha = resumen['ultima_sesion']
                     
                     # Calcular progreso
-                    progreso_calc = SolicitudConProgreso(solicitud, sesiones_sol)
+                    progreso_calc = SolicitudConProgreso(solicitud, resumen=resumen)
                     progreso = progreso_calc.calcular_progreso()
                     
                     # Si progreso < 100% y sin sesiones en 7 días
@@ -871,27 +870,23 @@ class SesionesPanelMejorado:
         for widget in self.progreso_frame.winfo_children():
             widget.destroy()
         
-        # Agrupar sesiones por solicitud
-        solicitudes_con_sesiones = {}
-        for sesion in self.sesiones:
-            if sesion.id_solicitud not in solicitudes_con_sesiones:
-                solicitudes_con_sesiones[sesion.id_solicitud] = []
-            solicitudes_con_sesiones[sesion.id_solicitud].append(sesion)
+        # Totales de todas las solicitudes con sesiones (tabla columnar)
+        resumenes = data_store.session_table.resumen_por_solicitud()
         
-        # Mostrar progreso para cada solicitud
+        # Mostrar progreso para cada solicitud con sesiones
         for solicitud in self.solicitudes:
-            if solicitud.id_solicitud in solicitudes_con_sesiones:
-                sesiones_solicitud = solicitudes_con_sesiones[solicitud.id_solicitud]
-                self.create_progreso_card_mejorada(solicitud, sesiones_solicitud)
+            resumen = resumenes.get(solicitud.id_solicitud)
+            if resumen:
+                self.create_progreso_card_mejorada(solicitud, resumen)
     
-    def create_progreso_card_mejorada(self, solicitud: Solicitud, sesiones: List[Sesion]):
-        """Crea una card de progreso mejorada"""
+    def create_progreso_card_mejorada(self, solicitud: Solicitud, resumen: Dict[str, Any]):
+        """Crea una card de progreso mejorada (resumen: totales de sus sesiones)"""
         # Calcular progreso
-        progreso_calc = SolicitudConProgreso(solicitud, sesiones)
+        progreso_calc = SolicitudConProgreso(solicitud, resumen=resumen)
         progreso = progreso_calc.calcular_progreso()
         
-        sesiones_realizadas = [s for s in sesiones if s.tipo_sesion == "Realizada"]
-        sesiones_planificadas = [s for s in sesiones if s.tipo_sesion == "Planificada"]
+        realizadas = resumen['realizadas']
+        planificadas = resumen['planificadas']
         
         # Determinar estado
         porcentaje = progreso['porcentaje']
@@ -907,8 +902,8 @@ class SesionesPanelMejorado:
         
         # Verificar si está atrasado (sin sesiones en 7 días)
         atrasado = False
-        if sesiones_realizadas and porcentaje < 100:
-            ultima_fecha = max(s.fecha_sesion for s in sesiones_realizadas)
+        if realizadas and porcentaje < 100:
+            ultima_fecha = resumen['ultima_sesion']
             dias_sin_sesion = (date.today() - ultima_fecha).days
             if dias_sin_sesion > 7:
                 atrasado = True
@@ -1001,15 +996,15 @@ class SesionesPanelMejorado:
         # Última y próxima
         info_text = []
         
-        if sesiones_realizadas:
-            ultima_fecha = max(s.fecha_sesion for s in sesiones_realizadas)
-            info_text.append(f"✅ {len(sesiones_realizadas)} realizada{'s' if len(sesiones_realizadas) != 1 else ''} (última: {ultima_fecha.strftime('%d/%m/%Y')})")
+        if realizadas:
+            ultima_fecha = resumen['ultima_sesion']
+            info_text.append(f"✅ {realizadas} realizada{'s' if realizadas != 1 else ''} (última: {ultima_fecha.strftime('%d/%m/%Y')})")
         else:
             info_text.append(f"✅ 0 realizadas")
         
-        if sesiones_planificadas:
-            proxima_fecha = min(s.fecha_sesion for s in sesiones_planificadas)
-            info_text.append(f"📅 {len(sesiones_planificadas)} planificada{'s' if len(sesiones_planificadas) != 1 else ''} (próxima: {proxima_fecha.strftime('%d/%m/%Y')})")
+        if planificadas:
+            proxima_fecha = resumen['proxima_sesion']
+            info_text.append(f"📅 {planificadas} planificada{'s' if planificadas != 1 else ''} (próxima: {proxima_fecha.strftime('%d/%m/%Y')})")
         
         # Alerta si está atrasado
         if atrasado:
@@ -1025,45 +1020,54 @@ class SesionesPanelMejorado:
                 anchor='w'
             ).pack(fill=tk.X)
     
-    def load_data(self):
-        """Carga sesiones y solicitudes desde Google Sheets"""
+    def load_data(self, force: bool = False):
+        """
+        Carga sesiones y solicitudes desde Google Sheets en segundo plano.
+        
+        Args:
+            force: Si es True se buscan cambios en la hoja aunque la caché
+                siga vigente (botón Actualizar)
+        """
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status("Cargando sesiones...")
+        
+        self.loading_label.config(text="⏳ Cargando...")
+        data_store.refresh(['Sesiones', 'Solicitudes'], key='sesiones',
+                           on_done=self._on_data_loaded, on_error=self._on_load_error,
+                           sync=force)
+    
+    def _on_data_loaded(self, events):
+        """Fin de la carga (el repintado llega por _on_store_change)"""
+        self.loading_label.config(text="")
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status(f"✅ {len(self.sesiones)} sesiones cargadas")
+    
+    def _on_load_error(self, e: Exception):
+        """Fallo en la carga en segundo plano"""
+        self.loading_label.config(text="")
+        logger.error(f"Error al cargar datos: {e}")
+        # Se mantienen los últimos datos cargados
+        messagebox.showerror("Error", f"Error al cargar datos:\n{e}")
+    
+    def _on_store_change(self, events):
+        """Repinta solo lo que depende de las hojas que han cambiado"""
         try:
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status("Cargando sesiones...")
-            
-            # Limpiar caché
-            sheets_manager.clear_cache()
-            
-            # Cargar sesiones
-            data_sesiones = sheets_manager.get_all_data('Sesiones')
-            if len(data_sesiones) > 1:
-                self.sesiones = [Sesion.from_sheet_row(row) for row in data_sesiones[1:]]
-            else:
-                self.sesiones = []
-            
-            # Cargar solicitudes
-            data_solicitudes = sheets_manager.get_all_data('Solicitudes')
-            if len(data_solicitudes) > 1:
-                self.solicitudes = [Solicitud.from_sheet_row(row) for row in data_solicitudes[1:]]
-            else:
-                self.solicitudes = []
+            hojas = {event.sheet for event in events}
+            self.sesiones = data_store.sesiones
+            self.solicitudes = data_store.solicitudes
             
-            # Actualizar UI
-            self.update_sesiones_cards()
+            # Las cards y el calendario solo muestran sesiones
+            if 'Sesiones' in hojas:
+                self.update_sesiones_cards()
+                self.crear_calendario()
             self.update_progreso()
             self.update_summary()
-            self.crear_calendario()
-            
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status(f"✅ {len(self.sesiones)} sesiones cargadas")
             
             logger.info(f"🔄 Datos actualizados: {len(self.sesiones)} sesiones, {len(self.solicitudes)} solicitudes")
             
         except Exception as e:
-            logger.error(f"Error al cargar datos: {e}")
-            self.sesiones = []
-            self.solicitudes = []
-            messagebox.showerror("Error", f"Error al cargar datos:\n{e}")
+            logger.error(f"Error al mostrar sesiones: {e}")
+            messagebox.showerror("Error", f"Error al mostrar sesiones:\n{e}")
     
     def nueva_sesion(self, fecha=None):
         """Crea una nueva sesión"""
@@ -1086,24 +1090,12 @@ class SesionesPanelMejorado:
             return
         
         try:
-            # Buscar índice en Sheets
-            data = sheets_manager.get_all_data('Sesiones')
-            row_index = None
-            
-            for i, row in enumerate(data[1:], start=2):
-                if len(row) > 0 and row[0] == sesion.id_sesion:
-                    row_index = i
-                    break
-            
-            if row_index:
-                sheets_manager.delete_row('Sesiones', row_index)
+            # Borrado por ID: se anota en el diario y se envía en segundo plano
+            if data_store.delete('Sesiones', sesion.id_sesion):
                 logger.info(f"✅ Sesión eliminada: {sesion.id_sesion}")
-                
-                # Recargar
-                self.load_data()
                 messagebox.showinfo("Éxito", "Sesión eliminada correctamente")
             else:
-                messagebox.showerror("Error", "No se encontró la sesión en la base de datos")
+                messagebox.showerror("Error", "No se pudo registrar el borrado")
             
         except Exception as e:
             logger.error(f"Error al eliminar sesión: {e}")
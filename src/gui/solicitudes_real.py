@@ -6,13 +6,14 @@ from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 from typing import List, Optional
 import json
+import copy
 
 from src.models.solicitud_real import Solicitud
 from src.constants_real import (
     TIPOS_SERVICIOS, TIPOS_USUARIO, ESTADOS_SOLICITUD,
     TARIFAS_SERVICIOS, HEADERS_SOLICITUDES, RANGO_SOLICITUDES
 )
-from src.utils.sheets_manager import sheets_manager
+from src.utils.data_store import data_store
 from src.utils.pdf_extractor import PDFExtractor
 from src.utils.logger import logger
 
@@ -28,6 +29,7 @@ class SolicitudesRealPanel:
         self.pdf_extractor = PDFExtractor()
         
         self.build_ui()
+        data_store.subscribe(self._on_store_change, ['Solicitudes'])
         self.load_data()
     
     def build_ui(self):
@@ -86,9 +88,13 @@ class SolicitudesRealPanel:
         btn_refresh = self.theme.create_secondary_button(
             btn_frame,
             "🔄 Actualizar",
-            self.load_data
+            lambda: self.load_data(force=True)
         )
         btn_refresh.pack(side=tk.LEFT, padx=5)
+        
+        # Indicador de carga
+        self.loading_label = self.theme.create_loading_label(header_frame)
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
     
     def create_solicitudes_list(self, parent):
         """Crea la lista de solicitudes"""
@@ -196,40 +202,50 @@ class SolicitudesRealPanel:
         )
         btn_delete.pack(side=tk.LEFT, padx=5)
     
-    def load_data(self):
-        """Carga las solicitudes desde Google Sheets"""
-        try:
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status("Cargando solicitudes...")
-            
-            # IMPORTANTE: Limpiar caché para obtener datos frescos
-            sheets_manager.clear_cache()
-            
-            data = sheets_manager.get_all_data('Solicitudes')
-            
-            if len(data) > 1:  # Si hay datos además del encabezado
-                self.solicitudes = [Solicitud.from_sheet_row(row) for row in data[1:]]
-            else:
-                self.solicitudes = []
-            
-            self.update_tree()
-            
-            if hasattr(self.main_window, 'update_status'):
-                self.main_window.update_status(f"✅ {len(self.solicitudes)} solicitudes cargadas")
-            
-            logger.info(f"🔄 Datos actualizados: {len(self.solicitudes)} solicitudes")
-            
-        except Exception as e:
-            logger.error(f"Error al cargar solicitudes: {e}")
-            self.solicitudes = []
-            self.update_tree()
-            # Mostrar mensaje en detalles
-            self.details_text.config(state='normal')
-            self.details_text.delete(1.0, tk.END)
+    def load_data(self, force: bool = False):
+        """
+        Carga las solicitudes desde Google Sheets en segundo plano.
+        
+        Args:
+            force: Si es True se buscan cambios en la hoja aunque la caché
+                siga vigente (botón Actualizar)
+        """
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status("Cargando solicitudes...")
+        
+        self.loading_label.config(text="⏳ Cargando...")
+        data_store.refresh(['Solicitudes'], key='solicitudes',
+                           on_done=self._on_data_loaded, on_error=self._on_load_error,
+                           sync=force)
+    
+    def _on_data_loaded(self, events):
+        """Fin de la carga (el repintado llega por _on_store_change)"""
+        self.loading_label.config(text="")
+        if hasattr(self.main_window, 'update_status'):
+            self.main_window.update_status(f"✅ {len(self.solicitudes)} solicitudes cargadas")
+    
+    def _on_store_change(self, events):
+        """Repinta la lista cuando cambian las solicitudes"""
+        self.solicitudes = data_store.solicitudes
+        self.update_tree()
+        logger.info(f"🔄 Datos actualizados: {len(self.solicitudes)} solicitudes")
+    
+    def _on_load_error(self, e: Exception):
+        """Fallo en la carga en segundo plano"""
+        self.loading_label.config(text="")
+        logger.error(f"Error al cargar solicitudes: {e}")
+        # Se mantienen los últimos datos cargados; se explica el motivo en detalles
+        self.details_text.config(state='normal')
+        self.details_text.delete(1.0, tk.END)
+        if getattr(e, 'status', None) == 429:
+            self.details_text.insert(tk.END, "⚠️ Límite de peticiones de Google Sheets alcanzado\n\n")
+            self.details_text.insert(tk.END, "Se muestran los últimos datos cargados.\n")
+            self.details_text.insert(tk.END, "Vuelve a actualizar en un minuto.")
+        else:
             self.details_text.insert(tk.END, "⚠️ Sin conexión a Google Sheets\n\n")
             self.details_text.insert(tk.END, "Configura las credenciales desde el menú Configuración\n")
             self.details_text.insert(tk.END, "para cargar las solicitudes.")
-            self.details_text.config(state='disabled')
+        self.details_text.config(state='disabled')
     
     def update_tree(self):
         """Actualiza el árbol con las solicitudes"""
@@ -380,11 +396,12 @@ class SolicitudesRealPanel:
             item = self.tree.item(selection[0])
             id_solicitud = item['values'][0]
             
-            # Eliminar de Sheets (implementar)
-            # sheets_manager.delete_row(...)
+            # Borrado por ID: se anota en el diario y se envía en segundo plano
+            if not data_store.delete('Solicitudes', str(id_solicitud)):
+                messagebox.showerror("Error", "No se pudo registrar el borrado")
+                return
             
-            # Recargar
-            self.load_data()
+            logger.info(f"✅ Solicitud eliminada: {id_solicitud}")
             messagebox.showinfo("Éxito", "Solicitud eliminada correctamente")
             
         except Exception as e:
@@ -520,47 +537,28 @@ class SolicitudesRealPanel:
             if not confirmar:
                 return
             
-            # Actualizar estado
+            # Actualizar estado (sobre una copia: el modelo es compartido por los paneles)
+            solicitud = copy.copy(solicitud)
             solicitud.estado = "En proceso"
             
-            # Guardar en Google Sheets
+            # Guardar (diario local, envío en segundo plano)
             try:
-                # Buscar índice de la fila
-                data = sheets_manager.get_all_data('Solicitudes')
-                row_index = None
-                
-                for i, row in enumerate(data[1:], start=2):
-                    if len(row) > 0 and row[0] == solicitud.id_solicitud:
-                        row_index = i
-                        break
-                
-                if row_index:
-                    # Actualizar fila completa
-                    row = solicitud.to_sheet_row()
-                    resultado = sheets_manager.update_row('Solicitudes', row_index, row)
+                if data_store.save('Solicitudes', solicitud.to_sheet_row()):
+                    logger.info(f"✅ Solicitud marcada 'En proceso': {solicitud.id_solicitud}")
                     
-                    if resultado:
-                        logger.info(f"✅ Solicitud marcada 'En proceso': {solicitud.id_solicitud}")
-                        
-                        # Recargar datos
-                        self.load_data()
-                        
-                        messagebox.showinfo(
-                            "Éxito",
-                            f"✅ Solicitud marcada como 'En proceso'\n\n"
-                            f"Ya puedes comenzar a registrar sesiones para este servicio."
-                        )
-                    else:
-                        raise Exception("No se pudo actualizar en Google Sheets")
+                    messagebox.showinfo(
+                        "Éxito",
+                        f"✅ Solicitud marcada como 'En proceso'\n\n"
+                        f"Ya puedes comenzar a registrar sesiones para este servicio."
+                    )
                 else:
-                    raise Exception("No se encontró la solicitud en la base de datos")
+                    raise Exception("No se pudo registrar el cambio en el diario local")
                 
             except Exception as e_sheets:
                 logger.error(f"❌ Error al actualizar estado: {e_sheets}")
                 messagebox.showerror(
                     "Error al Actualizar",
-                    f"No se pudo guardar el cambio de estado:\n\n{e_sheets}\n\n"
-                    "Verifica la conexión y permisos en Google Sheets."
+                    f"No se pudo guardar el cambio de estado:\n\n{e_sheets}"
                 )
                 
         except Exception as e:
@@ -290,6 +290,18 @@ class Microsoft365Theme:
             **kwargs
         )
     
+    @classmethod
+    def create_loading_label(cls, parent, **kwargs):
+        """Crea el indicador de carga de un panel (vacío mientras no carga)"""
+        return tk.Label(
+            parent,
+            text="",
+            font=(cls.FONTS['family'], cls.FONTS['size_small']),
+            fg=cls.COLORS['text_secondary'],
+            bg=cls.COLORS['bg_main'],
+            **kwargs
+        )
+    
     @classmethod
     def create_primary_button(cls, parent, text, command, **kwargs):
         """Crea un botón primario"""
@@ -0,0 +1,124 @@
+"""
+Modelos compactos en memoria
+Dataclasses con __slots__ y construcción directa sin valores por defecto
+"""
+import json
+import sys
+from dataclasses import field, fields
+from typing import Any, Optional
+
+
+def slotted(cls):
+    """
+    Rehace una dataclass con __slots__ (sin __dict__ por instancia).
+
+    Equivale a @dataclass(slots=True), que solo existe desde Python 3.10.
+    Se aplica encima de @dataclass:
+
+        @slotted
+        @dataclass
+        class Modelo: ...
+
+    Las instancias ocupan bastante menos y no admiten atributos que no
+    sean campos. Los campos declarados con lazy_json_field() se convierten
+    en propiedades.
+    """
+    nombres = tuple(f.name for f in fields(cls))
+    perezosos = [f.name for f in fields(cls) if f.metadata.get('lazy_json')]
+    slots = []
+    for nombre in nombres:
+        slots.extend(_lazy_slots(nombre) if nombre in perezosos else (nombre,))
+    namespace = dict(cls.__dict__)
+    namespace['__slots__'] = tuple(slots)
+    # Los valores por defecto ya están en el __init__ generado; como atributos
+    # de clase chocarían con los slots
+    for nombre in nombres:
+        namespace.pop(nombre, None)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+
+    nueva = type(cls)(cls.__name__, cls.__bases__, namespace)
+    nueva.__qualname__ = cls.__qualname__
+    for nombre in perezosos:
+        texto, valor = (getattr(nueva, slot) for slot in _lazy_slots(nombre))
+        setattr(nueva, nombre, _lazy_json_property(texto, valor))
+    return nueva
+
+
+def intern_text(value: Any) -> Any:
+    """
+    Comparte en memoria los textos repetidos (estado, servicio, tipo...).
+
+    Cada fila leída trae su propia copia de cada texto; con miles de filas
+    los valores de pocas categorías se repiten a millares.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+# === CAMPOS JSON PEREZOSOS ===
+
+class RawJSON:
+    """Texto JSON de una celda, todavía sin interpretar (ver lazy_json_field)"""
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def lazy_json_field(**kwargs):
+    """
+    Campo con un valor JSON que se interpreta al leerlo por primera vez.
+
+    Al asignarle un RawJSON se guarda el texto tal cual; la primera lectura
+    lo convierte con json.loads ({} si está vacío o no es válido) y guarda
+    el resultado. Asignar cualquier otro valor lo sustituye. json_text()
+    devuelve el texto original mientras el campo no se haya leído ni
+    asignado, para escribirlo de vuelta sin volver a serializarlo.
+
+    Solo para modelos @slotted: mismos argumentos que dataclasses.field.
+    """
+    metadata = dict(kwargs.pop('metadata', None) or {})
+    metadata['lazy_json'] = True
+    return field(metadata=metadata, **kwargs)
+
+
+def json_text(obj: Any, name: str) -> Optional[str]:
+    """Texto JSON original de un campo perezoso (None si ya se ha leído o asignado)"""
+    return getattr(obj, _lazy_slots(name)[0])
+
+
+def _lazy_slots(name: str):
+    # (texto sin interpretar, valor interpretado)
+    return (f"_{name}_json", f"_{name}_value")
+
+
+def _parse_json(texto: str) -> Any:
+    if not texto:
+        return {}
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return {}
+
+
+def _lazy_json_property(slot_texto, slot_valor) -> property:
+    leer_texto, poner_texto = slot_texto.__get__, slot_texto.__set__
+    leer_valor, poner_valor = slot_valor.__get__, slot_valor.__set__
+
+    def obtener(self):
+        texto = leer_texto(self)
+        if texto is not None:
+            poner_valor(self, _parse_json(texto))
+            # El valor devuelto se puede modificar: el texto ya no sirve
+            poner_texto(self, None)
+        return leer_valor(self)
+
+    def asignar(self, valor):
+        if type(valor) is RawJSON:
+            poner_texto(self, valor.text)
+            poner_valor(self, None)
+        else:
+            poner_texto(self, None)
+            poner_valor(self, valor)
+
+    return property(obtener, asignar)
@@ -8,10 +8,17 @@ from typing import Optional, Dict, Any
 import json
 import uuid
 
+from src.models.compact import slotted
 
+
+@slotted
 @dataclass
 class Sesion:
-    """Representa una sesión de servicio vinculada a una solicitud"""
+    """
+    Representa una sesión de servicio vinculada a una solicitud.
+    
+    Con __slots__ (ver compact.slotted), como Solicitud.
+    """
     
     # === IDENTIFICACIÓN ===
     id_sesion: str = field(default_factory=lambda: f"IRC-Ses-{uuid.uuid4().hex[:7]}")
@@ -40,9 +47,9 @@ class Sesion:
     notas: str = ""
     operador: str = ""  # Quién realizó/planificó la sesión
     
-    # === METADATOS ===
+    # === METADATOS (None en las leídas de la hoja) ===
     creado_por: str = ""
-    fecha_creacion: datetime = field(default_factory=datetime.now)
+    fecha_creacion: Optional[datetime] = field(default_factory=datetime.now)
     
     def to_sheet_row(self) -> list:
         """
@@ -85,54 +92,16 @@ class Sesion:
     
     @staticmethod
     def from_sheet_row(row: list) -> 'Sesion':
-        """Crea una Sesión desde una fila de Google Sheets"""
-        sesion = Sesion()
-        
-        if len(row) > 0:
-            sesion.id_sesion = str(row[0]) if row[0] else sesion.id_sesion
-        if len(row) > 1:
-            sesion.id_solicitud = str(row[1]) if row[1] else ""
-        if len(row) > 2:
-            try:
-                sesion.fecha_sesion = datetime.strptime(str(row[2]), "%Y-%m-%d").date()
-            except:
-                sesion.fecha_sesion = date.today()
-        if len(row) > 3:
-            sesion.tipo_sesion = str(row[3]) if row[3] else "Realizada"
-        if len(row) > 4:
-            sesion.servicio = str(row[4]) if row[4] else ""
-        if len(row) > 5:
-            sesion.solicitante = str(row[5]) if row[5] else ""
-        if len(row) > 6:
-            try:
-                sesion.canisters_procesados = int(row[6]) if row[6] else 0
-            except:
-                sesion.canisters_procesados = 0
-        if len(row) > 7:
-            try:
-                sesion.dosis_aplicada_gy = float(row[7]) if row[7] else 0.0
-            except:
-                sesion.dosis_aplicada_gy = 0.0
-        if len(row) > 8:
-            sesion.mes_gestion = str(row[8]) if row[8] else ""
-        if len(row) > 9:
-            try:
-                sesion.dosimetros_gestionados = int(row[9]) if row[9] else 0
-            except:
-                sesion.dosimetros_gestionados = 0
-        if len(row) > 10:
-            try:
-                sesion.horas_contador = float(row[10]) if row[10] else 0.0
-            except:
-                sesion.horas_contador = 0.0
-        if len(row) > 11:
-            sesion.descripcion_residuos = str(row[11]) if row[11] else ""
-        if len(row) > 12:
-            sesion.notas = str(row[12]) if row[12] else ""
-        if len(row) > 13:
-            sesion.operador = str(row[13]) if row[13] else ""
+        """
+        Crea una Sesión desde una fila de Google Sheets.
         
-        return sesion
+        Usa el decodificador de la carga por lotes (ver
+        Solicitud.from_sheet_row). Acepta texto formateado y valores sin
+        formato.
+        """
+        # Import diferido: row_codec importa este módulo
+        from src.utils.row_codec import default_codec
+        return default_codec(Sesion).decode_row(row)
     
     @staticmethod
     def get_sheet_headers() -> list:
@@ -155,17 +124,49 @@ class Sesion:
         ]
 
 
+def resumir_sesiones(sesiones: list) -> Dict[str, Any]:
+    """
+    Totales de las sesiones de una solicitud que usan el progreso y el estado.
+    
+    SessionTable.resumen_por_solicitud() da lo mismo para todas las
+    solicitudes a la vez.
+    
+    Returns:
+        Dict con realizadas, planificadas (número de sesiones),
+        ultima_sesion, proxima_sesion (date o None) y canisters, horas y
+        meses (distintos) de las realizadas
+    """
+    realizadas = [s for s in sesiones if s.tipo_sesion == "Realizada"]
+    planificadas = [s for s in sesiones if s.tipo_sesion == "Planificada"]
+    return {
+        'realizadas': len(realizadas),
+        'planificadas': len(planificadas),
+        'ultima_sesion': max((s.fecha_sesion for s in realizadas), default=None),
+        'proxima_sesion': min((s.fecha_sesion for s in planificadas), default=None),
+        'canisters': sum(s.canisters_procesados for s in realizadas),
+        'horas': sum(s.horas_contador for s in realizadas),
+        'meses': len(set(s.mes_gestion for s in realizadas if s.mes_gestion)),
+    }
+
 class SolicitudConProgreso:
     """
     Clase auxiliar para calcular el progreso de una solicitud
     basándose en sus sesiones
     """
     
-    def __init__(self, solicitud, sesiones: list):
+    def __init__(self, solicitud, sesiones: Optional[list] = None,
+                 resumen: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            solicitud: Solicitud
+            sesiones: Sesiones de la solicitud
+            resumen: Totales ya calculados (resumir_sesiones o
+                SessionTable.resumen_por_solicitud); si se da, no hacen
+                falta las sesiones
+        """
         self.solicitud = solicitud
-        self.sesiones = sesiones
-        self.sesiones_realizadas = [s for s in sesiones if s.tipo_sesion == "Realizada"]
-        self.sesiones_planificadas = [s for s in sesiones if s.tipo_sesion == "Planificada"]
+        self.sesiones = sesiones or []
+        self.resumen = resumen if resumen is not None else resumir_sesiones(self.sesiones)
     
     def calcular_progreso(self) -> Dict[str, Any]:
         """
@@ -202,10 +203,10 @@ class SolicitudConProgreso:
         else:
             return {
                 'total_esperado': 1,
-                'completado': len(self.sesiones_realizadas),
-                'pendiente': max(0, 1 - len(self.sesiones_realizadas)),
-                'porcentaje': 100.0 if self.sesiones_realizadas else 0.0,
-                'detalles': f"{len(self.sesiones_realizadas)} sesión(es) realizada(s)"
+                'completado': self.resumen['realizadas'],
+                'pendiente': max(0, 1 - self.resumen['realizadas']),
+                'porcentaje': 100.0 if self.resumen['realizadas'] else 0.0,
+                'detalles': f"{self.resumen['realizadas']} sesión(es) realizada(s)"
             }
     
     def _progreso_irradiacion(self, detalles: dict) -> dict:
@@ -213,7 +214,7 @@ class SolicitudConProgreso:
         canisters_totales = detalles.get('canisters', 0)
         
         # Contar canisters procesados
-        canisters_procesados = sum(s.canisters_procesados for s in self.sesiones_realizadas)
+        canisters_procesados = self.resumen['canisters']
         canisters_pendientes = max(0, canisters_totales - canisters_procesados)
         
         porcentaje = (canisters_procesados / canisters_totales * 100) if canisters_totales > 0 else 0
@@ -233,7 +234,7 @@ class SolicitudConProgreso:
         meses_totales = detalles.get('meses', 0)
         
         # Contar meses únicos gestionados
-        meses_gestionados = len(set(s.mes_gestion for s in self.sesiones_realizadas if s.mes_gestion))
+        meses_gestionados = self.resumen['meses']
         meses_pendientes = max(0, meses_totales - meses_gestionados)
         
         porcentaje = (meses_gestionados / meses_totales * 100) if meses_totales > 0 else 0
@@ -252,7 +253,7 @@ class SolicitudConProgreso:
         horas_totales = detalles.get('horas', 0)
         
         # Sumar horas usadas
-        horas_usadas = sum(s.horas_contador for s in self.sesiones_realizadas)
+        horas_usadas = self.resumen['horas']
         horas_pendientes = max(0, horas_totales - horas_usadas)
         
         porcentaje = (horas_usadas / horas_totales * 100) if horas_totales > 0 else 0
@@ -268,7 +269,7 @@ class SolicitudConProgreso:
     
     def _progreso_residuos(self) -> dict:
         """Progreso para gestión de residuos - simple realizado/no"""
-        realizado = len(self.sesiones_realizadas) > 0
+        realizado = self.resumen['realizadas'] > 0
         
         return {
             'total_esperado': 1,
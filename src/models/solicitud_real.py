@@ -2,15 +2,23 @@
 Modelo de Solicitud de Servicio IRC - Adaptado a estructura real
 """
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, Dict, Any
 import json
 import uuid
 
+from src.models.compact import slotted, lazy_json_field, json_text
 
+
+@slotted
 @dataclass
 class Solicitud:
-    """Representa una solicitud de servicio IRC con estructura real del Google Sheets"""
+    """
+    Representa una solicitud de servicio IRC con estructura real del Google Sheets.
+    
+    Con __slots__ (ver compact.slotted): se mantienen en memoria todas las
+    solicitudes de varios años.
+    """
     
     # === IDENTIFICACIÓN ===
     id_solicitud: str = field(default_factory=lambda: f"IRC-Sol-{uuid.uuid4().hex[:7]}")
@@ -20,7 +28,8 @@ class Solicitud:
     # === SERVICIO ===
     servicio_solicitado: str = ""
     coste_estimado_iva_0: float = 0.0
-    detalles_servicio: Dict[str, Any] = field(default_factory=dict)  # JSON con detalles específicos
+    # JSON con detalles específicos; se interpreta al leerlo (ver compact.lazy_json_field)
+    detalles_servicio: Dict[str, Any] = lazy_json_field(default_factory=dict)
     
     # === DATOS DEL SOLICITANTE ===
     nombre_solicitante: str = ""
@@ -46,9 +55,9 @@ class Solicitud:
     # === OTROS ===
     observaciones: str = ""
     
-    # === METADATOS (no en sheets) ===
+    # === METADATOS (no en sheets; None en las leídas de la hoja) ===
     creado_por: str = ""
-    fecha_creacion: datetime = field(default_factory=datetime.now)
+    fecha_creacion: Optional[datetime] = field(default_factory=datetime.now)
     
     def calcular_coste(self, tarifas: Dict[str, Any]) -> float:
         """
@@ -132,13 +141,18 @@ class Solicitud:
     
     def to_sheet_row(self) -> list:
         """Convierte la solicitud a fila de Google Sheets (24 columnas)"""
+        # Detalles sin leer ni modificar: se escribe el mismo texto de la hoja
+        detalles = json_text(self, 'detalles_servicio')
+        if detalles is None:
+            detalles = json.dumps(self.detalles_servicio, ensure_ascii=False)
+        
         return [
             self.id_solicitud,
             self.fecha_solicitud.strftime("%Y-%m-%d") if self.fecha_solicitud else "",
             self.estado,
             self.servicio_solicitado,
             str(self.coste_estimado_iva_0),
-            json.dumps(self.detalles_servicio, ensure_ascii=False),  # JSON como string
+            detalles,  # JSON como string
             self.nombre_solicitante,
             self.email,
             self.telefono,
@@ -161,66 +175,17 @@ class Solicitud:
     
     @classmethod
     def from_sheet_row(cls, row: list) -> 'Solicitud':
-        """Crea una solicitud desde una fila de Google Sheets"""
-        def safe_get(index, default=""):
-            return row[index] if len(row) > index and row[index] else default
-        
-        def safe_date(value):
-            if not value:
-                return None
-            try:
-                # Intentar varios formatos
-                for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S"]:
-                    try:
-                        return datetime.strptime(str(value).split()[0], fmt)
-                    except:
-                        continue
-                return None
-            except:
-                return None
-        
-        def safe_float(value):
-            try:
-                return float(value) if value else 0.0
-            except:
-                return 0.0
-        
-        def safe_json(value):
-            if not value:
-                return {}
-            try:
-                if isinstance(value, dict):
-                    return value
-                return json.loads(value)
-            except:
-                return {}
+        """
+        Crea una solicitud desde una fila de Google Sheets.
         
-        return cls(
-            id_solicitud=safe_get(0),
-            fecha_solicitud=safe_date(safe_get(1)) or datetime.now(),
-            estado=safe_get(2, "⏳ Pendiente"),
-            servicio_solicitado=safe_get(3),
-            coste_estimado_iva_0=safe_float(safe_get(4)),
-            detalles_servicio=safe_json(safe_get(5)),
-            nombre_solicitante=safe_get(6),
-            email=safe_get(7),
-            telefono=safe_get(8),
-            organismo_centro_solicitante=safe_get(9),
-            departamento_solicitante=safe_get(10),
-            investigador_principal=safe_get(11),
-            tipo_usuario=safe_get(12, "UCM"),
-            organismo_centro_facturacion=safe_get(13),
-            departamento_facturacion=safe_get(14),
-            cif=safe_get(15),
-            domicilio_fiscal=safe_get(16),
-            domicilio_postal=safe_get(17),
-            oficina_contable=safe_get(18),
-            organo_gestor=safe_get(19),
-            centro_gestor=safe_get(20),
-            proyecto=safe_get(21),
-            numero_contabilidad=safe_get(22),
-            observaciones=safe_get(23),
-        )
+        Usa el decodificador de la carga por lotes (row_codec) con el orden
+        de columnas por defecto, así que una fila da la misma solicitud se
+        lea sola o con el resto de la hoja. Acepta texto formateado y
+        valores sin formato.
+        """
+        # Import diferido: row_codec importa este módulo
+        from src.utils.row_codec import default_codec
+        return default_codec(cls).decode_row(row)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convierte la solicitud a diccionario"""
@@ -0,0 +1,86 @@
+"""
+Utilidades de notación A1 (rangos de Google Sheets)
+Convierte rangos tipo 'A1:Z100' a índices y viceversa
+"""
+import re
+from typing import Optional, Tuple
+
+_CELDA_RE = re.compile(r'^([A-Za-z]*)(\d*)$')
+
+
+def column_index(letras: str) -> int:
+    """
+    Convierte letras de columna a índice 0-based.
+
+    Args:
+        letras: Letras de la columna (ej: 'A', 'Z', 'AB')
+
+    Returns:
+        int: Índice de la columna (A=0)
+    """
+    indice = 0
+    for letra in letras.upper():
+        indice = indice * 26 + (ord(letra) - ord('A') + 1)
+    return indice - 1
+
+
+def column_letter(indice: int) -> str:
+    """
+    Convierte un índice de columna 0-based a letras.
+
+    Args:
+        indice: Índice de la columna (0 = A)
+
+    Returns:
+        str: Letras de la columna
+    """
+    letras = ""
+    indice += 1
+    while indice > 0:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+def split_sheet(rango: str) -> Tuple[Optional[str], str]:
+    """
+    Separa el nombre de la hoja del rango ('Hoja!A1:B2' -> ('Hoja', 'A1:B2')).
+
+    Returns:
+        tuple: (nombre_hoja o None, rango)
+    """
+    if '!' not in rango:
+        return None, rango
+    hoja, resto = rango.rsplit('!', 1)
+    return hoja.strip("'"), resto
+
+
+def parse_range(rango: str) -> Tuple[int, Optional[int], int, Optional[int]]:
+    """
+    Convierte un rango A1 a límites numéricos.
+
+    Args:
+        rango: Rango en formato A1 sin nombre de hoja (ej: 'A1:Z100', 'A:A', 'A5')
+
+    Returns:
+        tuple: (fila_inicio, fila_fin, col_inicio, col_fin)
+            Filas 1-based, columnas 0-based. None en el final indica rango abierto.
+    """
+    partes = rango.split(':')
+    inicio = _CELDA_RE.match(partes[0].strip())
+    fin = _CELDA_RE.match(partes[-1].strip())
+
+    if not inicio or not fin:
+        raise ValueError(f"Rango A1 no válido: {rango}")
+
+    col_ini = column_index(inicio.group(1)) if inicio.group(1) else 0
+    fila_ini = int(inicio.group(2)) if inicio.group(2) else 1
+    col_fin = column_index(fin.group(1)) if fin.group(1) else None
+    fila_fin = int(fin.group(2)) if fin.group(2) else None
+
+    # Una sola celda ('A5') abarca solo esa celda
+    if len(partes) == 1:
+        col_fin = col_ini if inicio.group(1) else None
+        fila_fin = fila_ini if inicio.group(2) else None
+
+    return fila_ini, fila_fin, col_ini, col_fin
@@ -0,0 +1,212 @@
+"""
+Caché de lecturas de SheetsManager
+LRU acotada con TTL, invalidación por hoja y por solapamiento de rangos
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Any, Tuple
+import logging
+
+from config import APP_CONFIG
+from src.utils.a1_notation import parse_range
+
+logger = logging.getLogger(__name__)
+
+
+def ranges_overlap(range_a: str, range_b: str) -> bool:
+    """
+    Indica si dos rangos A1 (sin nombre de hoja) se solapan.
+
+    Un rango no interpretable se considera solapado por seguridad.
+    """
+    try:
+        fila_a1, fila_a2, col_a1, col_a2 = parse_range(range_a)
+        fila_b1, fila_b2, col_b1, col_b2 = parse_range(range_b)
+    except ValueError:
+        return True
+
+    filas = (fila_a2 is None or fila_a2 >= fila_b1) and (fila_b2 is None or fila_b2 >= fila_a1)
+    columnas = (col_a2 is None or col_a2 >= col_b1) and (col_b2 is None or col_b2 >= col_a1)
+    return filas and columnas
+
+
+class SheetCache:
+    """
+    Caché de rangos leídos, con clave (hoja, rango).
+
+    - Tamaño máximo con expulsión LRU
+    - TTL configurable (APP_CONFIG['CACHE_TTL_MINUTES'])
+    - Invalidación por hoja o por rangos solapados
+    - Contadores de aciertos y fallos
+    - Segura entre hilos (el cargador en segundo plano y el hilo de Tk la
+      usan a la vez)
+
+    Los rangos de `pinned` (la hoja completa en SheetsManager) son la copia
+    local de la que dependen el índice de filas, el diario, la
+    sincronización incremental y el trabajo sin conexión. Se guardan aparte:
+    - La LRU no los expulsa
+    - Se guardan aunque la caché esté desactivada; en ese caso get() y
+      peek() los tratan como caducados y solo peek(allow_expired=True) los
+      devuelve
+    - invalidate() e invalidate_sheet() los marcan como caducados en vez
+      de borrarlos; solo clear() los elimina. invalidate_range() no los
+      toca: quien escribe los actualiza con replace()
+    """
+
+    def __init__(self, ttl_minutes: Optional[float] = None, max_entries: Optional[int] = None,
+                 enabled: Optional[bool] = None, pinned: Tuple[str, ...] = ()):
+        self.ttl = timedelta(minutes=ttl_minutes if ttl_minutes is not None
+                             else APP_CONFIG.get('CACHE_TTL_MINUTES', 5))
+        self.max_entries = max_entries if max_entries is not None else APP_CONFIG.get('CACHE_MAX_ENTRIES', 64)
+        self.enabled = enabled if enabled is not None else APP_CONFIG.get('CACHE_ENABLED', True)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[List[Any]], datetime]]" = OrderedDict()
+        # Copias fijas, fuera de la LRU: {(hoja, rango): (valores, momento)}
+        self.pinned_ranges = frozenset(pinned)
+        self._pinned: Dict[Tuple[str, str], Tuple[List[List[Any]], datetime]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Reentrante: replace() llama a put() con el candado ya tomado
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) + len(self._pinned)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return self.peek(*key) is not None
+
+    def _expired(self, timestamp: datetime) -> bool:
+        return not self.enabled or datetime.now() - timestamp >= self.ttl
+
+    def _entry(self, key: Tuple[str, str]) -> Optional[Tuple[List[List[Any]], datetime]]:
+        return self._pinned.get(key) if key[1] in self.pinned_ranges else self._entries.get(key)
+
+    def get(self, sheet_name: str, range_name: str) -> Optional[List[List[Any]]]:
+        """
+        Obtiene un rango de la caché (cuenta acierto/fallo).
+
+        Returns:
+            Valores en caché o None si no hay entrada válida
+        """
+        key = (sheet_name, range_name)
+        with self._lock:
+            entry = self._entry(key)
+
+            if entry is None or self._expired(entry[1]):
+                # Una entrada caducada no se borra: sigue siendo la copia local
+                # (base de la sincronización incremental y datos sin conexión)
+                self.misses += 1
+                return None
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        logger.debug(f"Cache hit para {sheet_name}!{range_name}")
+        return entry[0]
+
+    def peek(self, sheet_name: str, range_name: str,
+             allow_expired: bool = False) -> Optional[List[List[Any]]]:
+        """
+        Como get(), pero sin alterar contadores ni el orden LRU.
+
+        Con allow_expired devuelve también entradas caducadas (sirven de base
+        para una sincronización incremental).
+        """
+        with self._lock:
+            entry = self._entry((sheet_name, range_name))
+        if entry is None or (self._expired(entry[1]) and not allow_expired):
+            return None
+        return entry[0]
+
+    def put(self, sheet_name: str, range_name: str, values: List[List[Any]],
+            timestamp: Optional[datetime] = None):
+        """
+        Guarda un rango en la caché.
+
+        Args:
+            timestamp: Momento de la lectura (por defecto ahora). Al modificar
+                en local datos ya cacheados se conserva el original para que
+                el TTL siga contando desde la última descarga real.
+        """
+        key = (sheet_name, range_name)
+        if range_name in self.pinned_ranges:
+            # Copia local: se guarda siempre y no cuenta para la LRU
+            with self._lock:
+                self._pinned[key] = (values, timestamp or datetime.now())
+            return
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (values, timestamp or datetime.now())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def replace(self, sheet_name: str, range_name: str, values: List[List[Any]]):
+        """Sustituye los valores de una entrada conservando su antigüedad"""
+        with self._lock:
+            entry = self._entry((sheet_name, range_name))
+            self.put(sheet_name, range_name, values, timestamp=entry[1] if entry else None)
+
+    def _expire_pinned(self, key: Tuple[str, str]):
+        # Se conserva como copia local, pero ya no cuenta como lectura reciente
+        entry = self._pinned.get(key)
+        if entry is not None:
+            self._pinned[key] = (entry[0], datetime.min)
+
+    def invalidate(self, sheet_name: str, range_name: str):
+        """Elimina una entrada concreta (las fijas se marcan como caducadas)"""
+        with self._lock:
+            self._entries.pop((sheet_name, range_name), None)
+            self._expire_pinned((sheet_name, range_name))
+
+    def invalidate_sheet(self, sheet_name: str, keep: Optional[str] = None):
+        """
+        Elimina todas las entradas de una hoja (salvo, si se indica, la del
+        rango keep); las fijas se marcan como caducadas.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == sheet_name and k[1] != keep]:
+                del self._entries[key]
+            for key in [k for k in self._pinned if k[0] == sheet_name and k[1] != keep]:
+                self._expire_pinned(key)
+
+    def invalidate_range(self, sheet_name: str, range_name: str):
+        """Elimina las entradas de la hoja cuyo rango se solapa con range_name (salvo las fijas)"""
+        with self._lock:
+            for key in [k for k in self._entries
+                        if k[0] == sheet_name and ranges_overlap(k[1], range_name)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Vacía la caché, copias fijas incluidas (los contadores se mantienen)"""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def reset_stats(self):
+        """Pone a cero los contadores"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'pinned': len(self._pinned),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
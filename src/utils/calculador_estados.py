@@ -3,9 +3,10 @@ Calculador Centralizado de Estados y Progreso
 Asegura que Dashboard y Sesiones usen la misma lógica
 """
 from datetime import date, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any
 from src.models.solicitud_real import Solicitud
-from src.models.sesion import Sesion
+from src.models.sesion import Sesion, resumir_sesiones
+from src.utils.session_table import SessionTable
 
 
 class CalculadorEstados:
@@ -36,13 +37,17 @@ class CalculadorEstados:
                 'necesita_atencion': bool
             }
         """
-        # Filtrar sesiones
-        sesiones_realizadas = [s for s in sesiones if s.tipo_sesion == "Realizada"]
-        sesiones_planificadas = [s for s in sesiones if s.tipo_sesion == "Planificada"]
-        
+        return CalculadorEstados.calcular_estado_desde_resumen(solicitud, resumir_sesiones(sesiones))
+    
+    @staticmethod
+    def calcular_estado_desde_resumen(solicitud: Solicitud, resumen: Dict[str, Any]) -> Dict:
+        """
+        Como calcular_estado_y_progreso, a partir de los totales de sus
+        sesiones (resumir_sesiones o SessionTable.resumen_por_solicitud).
+        """
         # Fechas
-        ultima_sesion = max((s.fecha_sesion for s in sesiones_realizadas), default=None)
-        proxima_sesion = min((s.fecha_sesion for s in sesiones_planificadas), default=None)
+        ultima_sesion = resumen['ultima_sesion']
+        proxima_sesion = resumen['proxima_sesion']
         
         # Días sin actividad
         dias_sin_actividad = 0
@@ -50,14 +55,14 @@ class CalculadorEstados:
             dias_sin_actividad = (date.today() - ultima_sesion).days
         
         # Calcular progreso específico según tipo de servicio
-        progreso = CalculadorEstados._calcular_progreso_especifico(solicitud, sesiones_realizadas)
+        progreso = CalculadorEstados._progreso_desde_resumen(solicitud, resumen)
         
         # Determinar estado real
         estado_calculado = CalculadorEstados._determinar_estado(
             solicitud,
             progreso['porcentaje'],
-            len(sesiones_realizadas),
-            len(sesiones_planificadas)
+            resumen['realizadas'],
+            resumen['planificadas']
         )
         
         # Determinar si está atrasado o necesita atención
@@ -77,8 +82,8 @@ class CalculadorEstados:
             'progreso_actual': progreso['actual'],
             'progreso_total': progreso['total'],
             'progreso_texto': progreso['texto'],
-            'sesiones_realizadas': len(sesiones_realizadas),
-            'sesiones_planificadas': len(sesiones_planificadas),
+            'sesiones_realizadas': resumen['realizadas'],
+            'sesiones_planificadas': resumen['planificadas'],
             'ultima_sesion': ultima_sesion,
             'proxima_sesion': proxima_sesion,
             'dias_sin_actividad': dias_sin_actividad,
@@ -89,6 +94,11 @@ class CalculadorEstados:
     @staticmethod
     def _calcular_progreso_especifico(solicitud: Solicitud, sesiones_realizadas: List[Sesion]) -> Dict:
         """Calcula el progreso según el tipo de servicio"""
+        return CalculadorEstados._progreso_desde_resumen(solicitud, resumir_sesiones(sesiones_realizadas))
+    
+    @staticmethod
+    def _progreso_desde_resumen(solicitud: Solicitud, resumen: Dict[str, Any]) -> Dict:
+        """Progreso según el tipo de servicio, a partir de los totales de las sesiones"""
         servicio = solicitud.servicio_solicitado.lower()
         detalles = solicitud.detalles_servicio
         
@@ -103,7 +113,7 @@ class CalculadorEstados:
         # IRRADIACIÓN
         if "irradiación" in servicio or "irradiador" in servicio:
             canisters_totales = detalles.get('canisters', 0)
-            canisters_procesados = sum(s.canisters_procesados for s in sesiones_realizadas)
+            canisters_procesados = resumen['canisters']
             
             porcentaje = (canisters_procesados / canisters_totales * 100) if canisters_totales > 0 else 0
             
@@ -119,13 +129,8 @@ class CalculadorEstados:
             meses_totales = detalles.get('meses', 0)
             dosimetros = detalles.get('dosimetros', 0)
             
-            # Contar meses únicos gestionados
-            meses_gestionados = set()
-            for sesion in sesiones_realizadas:
-                if sesion.mes_gestion:
-                    meses_gestionados.add(sesion.mes_gestion)
-            
-            meses_completados = len(meses_gestionados)
+            # Meses únicos gestionados
+            meses_completados = resumen['meses']
             porcentaje = (meses_completados / meses_totales * 100) if meses_totales > 0 else 0
             
             return {
@@ -138,7 +143,7 @@ class CalculadorEstados:
         # CONTADOR
         elif "contador" in servicio:
             horas_totales = detalles.get('horas', 0)
-            horas_usadas = sum(s.horas_contador for s in sesiones_realizadas)
+            horas_usadas = resumen['horas']
             
             porcentaje = (horas_usadas / horas_totales * 100) if horas_totales > 0 else 0
             
@@ -152,7 +157,7 @@ class CalculadorEstados:
         # RESIDUOS
         elif "residuos" in servicio or "huérfanas" in servicio:
             # Para residuos, consideramos completado si hay al menos una sesión
-            if sesiones_realizadas:
+            if resumen['realizadas']:
                 return {
                     'porcentaje': 100,
                     'actual': 1,
@@ -170,12 +175,12 @@ class CalculadorEstados:
         # GENÉRICO
         else:
             # Si hay sesiones, consideramos que está en progreso
-            if sesiones_realizadas:
+            if resumen['realizadas']:
                 return {
                     'porcentaje': 50,  # Asumimos 50% si hay actividad
-                    'actual': len(sesiones_realizadas),
-                    'total': len(sesiones_realizadas) * 2,
-                    'texto': f"{len(sesiones_realizadas)} sesión(es)"
+                    'actual': resumen['realizadas'],
+                    'total': resumen['realizadas'] * 2,
+                    'texto': f"{resumen['realizadas']} sesión(es)"
                 }
             else:
                 return {
@@ -205,10 +210,15 @@ class CalculadorEstados:
         return solicitud.estado
     
     @staticmethod
-    def calcular_resumen_general(solicitudes: List[Solicitud], todas_sesiones: List[Sesion]) -> Dict:
+    def calcular_resumen_general(solicitudes: List[Solicitud], todas_sesiones: List[Sesion],
+                                 tabla: Optional[SessionTable] = None) -> Dict:
         """
         Calcula un resumen general para el dashboard.
         
+        Los totales por solicitud y los conteos por fecha salen de la tabla
+        columnar de sesiones (la de DataStore.session_table si se da; si no,
+        se construye con todas_sesiones).
+        
         Returns:
             {
                 'total_solicitudes': int,
@@ -221,12 +231,12 @@ class CalculadorEstados:
                 'necesitan_atencion': List[str]  # IDs de solicitudes
             }
         """
-        # Agrupar sesiones por solicitud
-        sesiones_por_solicitud = {}
-        for sesion in todas_sesiones:
-            if sesion.id_solicitud not in sesiones_por_solicitud:
-                sesiones_por_solicitud[sesion.id_solicitud] = []
-            sesiones_por_solicitud[sesion.id_solicitud].append(sesion)
+        if tabla is None:
+            tabla = SessionTable(todas_sesiones)
+        
+        # Totales de todas las solicitudes de una vez
+        resumenes = tabla.resumen_por_solicitud()
+        sin_sesiones = resumir_sesiones([])
         
         # Contadores
         total = len(solicitudes)
@@ -238,8 +248,8 @@ class CalculadorEstados:
         
         # Analizar cada solicitud
         for solicitud in solicitudes:
-            sesiones = sesiones_por_solicitud.get(solicitud.id_solicitud, [])
-            info = CalculadorEstados.calcular_estado_y_progreso(solicitud, sesiones)
+            resumen = resumenes.get(solicitud.id_solicitud, sin_sesiones)
+            info = CalculadorEstados.calcular_estado_desde_resumen(solicitud, resumen)
             
             # Contar por estado
             if info['estado'] == 'Pendiente':
@@ -262,9 +272,8 @@ class CalculadorEstados:
         inicio_semana = hoy - timedelta(days=hoy.weekday())
         fin_semana = inicio_semana + timedelta(days=6)
         
-        sesiones_hoy = len([s for s in todas_sesiones if s.fecha_sesion == hoy])
-        sesiones_semana = len([s for s in todas_sesiones 
-                               if inicio_semana <= s.fecha_sesion <= fin_semana])
+        sesiones_hoy = tabla.contar(tabla.entre(hoy, hoy))
+        sesiones_semana = tabla.contar(tabla.entre(inicio_semana, fin_semana))
         
         return {
             'total_solicitudes': total,
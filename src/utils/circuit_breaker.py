@@ -0,0 +1,169 @@
+"""
+Detección rápida de falta de conexión con Google Sheets
+Cortacircuitos: tras varios fallos de red seguidos no se intenta más hasta
+que una sonda en segundo plano confirma que la red ha vuelto
+"""
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+import logging
+
+from config import SHEETS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Estados
+ONLINE = 'online'
+OFFLINE = 'offline'
+
+# Servidor que se sondea (solo se abre la conexión TCP; no consume cuota)
+PROBE_ADDRESS: Tuple[str, int] = ('sheets.googleapis.com', 443)
+
+
+class CircuitOpenError(Exception):
+    """La conexión está marcada como caída: la llamada ni se intenta"""
+
+
+class CircuitBreaker:
+    """
+    Cortacircuitos de la conexión con la API.
+
+    - ONLINE: las llamadas pasan; cada fallo de red (también el de cada
+      reintento) suma y cada éxito pone la cuenta a cero
+    - Tras `failure_threshold` fallos seguidos pasa a OFFLINE: check() lanza
+      CircuitOpenError al instante, sin esperar a ningún timeout
+    - Cada fallo de red despierta además la sonda en segundo plano: si no
+      responde, pasa a OFFLINE sin esperar a más fallos. Quien registra el
+      fallo no espera a la sonda (puede ser el hilo de la interfaz)
+    - En OFFLINE un hilo en segundo plano abre cada `probe_interval`
+      segundos una conexión TCP con timeout corto; cuando responde vuelve a
+      ONLINE y las llamadas siguientes van a la red
+
+    Los errores HTTP (4xx/5xx) no cuentan: si el servidor responde, hay red.
+    Los oyentes (add_listener) reciben el estado nuevo en el hilo que lo
+    cambia; la interfaz debe pasarlo a su hilo.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None,
+                 probe_interval: Optional[float] = None,
+                 probe_timeout: Optional[float] = None,
+                 probe: Optional[Callable[[], bool]] = None):
+        self.failure_threshold = failure_threshold or SHEETS_CONFIG.get('OFFLINE_AFTER_FAILURES', 3)
+        self.probe_interval = probe_interval or SHEETS_CONFIG.get('OFFLINE_PROBE_SECONDS', 15)
+        self.probe_timeout = probe_timeout or SHEETS_CONFIG.get('OFFLINE_PROBE_TIMEOUT_SECONDS', 3)
+        self._probe = probe or self._tcp_probe
+        self._lock = threading.Lock()
+        self._state = ONLINE
+        self._failures = 0
+        self._since = time.monotonic()
+        self._prober: Optional[threading.Thread] = None
+        self._suspect = False  # hay un fallo que la sonda debe confirmar
+        self._wakeup = threading.Event()
+        self._listeners: List[Callable[[str], None]] = []
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_online(self) -> bool:
+        return self._state == ONLINE
+
+    def offline_seconds(self) -> float:
+        """Tiempo que lleva sin conexión (0 si está en línea)"""
+        return 0.0 if self._state == ONLINE else time.monotonic() - self._since
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Registra una función que recibe el estado nuevo en cada cambio"""
+        self._listeners.append(callback)
+
+    def check(self):
+        """
+        Comprueba que se puede llamar a la red.
+
+        Raises:
+            CircuitOpenError: Si la conexión está marcada como caída
+        """
+        if self._state == OFFLINE:
+            raise CircuitOpenError("Sin conexión con Google Sheets")
+
+    def record_success(self):
+        """Una llamada ha recibido respuesta del servidor"""
+        if self._failures or self._state != ONLINE:
+            self._set_state(ONLINE)
+
+    def record_failure(self):
+        """
+        Una llamada ha fallado por la red (timeout, DNS, conexión rechazada).
+
+        Si no se llega al umbral, la sonda en segundo plano comprueba la
+        red y marca la conexión como caída si no responde.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._state != ONLINE:
+                return
+            disparar = self._failures >= self.failure_threshold
+            if not disparar:
+                self._suspect = True
+                self._start_prober()
+        if disparar:
+            self._set_state(OFFLINE)
+
+    def probe_now(self):
+        """Adelanta la siguiente sonda (p. ej. al pulsar Actualizar sin conexión)"""
+        self._wakeup.set()
+
+    def _set_state(self, state: str):
+        with self._lock:
+            self._failures = 0
+            if state == self._state:
+                return
+            self._state = state
+            self._since = time.monotonic()
+            if state == OFFLINE:
+                self._start_prober()
+
+        if state == OFFLINE:
+            logger.warning(f"📴 Sin conexión con Google Sheets: se trabaja con la copia local "
+                           f"(comprobando cada {self.probe_interval:.0f}s)")
+        else:
+            logger.info("📶 Conexión con Google Sheets recuperada")
+
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                logger.error(f"Error al notificar el estado de la conexión: {e}")
+
+    def _start_prober(self):
+        # Con el candado tomado
+        if self._prober is None:
+            self._prober = threading.Thread(target=self._probe_loop, name="sonda-conexion", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                confirmar = self._state == ONLINE and self._suspect
+                self._suspect = False
+                # Se retira bajo el candado: si vuelve a fallar se lanza otra sonda
+                if self._state == ONLINE and not confirmar:
+                    self._prober = None
+                    return
+            if confirmar:
+                # Un éxito entretanto pone los fallos a cero: la red ha vuelto
+                if not self._probe() and self._failures:
+                    self._set_state(OFFLINE)
+                continue
+            self._wakeup.wait(self.probe_interval)
+            self._wakeup.clear()
+            if self._state == OFFLINE and self._probe():
+                self._set_state(ONLINE)
+
+    def _tcp_probe(self) -> bool:
+        try:
+            with socket.create_connection(PROBE_ADDRESS, timeout=self.probe_timeout):
+                return True
+        except OSError:
+            return False
@@ -0,0 +1,171 @@
+"""
+Cargador de datos en segundo plano
+Ejecuta las descargas fuera del hilo de Tk y entrega los resultados en él
+"""
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Any
+import logging
+
+from config import APP_CONFIG
+from src.utils import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class DataLoader:
+    """
+    Ejecuta trabajos (descarga + decodificación) en un pool de hilos.
+
+    - Cada trabajo tiene una clave (normalmente el panel que lo pide); al
+      enviar otro con la misma clave, el anterior queda cancelado y su
+      resultado se descarta aunque ya se esté ejecutando.
+    - Los resultados vuelven al hilo de Tk a través de una cola que se
+      consulta con root.after(); los callbacks pueden tocar widgets.
+    - Sin ventana asociada (attach) los trabajos se ejecutan en el momento.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, poll_ms: int = 50):
+        # Cada hilo del pool usa su propio cliente de la API (ServicePool);
+        # la caché, la cuota y las lecturas en curso son seguras entre hilos
+        self.max_workers = max_workers or APP_CONFIG.get('LOADER_WORKERS', 1)
+        self.poll_ms = poll_ms
+        self.root = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._results: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._pending = 0
+        self._polling = False
+
+    def attach(self, root):
+        """
+        Asocia el cargador a la ventana de Tk cuyo hilo recibe los resultados.
+
+        Debe llamarse desde el hilo de Tk: se registra como hilo de la
+        interfaz, cuyas llamadas a la API fallan antes que esperar mucho a
+        la cuota o a un reintento (ver rate_limiter.set_ui_thread).
+        """
+        self.root = root
+        rate_limiter.set_ui_thread()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="data-loader")
+
+    def _is_current(self, key: str, token: int) -> bool:
+        with self._lock:
+            return self._generations.get(key) == token
+
+    def is_loading(self, key: str) -> bool:
+        """Indica si hay un trabajo vigente para la clave"""
+        with self._lock:
+            return key in self._generations
+
+    def submit(self, key: str, job: Callable[[], Any],
+               on_done: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> int:
+        """
+        Lanza un trabajo en segundo plano.
+
+        Args:
+            key: Identificador del trabajo; sustituye al anterior con la misma clave
+            job: Función sin argumentos que se ejecuta en el pool
+            on_done: Recibe el resultado en el hilo de Tk
+            on_error: Recibe la excepción en el hilo de Tk
+
+        Returns:
+            Token del trabajo
+        """
+        with self._lock:
+            token = self._generations.get(key, 0) + 1
+            self._generations[key] = token
+
+        if self._executor is None or self.root is None:
+            # Sin interfaz (scripts, pruebas): ejecución directa
+            self._run(key, token, job, on_done, on_error)
+            self._dispatch_all()
+            return token
+
+        self._pending += 1
+        self._executor.submit(self._run, key, token, job, on_done, on_error)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return token
+
+    def cancel(self, key: str):
+        """Cancela el trabajo vigente de una clave (su resultado se descarta)"""
+        with self._lock:
+            if key in self._generations:
+                # Se conserva el contador para que el token antiguo no coincida
+                self._generations[key] = -self._generations[key]
+
+    def _run(self, key: str, token: int, job: Callable[[], Any],
+             on_done: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]]):
+        """Se ejecuta en el pool"""
+        if not self._is_current(key, token):
+            self._results.put((key, token, None, None, None))
+            return
+
+        try:
+            resultado = job()
+            self._results.put((key, token, on_done, resultado, None))
+        except Exception as e:
+            self._results.put((key, token, on_error, None, e))
+
+    def _dispatch_all(self):
+        """Entrega los resultados pendientes (hilo de Tk)"""
+        while True:
+            try:
+                key, token, callback, resultado, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+
+            if self.root is not None:
+                self._pending -= 1
+
+            with self._lock:
+                vigente = self._generations.get(key) == token
+                if vigente:
+                    del self._generations[key]
+
+            if not vigente:
+                logger.debug(f"Resultado descartado ({key}): sustituido por otro más reciente")
+                continue
+
+            if error is not None:
+                logger.error(f"Error en carga en segundo plano ({key}): {error}")
+                if callback:
+                    callback(error)
+            elif callback:
+                callback(resultado)
+
+    def _poll(self):
+        try:
+            self._dispatch_all()
+        except Exception as e:
+            logger.error(f"Error al entregar resultados: {e}")
+
+        if self._pending > 0:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        """Detiene el pool sin esperar a los trabajos en curso"""
+        with self._lock:
+            self._generations.clear()
+        if self._executor is not None:
+            if sys.version_info >= (3, 9):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                # Python 3.8 no tiene cancel_futures: los trabajos en cola
+                # ya no son vigentes y _run los salta sin ejecutarlos
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Instancia global
+data_loader = DataLoader()
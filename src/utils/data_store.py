@@ -0,0 +1,332 @@
+"""
+Almacén de datos compartido por los paneles
+Mantiene decodificados los modelos de Solicitudes y Sesiones y avisa de los cambios
+"""
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Any, Tuple, Iterable
+import logging
+
+from src.models.solicitud_real import Solicitud
+from src.models.sesion import Sesion
+from config import SHEETS_CONFIG
+from src.utils.sheets_manager import sheets_manager
+from src.utils.data_loader import data_loader
+from src.utils.storage_backends import StorageError
+from src.utils.row_codec import get_codec
+from src.utils.session_table import SessionTable
+
+logger = logging.getLogger(__name__)
+
+
+
+@dataclass
+class ChangeEvent:
+    """Cambios de una hoja tras una carga (listas de IDs)"""
+    sheet: str
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def has_changes(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+class DataStore:
+    """
+    Modelos de la aplicación, únicos para todos los paneles.
+
+    - Las filas se decodifican una sola vez: si la fila en bruto de un ID no
+      ha cambiado se reutiliza el modelo anterior
+    - Índices por ID y de sesiones por id_solicitud
+    - Tabla columnar de sesiones para los agregados (session_table)
+    - Los suscriptores reciben, en el hilo de Tk, la lista de ChangeEvent de
+      las hojas que les interesan cada vez que algo cambia
+    """
+
+    def __init__(self):
+        # Modelos decodificados por hoja: {id: (fila en bruto, modelo)}.
+        # Se usa desde el hilo del cargador, por eso va con candado.
+        self._memo: Dict[str, Dict[str, Tuple[tuple, Any]]] = {}
+        self._memo_lock = threading.Lock()
+
+        # Estado publicado (solo se modifica en el hilo de Tk)
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._sesiones_por_solicitud: Dict[str, List[Sesion]] = {}
+        # Se construye al pedirla por primera vez tras cada cambio de Sesiones
+        self._session_table: Optional[SessionTable] = None
+        self._subscribers: List[Tuple[Callable[[List[ChangeEvent]], None], Optional[set]]] = []
+        # Recibe las entradas del diario en conflicto tras un envío (hilo de Tk)
+        self.conflict_handler: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+        # Clave de cada envío del diario en el cargador (ver flush_pending)
+        self._flush_seq = itertools.count(1)
+
+    # === CONSULTA ===
+
+    def is_loaded(self, sheet_name: str) -> bool:
+        return sheet_name in self._items
+
+    @property
+    def solicitudes(self) -> List[Solicitud]:
+        """Solicitudes en el orden de la hoja"""
+        return list(self._items.get('Solicitudes', {}).values())
+
+    @property
+    def sesiones(self) -> List[Sesion]:
+        """Sesiones en el orden de la hoja"""
+        return list(self._items.get('Sesiones', {}).values())
+
+    def get_solicitud(self, id_solicitud: str) -> Optional[Solicitud]:
+        return self._items.get('Solicitudes', {}).get(id_solicitud)
+
+    def get_sesion(self, id_sesion: str) -> Optional[Sesion]:
+        return self._items.get('Sesiones', {}).get(id_sesion)
+
+    def sesiones_de(self, id_solicitud: str) -> List[Sesion]:
+        """Sesiones de una solicitud"""
+        return list(self._sesiones_por_solicitud.get(id_solicitud, []))
+
+    @property
+    def session_table(self) -> SessionTable:
+        """Sesiones en columnas NumPy (conteos, sumas y agrupaciones)"""
+        if self._session_table is None:
+            self._session_table = SessionTable(self.sesiones)
+        return self._session_table
+
+    # === SUSCRIPCIÓN ===
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None],
+                  sheets: Optional[Iterable[str]] = None):
+        """
+        Registra un panel para recibir cambios.
+
+        Si ya hay datos cargados se le envían en ese momento como altas,
+        de modo que un panel creado tarde se pinta igual que los demás.
+
+        Args:
+            callback: Recibe la lista de ChangeEvent (solo de sus hojas)
+            sheets: Hojas de interés (None = todas)
+        """
+        hojas = set(sheets) if sheets is not None else None
+        self._subscribers.append((callback, hojas))
+
+        iniciales = [ChangeEvent(sheet, added=list(items))
+                     for sheet, items in self._items.items()
+                     if items and (hojas is None or sheet in hojas)]
+        if iniciales:
+            callback(iniciales)
+
+    def unsubscribe(self, callback: Callable[[List[ChangeEvent]], None]):
+        self._subscribers = [(cb, hojas) for cb, hojas in self._subscribers if cb != callback]
+
+    def _notify(self, events: List[ChangeEvent]):
+        for callback, hojas in list(self._subscribers):
+            relevantes = [e for e in events if hojas is None or e.sheet in hojas]
+            if not relevantes:
+                continue
+            try:
+                callback(relevantes)
+            except Exception as e:
+                logger.error(f"Error al notificar cambios: {e}")
+
+    # === CARGA ===
+
+    def _decode(self, sheet_name: str, rows: List[List[Any]]) -> Dict[str, Any]:
+        """Decodifica las filas reutilizando los modelos de filas sin cambios"""
+        if not rows:
+            with self._memo_lock:
+                self._memo[sheet_name] = {}
+            return {}
+        # Columnas por nombre de encabezado (ver row_codec)
+        codec = get_codec(sheet_name, rows[0])
+        col_id = codec.id_index
+
+        with self._memo_lock:
+            anterior = self._memo.get(sheet_name, {})
+
+        memo: Dict[str, Tuple[tuple, Any]] = {}
+        nuevas: List[Tuple[str, tuple]] = []
+        for n, row in enumerate(rows[1:], start=2):
+            # Sin ID se identifica por posición
+            id_fila = row[col_id] if col_id is not None and len(row) > col_id else ""
+            clave = str(id_fila) if id_fila else f"#{n}"
+            if clave in memo:
+                # ID repetido: se conservan ambas filas
+                clave = f"{clave}#{n}"
+            bruto = tuple(row)
+
+            previo = anterior.get(clave)
+            if previo is not None and previo[0] == bruto:
+                memo[clave] = previo
+            else:
+                # Se reserva la posición; se decodifica abajo, todas juntas
+                memo[clave] = None
+                nuevas.append((clave, bruto))
+
+        if nuevas:
+            # Todas las filas nuevas o cambiadas en un solo lote
+            modelos = codec.decode([bruto for _, bruto in nuevas])
+            for (clave, bruto), modelo in zip(nuevas, modelos):
+                memo[clave] = (bruto, modelo)
+
+        with self._memo_lock:
+            self._memo[sheet_name] = memo
+
+        return {clave: modelo for clave, (_, modelo) in memo.items()}
+
+    def _fetch(self, sheet_names: List[str], sync: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Lee y decodifica las hojas (puede ejecutarse en el hilo del cargador)"""
+        if sync:
+            # Petición del usuario: cualquier edición remota tiene que verse ya
+            try:
+                sheets_manager.sync_many(sheet_names, authoritative=True)
+            except StorageError:
+                if sheets_manager.is_online():
+                    raise
+                # Sin conexión: se publican los datos locales
+                logger.info("📴 Sin conexión: se muestran los datos locales")
+        # Con strict un fallo llega a on_error en vez de vaciar los paneles
+        datos = sheets_manager.get_many(sheet_names, strict=True,
+                                        typed=SHEETS_CONFIG.get('TYPED_READS', False))
+        return {nombre: self._decode(nombre, datos[nombre]) for nombre in sheet_names}
+
+    def _publish(self, decoded: Dict[str, Dict[str, Any]]) -> List[ChangeEvent]:
+        """Sustituye el estado publicado y avisa a los suscriptores (hilo de Tk)"""
+        events = []
+        for sheet_name, nuevos in decoded.items():
+            antiguos = self._items.get(sheet_name, {})
+            event = ChangeEvent(
+                sheet_name,
+                added=[clave for clave in nuevos if clave not in antiguos],
+                updated=[clave for clave, modelo in nuevos.items()
+                         if clave in antiguos and antiguos[clave] is not modelo],
+                removed=[clave for clave in antiguos if clave not in nuevos],
+            )
+            self._items[sheet_name] = nuevos
+            if event.has_changes():
+                events.append(event)
+
+        if 'Sesiones' in decoded:
+            por_solicitud: Dict[str, List[Sesion]] = {}
+            for sesion in decoded['Sesiones'].values():
+                por_solicitud.setdefault(sesion.id_solicitud, []).append(sesion)
+            self._sesiones_por_solicitud = por_solicitud
+            self._session_table = None
+
+        if events:
+            resumen = ", ".join(f"{e.sheet}: +{len(e.added)} ~{len(e.updated)} -{len(e.removed)}"
+                                for e in events)
+            logger.info(f"🔔 Cambios en datos ({resumen})")
+            self._notify(events)
+
+        return events
+
+    def refresh(self, sheet_names: List[str], key: Optional[str] = None,
+                on_done: Optional[Callable[[List[ChangeEvent]], None]] = None,
+                on_error: Optional[Callable[[Exception], None]] = None,
+                sync: bool = False):
+        """
+        Recarga hojas en segundo plano y notifica los cambios.
+
+        Usa la caché de SheetsManager: tras guardar un registro basta con
+        llamar a refresh() y solo se decodifica la fila modificada.
+
+        Args:
+            sheet_names: Hojas a recargar
+            key: Clave del trabajo en el cargador (por defecto, las hojas)
+            on_done: Recibe los ChangeEvent al terminar (hilo de Tk)
+            on_error: Recibe la excepción si falla la lectura
+            sync: Comprobar antes los cambios en la hoja aunque la caché
+                siga vigente (incremental solo si hay columna de checksum)
+        """
+        def terminado(decoded):
+            events = self._publish(decoded)
+            if on_done:
+                on_done(events)
+
+        data_loader.submit(
+            key or "datos:" + ",".join(sheet_names),
+            lambda: self._fetch(sheet_names, sync),
+            terminado,
+            on_error
+        )
+
+    def _publish_local(self, sheet_names: List[str]):
+        """Publica la copia local de las hojas (sin red); si no la hay, recarga"""
+        decoded = {}
+        for sheet_name in sheet_names:
+            values = sheets_manager.get_local_data(sheet_name)
+            if values is None:
+                self.refresh([sheet_name])
+            else:
+                decoded[sheet_name] = self._decode(sheet_name, values)
+        if decoded:
+            self._publish(decoded)
+    
+    # === ESCRITURA ===
+    
+    def save(self, sheet_name: str, row: List[Any]) -> bool:
+        """
+        Guarda un registro sin esperar a la red.
+        
+        El cambio queda en el diario local y se ve al momento en todos los
+        paneles; el envío a la hoja se hace en segundo plano (flush_pending).
+        
+        Returns:
+            bool: True si el cambio quedó registrado
+        """
+        if not sheets_manager.save_record(sheet_name, row):
+            return False
+        self._publish_local([sheet_name])
+        self.flush_pending()
+        return True
+    
+    def delete(self, sheet_name: str, record_id: str) -> bool:
+        """Elimina un registro sin esperar a la red (ver save)"""
+        if not sheets_manager.delete_record(sheet_name, record_id):
+            return False
+        self._publish_local([sheet_name])
+        self.flush_pending()
+        return True
+    
+    def flush_pending(self, on_done: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Envía en segundo plano los cambios pendientes del diario.
+        
+        Cada envío es un trabajo aparte en el cargador: uno nuevo no descarta
+        el resultado (y los conflictos) de otro anterior. Si ya había un envío
+        en curso, ese recoge los cambios nuevos y on_done no se llama.
+        """
+        def terminado(resultado):
+            if resultado.get('running'):
+                return
+            if resultado['conflicts']:
+                # La caché ya tiene la versión remota de esos registros
+                self._publish_local(list(dict.fromkeys(e['sheet'] for e in resultado['conflicts'])))
+                if self.conflict_handler:
+                    self.conflict_handler(resultado['conflicts'])
+            if on_done:
+                on_done(resultado)
+        
+        data_loader.submit(f"diario:{next(self._flush_seq)}", sheets_manager.replay_journal, terminado)
+    
+    def resolve_conflict(self, sheet_name: str, record_id: str, keep_local: bool):
+        """Resuelve un conflicto (ver SheetsManager.resolve_conflict) y reenvía si procede"""
+        if sheets_manager.resolve_conflict(sheet_name, record_id, keep_local) and keep_local:
+            self._publish_local([sheet_name])
+            self.flush_pending()
+    
+    def load(self, sheet_names: List[str]) -> List[ChangeEvent]:
+        """Recarga hojas de forma síncrona (diálogos que necesitan los datos ya)"""
+        return self._publish(self._fetch(sheet_names))
+
+    def ensure_loaded(self, sheet_names: List[str]):
+        """Carga de forma síncrona las hojas que aún no estén en el almacén"""
+        pendientes = [nombre for nombre in sheet_names if not self.is_loaded(nombre)]
+        if pendientes:
+            self.load(pendientes)
+
+
+# Instancia global
+data_store = DataStore()
@@ -0,0 +1,253 @@
+"""
+Interpretación de fechas en texto
+Detecta el formato dominante de una columna, lo lee por posiciones fijas y
+recuerda los textos ya interpretados
+"""
+import re
+import threading
+from calendar import monthrange
+from collections import Counter
+from datetime import date, datetime
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Formatos que aparecen en la hoja, en los datos de SQLite y en los PDFs
+# del formulario web (orden de preferencia si ninguno domina)
+DEFAULT_FORMATS: Tuple[str, ...] = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d-%m-%Y",
+    "%d-%m-%Y %H:%M",
+)
+
+# Textos recordados por analizador (al llenarse se empieza de nuevo)
+MEMO_SIZE = 20000
+
+# Filas que se examinan para detectar el formato de una columna
+SAMPLE_SIZE = 50
+
+# Formatos sin ceros a la izquierda o con texto detrás ('2025-1-5', '5/1/2025')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+_DMY_DATE_RE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+
+# Directivas admitidas: (argumento de datetime, ancho)
+_DIRECTIVES = {
+    '%Y': (0, 4),
+    '%m': (1, 2),
+    '%d': (2, 2),
+    '%H': (3, 2),
+    '%M': (4, 2),
+    '%S': (5, 2),
+}
+
+_MISSING = object()
+
+
+def valid_date(y: int, m: int, d: int) -> bool:
+    """Comprueba año, mes y día sin construir la fecha (sin excepciones)"""
+    return y >= 1 and 1 <= m <= 12 and 1 <= d <= monthrange(y, m)[1]
+
+
+def _build(partes: List[int]) -> Optional[datetime]:
+    y, m, d, hora, minuto, segundo = partes
+    if not valid_date(y, m, d) or hora > 23 or minuto > 59 or segundo > 59:
+        return None
+    return datetime(y, m, d, hora, minuto, segundo)
+
+
+class FixedFormat:
+    """
+    Formato de strptime con campos de ancho fijo ('%d/%m/%Y %H:%M').
+
+    parse() comprueba la longitud y los separadores y convierte cada campo
+    con int() sobre su porción del texto: ni expresiones regulares ni
+    excepciones, mucho más rápido que datetime.strptime.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._fields: List[Tuple[int, int, int]] = []  # (argumento, inicio, fin)
+        self._literals: List[Tuple[int, str]] = []
+        pos = i = 0
+        while i < len(pattern):
+            directiva = pattern[i:i + 2]
+            if directiva in _DIRECTIVES:
+                argumento, ancho = _DIRECTIVES[directiva]
+                self._fields.append((argumento, pos, pos + ancho))
+                pos += ancho
+                i += 2
+            else:
+                self._literals.append((pos, pattern[i]))
+                pos += 1
+                i += 1
+        self.length = pos
+
+    def parse(self, texto: str) -> Optional[datetime]:
+        """Texto con exactamente este formato -> datetime (None si no encaja)"""
+        if len(texto) != self.length:
+            return None
+        for pos, caracter in self._literals:
+            if texto[pos] != caracter:
+                return None
+        partes = [1, 1, 1, 0, 0, 0]
+        for argumento, inicio, fin in self._fields:
+            trozo = texto[inicio:fin]
+            if not (trozo.isascii() and trozo.isdigit()):
+                return None
+            partes[argumento] = int(trozo)
+        return _build(partes)
+
+
+def _parse_flexible(texto: str) -> Optional[datetime]:
+    """Fechas sin ceros a la izquierda o seguidas de más texto"""
+    m = _ISO_DATE_RE.match(texto)
+    if m:
+        y, mes, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    else:
+        m = _DMY_DATE_RE.match(texto)
+        if not m:
+            return None
+        d, mes, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    if not valid_date(y, mes, d):
+        return None
+    hora, minuto, segundo = (int(g) if g else 0 for g in m.group(4, 5, 6))
+    if hora > 23 or minuto > 59 or segundo > 59:
+        # Hora imposible: se conserva el día
+        return datetime(y, mes, d)
+    return datetime(y, mes, d, hora, minuto, segundo)
+
+
+class DateParser:
+    """
+    Analizador de fechas de una columna (o de un origen de datos).
+
+    - detect() elige, sobre una muestra, el formato que más se repite; a
+      partir de ahí cada texto se intenta primero con ese formato
+    - Los textos que no encajan en él pasan por el resto de formatos fijos
+      y, por último, por una lectura flexible (sin ceros, con hora o texto
+      detrás)
+    - Cada texto se interpreta una sola vez: muchas filas comparten fecha
+
+    Los textos que no son una fecha dan None.
+
+    Los analizadores de valores sueltos (sin una columna que muestrear)
+    reciben el formato dominante al crearlos con `dominant`.
+
+    Se puede compartir entre hilos: detect_once() fija el formato una sola
+    vez y los textos recordados, como mucho, se interpretan dos veces.
+    """
+
+    def __init__(self, formats: Iterable[str] = DEFAULT_FORMATS, name: str = "",
+                 dominant: Optional[str] = None):
+        """
+        Args:
+            formats: Formatos admitidos (notación de strptime)
+            name: Nombre para el registro
+            dominant: Formato que se intenta primero sin esperar a detect()
+                (debe estar en formats)
+        """
+        self.name = name
+        self._formats = [FixedFormat(patron) for patron in formats]
+        self._dominant: Optional[FixedFormat] = None
+        if dominant is not None:
+            self._dominant = next((f for f in self._formats if f.pattern == dominant), None)
+            if self._dominant is None:
+                raise ValueError(f"Formato dominante no admitido: {dominant}")
+        self._memo: Dict[str, Optional[datetime]] = {}
+        self._memo_date: Dict[str, Optional[date]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def dominant_format(self) -> Optional[str]:
+        """Formato detectado (None si aún no se ha detectado)"""
+        return self._dominant.pattern if self._dominant is not None else None
+
+    def detect(self, sample: Iterable[Any]) -> Optional[str]:
+        """
+        Detecta el formato más frecuente entre los textos de la muestra.
+
+        Returns:
+            Formato detectado (en notación de strptime) o None si ninguno encaja
+        """
+        elegido = self._vote(sample)
+        with self._lock:
+            if elegido is not None:
+                self._dominant = elegido
+            return self.dominant_format
+
+    def detect_once(self, sample: Iterable[Any]) -> Optional[str]:
+        """
+        Como detect(), pero solo si aún no hay formato dominante.
+
+        Los hilos del cargador decodifican a la vez con los mismos
+        analizadores: el primero fija el formato y los demás lo reutilizan,
+        sin cambiarlo a mitad de una carga.
+        """
+        with self._lock:
+            if self._dominant is None:
+                self._dominant = self._vote(sample)
+            return self.dominant_format
+
+    def _vote(self, sample: Iterable[Any]) -> Optional[FixedFormat]:
+        votos: Counter = Counter()
+        for valor in sample:
+            if type(valor) is not str:
+                continue
+            texto = valor.strip()
+            for formato in self._formats:
+                if formato.parse(texto) is not None:
+                    votos[formato] += 1
+                    break
+        if not votos:
+            return None
+        elegido = votos.most_common(1)[0][0]
+        logger.debug(f"Formato de fecha{' de ' + self.name if self.name else ''}: {elegido.pattern}")
+        return elegido
+
+    def parse(self, texto: str) -> Optional[datetime]:
+        """Texto -> datetime (None si no es una fecha)"""
+        resultado = self._memo.get(texto, _MISSING)
+        if resultado is not _MISSING:
+            return resultado
+
+        limpio = texto.strip()
+        dominante = self._dominant
+        resultado = dominante.parse(limpio) if dominante is not None else None
+        if resultado is None:
+            resultado = self._parse_slow(limpio, dominante)
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[texto] = resultado
+        return resultado
+
+    def parse_date(self, texto: str) -> Optional[date]:
+        """Texto -> date (se descarta la hora)"""
+        resultado = self._memo_date.get(texto, _MISSING)
+        if resultado is _MISSING:
+            fecha = self.parse(texto)
+            resultado = fecha.date() if fecha is not None else None
+            if len(self._memo_date) >= MEMO_SIZE:
+                self._memo_date.clear()
+            self._memo_date[texto] = resultado
+        return resultado
+
+    def _parse_slow(self, texto: str, dominante: Optional[FixedFormat]) -> Optional[datetime]:
+        # Valores atípicos de la columna: el resto de formatos y la lectura flexible
+        for formato in self._formats:
+            if formato is not dominante:
+                resultado = formato.parse(texto)
+                if resultado is not None:
+                    return resultado
+        return _parse_flexible(texto)
+
+
+# Instancia global (valores sueltos: formularios).
+# La aplicación escribe las fechas como aaaa-mm-dd (to_sheet_row)
+date_parser = DateParser(name="general", dominant="%Y-%m-%d")
@@ -0,0 +1,207 @@
+"""
+Métricas de uso de la API de Google Sheets
+Llamadas, latencias, bytes recibidos y reintentos por método de la API
+"""
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los tramos del histograma de latencia
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def method_name(request) -> str:
+    """
+    Nombre corto del método de una petición de googleapiclient.
+
+    'sheets.spreadsheets.values.batchGet' -> 'batchGet';
+    spreadsheets.get (metadatos) se distingue de values.get como 'metadata'.
+    """
+    method_id = getattr(request, 'methodId', '') or ''
+    if method_id == 'sheets.spreadsheets.get':
+        return 'metadata'
+    return method_id.rsplit('.', 1)[-1] or 'desconocido'
+
+
+def _bucket_label(i: int) -> str:
+    if i < len(LATENCY_BUCKETS_MS):
+        return f"≤{LATENCY_BUCKETS_MS[i]}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+class MethodStats:
+    """Contadores de un método de la API"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, seconds: float, size: int, ok: bool):
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += size
+
+        ms = seconds * 1000
+        i = next((n for n, limite in enumerate(LATENCY_BUCKETS_MS) if ms <= limite), len(LATENCY_BUCKETS_MS))
+        self.histogram[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_seconds * 1000 / self.calls, 1) if self.calls else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 1),
+            'bytes': self.bytes,
+            'histogram': {_bucket_label(i): n for i, n in enumerate(self.histogram)},
+        }
+
+
+class ApiMetrics:
+    """
+    Métricas acumuladas de las llamadas a la API, por método
+    (get, batchGet, update, append, batchUpdate, metadata).
+
+    Las registra SheetsBackend en cada llamada; son seguras entre hilos.
+    Para medir una acción concreta: reset(), hacer la acción y snapshot().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, MethodStats] = {}
+        self.since = datetime.now()
+
+    def _stats(self, method: str) -> MethodStats:
+        if method not in self._methods:
+            self._methods[method] = MethodStats()
+        return self._methods[method]
+
+    def record(self, method: str, seconds: float, size: int = 0, ok: bool = True):
+        """Registra una llamada (cada intento cuenta como una llamada)"""
+        with self._lock:
+            self._stats(method).add(seconds, size, ok)
+        logger.debug(f"📡 {method}: {seconds * 1000:.0f} ms, {size / 1024:.1f} KB"
+                     + ("" if ok else " (error)"))
+
+    def record_retry(self, method: str):
+        """Registra que una llamada fallida se va a reintentar"""
+        with self._lock:
+            self._stats(method).retries += 1
+
+    def reset(self):
+        """Pone todos los contadores a cero"""
+        with self._lock:
+            self._methods = {}
+            self.since = datetime.now()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copia de las métricas.
+
+        Returns:
+            {'since': iso, 'methods': {método: {...}}, 'totals': {...}}
+        """
+        with self._lock:
+            metodos = {nombre: stats.to_dict() for nombre, stats in sorted(self._methods.items())}
+            total_seconds = sum(stats.total_seconds for stats in self._methods.values())
+            since = self.since
+
+        llamadas = sum(m['calls'] for m in metodos.values())
+        return {
+            'since': since.isoformat(timespec='seconds'),
+            'methods': metodos,
+            'totals': {
+                'calls': llamadas,
+                'errors': sum(m['errors'] for m in metodos.values()),
+                'retries': sum(m['retries'] for m in metodos.values()),
+                'bytes': sum(m['bytes'] for m in metodos.values()),
+                'avg_ms': round(total_seconds * 1000 / llamadas, 1) if llamadas else 0.0,
+            },
+        }
+
+    def write_log(self, path: Path, extra: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Añade una línea JSON con las métricas actuales al fichero indicado.
+
+        Args:
+            path: Fichero JSONL de métricas
+            extra: Datos adicionales (p. ej. estadísticas de caché)
+
+        Returns:
+            bool: True si se escribió correctamente
+        """
+        registro = dict(self.snapshot(), timestamp=datetime.now().isoformat(timespec='seconds'))
+        if extra:
+            registro.update(extra)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            return True
+        except OSError as e:
+            logger.warning(f"No se pudo escribir el registro de métricas: {e}")
+            return False
+
+
+def format_bytes(size: float) -> str:
+    """Tamaño legible (B, KB, MB)"""
+    for unidad in ('B', 'KB'):
+        if size < 1024:
+            return f"{size:.0f} {unidad}" if unidad == 'B' else f"{size:.1f} {unidad}"
+        size /= 1024
+    return f"{size:.1f} MB"
+
+
+def format_report(snapshot: Dict[str, Any], cache: Optional[Dict[str, Any]] = None,
+                  quota: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Resumen de las métricas en líneas de texto (diálogo de diagnóstico).
+
+    Args:
+        snapshot: Resultado de ApiMetrics.snapshot()
+        cache: Estadísticas de caché (SheetsManager.cache_stats())
+        quota: Estado de la cuota (ver SheetsManager.api_diagnostics())
+    """
+    lineas = [f"Desde: {snapshot['since'].replace('T', ' ')}", ""]
+    totales = snapshot['totals']
+    lineas.append(f"Llamadas a la API: {totales['calls']}  ·  errores: {totales['errors']}  ·  "
+                  f"reintentos: {totales['retries']}  ·  recibido: {format_bytes(totales['bytes'])}  ·  "
+                  f"media: {totales['avg_ms']} ms")
+    lineas.append("")
+
+    for nombre, m in snapshot['methods'].items():
+        lineas.append(f"{nombre}: {m['calls']} llamadas, media {m['avg_ms']} ms, máx. {m['max_ms']} ms, "
+                      f"{format_bytes(m['bytes'])}, {m['errors']} errores, {m['retries']} reintentos")
+        tramos = "  ".join(f"{tramo}: {n}" for tramo, n in m['histogram'].items() if n)
+        lineas.append(f"    {tramos}")
+
+    if cache:
+        lineas.append("")
+        lineas.append(f"Caché: {cache.get('entries', 0)}/{cache.get('max_entries', 0)} entradas "
+                      f"(+{cache.get('pinned', 0)} hojas completas), "
+                      f"{cache.get('hits', 0)} aciertos, {cache.get('misses', 0)} fallos "
+                      f"({cache.get('hit_ratio', 0.0):.0%}), {cache.get('evictions', 0)} expulsiones, "
+                      f"{cache.get('coalesced', 0)} lecturas compartidas")
+
+    if quota:
+        lineas.append(f"Cuota: {quota.get('tokens', 0):.1f} fichas disponibles, "
+                      f"{quota.get('waited_seconds', 0.0):.1f} s de espera, "
+                      f"{quota.get('dropped', 0)} llamadas en segundo plano descartadas")
+
+    return lineas
+
+
+# Instancia global
+api_metrics = ApiMetrics()
@@ -0,0 +1,103 @@
+"""
+Cola de mutaciones para SheetsManager
+Agrupa altas, actualizaciones y borrados para enviarlos en un único lote
+"""
+from typing import List, Dict, Any, Tuple
+
+
+class MutationQueue:
+    """
+    Acumula mutaciones y calcula cómo aplicarlas en un solo lote.
+
+    Todos los índices de fila se refieren a la hoja tal y como estaba al
+    empezar el lote (1-based, incluyendo encabezados). Al planificar se
+    ordenan los borrados de abajo arriba y se recalculan las posiciones de
+    las escrituras para que caigan en su sitio después de borrar.
+    """
+
+    def __init__(self):
+        # ('update', hoja, fila, columna, valores) | ('append', hoja, filas) | ('delete', hoja, fila)
+        self.operations: List[Tuple] = []
+        self.ok = True
+        self.error = ""
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    @property
+    def sheets(self) -> List[str]:
+        """Hojas afectadas, en orden de aparición"""
+        vistas = []
+        for op in self.operations:
+            if op[1] not in vistas:
+                vistas.append(op[1])
+        return vistas
+
+    def needs_last_row(self, sheet_name: str) -> bool:
+        """Indica si hay altas en la hoja (requieren conocer la última fila)"""
+        return any(op[0] == 'append' and op[1] == sheet_name for op in self.operations)
+
+    def update(self, sheet_name: str, row_index: int, col_index: int, values: List[Any]):
+        """Encola la escritura de una fila a partir de una columna (0-based)"""
+        self.operations.append(('update', sheet_name, row_index, col_index, list(values)))
+
+    def append(self, sheet_name: str, rows: List[List[Any]]):
+        """Encola filas nuevas al final de la hoja"""
+        self.operations.append(('append', sheet_name, [list(row) for row in rows]))
+
+    def delete(self, sheet_name: str, row_index: int):
+        """Encola el borrado de una fila"""
+        self.operations.append(('delete', sheet_name, row_index))
+
+    def plan(self, last_rows: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Calcula el lote a enviar.
+
+        Args:
+            last_rows: Última fila con datos de cada hoja con altas
+
+        Returns:
+            {
+                'deletes': {hoja: [filas de mayor a menor]},
+                'updates': [(hoja, fila_final, columna, valores)],
+                'required_rows': {hoja: filas necesarias tras el lote},
+            }
+        """
+        deletes: Dict[str, List[int]] = {}
+        for op in self.operations:
+            if op[0] == 'delete':
+                filas = deletes.setdefault(op[1], [])
+                if op[2] not in filas:
+                    filas.append(op[2])
+        for filas in deletes.values():
+            filas.sort(reverse=True)
+
+        def posicion_final(sheet_name: str, fila: int) -> int:
+            borradas = deletes.get(sheet_name, [])
+            return fila - sum(1 for b in borradas if b < fila)
+
+        updates = []
+        siguiente_alta = {
+            hoja: fila - len(deletes.get(hoja, [])) + 1 for hoja, fila in last_rows.items()
+        }
+        required_rows: Dict[str, int] = {}
+
+        for op in self.operations:
+            if op[0] == 'update':
+                _, hoja, fila, columna, valores = op
+                if fila in deletes.get(hoja, []):
+                    continue  # la fila desaparece en este mismo lote
+                updates.append((hoja, posicion_final(hoja, fila), columna, valores))
+            elif op[0] == 'append':
+                _, hoja, filas = op
+                for valores in filas:
+                    fila = siguiente_alta[hoja]
+                    siguiente_alta[hoja] += 1
+                    updates.append((hoja, fila, 0, valores))
+                    required_rows[hoja] = max(required_rows.get(hoja, 0), fila)
+
+        return {
+            'deletes': deletes,
+            'updates': updates,
+            'required_rows': required_rows,
+        }
@@ -2,13 +2,13 @@
 Extractor de PDFs del Formulario IRC - VERSIÓN MEJORADA
 Extrae datos de solicitudes desde los PDFs generados por el formulario web
 """
-import pdfplumber
 import re
 from datetime import datetime
 from typing import Dict, Any, Optional
 import json
 
 from src.models.solicitud_real import Solicitud
+from src.utils.date_parser import DateParser
 from src.utils.logger import logger
 
 
@@ -63,6 +63,13 @@ class PDFExtractor:
         'tiempo_horas': r'Tiempo de uso \(h\):\s*(\d+)',
     }
     
+    # Fechas de 'Hora registro' (el formulario web usa dd-mm-aaaa hh:mm)
+    date_parser = DateParser(
+        ("%d-%m-%Y %H:%M", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M", "%d-%m-%Y", "%d/%m/%Y"),
+        name="hora_registro",
+        dominant="%d-%m-%Y %H:%M"
+    )
+    
     def __init__(self):
         pass
     
@@ -79,6 +86,9 @@ class PDFExtractor:
         try:
             logger.info(f"📄 Extrayendo datos del PDF: {pdf_path}")
             
+            # pdfplumber solo se carga al extraer
+            import pdfplumber
+            
             with pdfplumber.open(pdf_path) as pdf:
                 # Extraer texto de la primera página
                 page = pdf.pages[0]
@@ -132,25 +142,12 @@ class PDFExtractor:
         # FECHA - Intentar múltiples formatos
         if 'hora_registro' in datos:
             fecha_str = datos['hora_registro']
-            formatos = [
-                "%d-%m-%Y %H:%M",
-                "%d/%m/%Y %H:%M",
-                "%Y-%m-%d %H:%M",
-                "%d-%m-%Y",
-                "%d/%m/%Y"
-            ]
+            fecha = self.date_parser.parse(fecha_str)
             
-            fecha_parseada = False
-            for formato in formatos:
-                try:
-                    solicitud.fecha_solicitud = datetime.strptime(fecha_str, formato)
-                    fecha_parseada = True
-                    logger.info(f"✅ Fecha parseada: {solicitud.fecha_solicitud.strftime('%d/%m/%Y %H:%M')}")
-                    break
-                except:
-                    continue
-            
-            if not fecha_parseada:
+            if fecha is not None:
+                solicitud.fecha_solicitud = fecha
+                logger.info(f"✅ Fecha parseada: {solicitud.fecha_solicitud.strftime('%d/%m/%Y %H:%M')}")
+            else:
                 logger.warning(f"⚠️ No se pudo parsear la fecha '{fecha_str}', usando fecha actual")
                 solicitud.fecha_solicitud = datetime.now()
         else:
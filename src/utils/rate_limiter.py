@@ -0,0 +1,169 @@
+"""
+Control de cuota de la API de Google Sheets
+Cubo de fichas (token bucket) con prioridades y reintentos con espera exponencial
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+import logging
+
+from config import SHEETS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Prioridades de las llamadas
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# Códigos HTTP que merece la pena reintentar (cuota y errores del servidor)
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+_priority_state = threading.local()
+
+# Hilo de la interfaz (Tk), ver set_ui_thread
+_ui_thread: Optional[threading.Thread] = None
+
+
+class RateLimitExceeded(Exception):
+    """No hay cuota disponible para la llamada (se descarta)"""
+
+
+def current_priority() -> str:
+    """Prioridad de las llamadas del hilo actual"""
+    return getattr(_priority_state, 'priority', INTERACTIVE)
+
+
+def set_ui_thread(thread: Optional[threading.Thread] = None):
+    """
+    Registra el hilo de la interfaz (por defecto, el actual).
+
+    Las llamadas hechas desde él no esperan más de UI_MAX_WAIT_SECONDS ni a
+    la cuota ni entre reintentos: fallan y la ventana sigue respondiendo.
+    """
+    global _ui_thread
+    _ui_thread = thread or threading.current_thread()
+
+
+def on_ui_thread() -> bool:
+    """Indica si el hilo actual es el de la interfaz"""
+    return _ui_thread is not None and threading.current_thread() is _ui_thread
+
+
+def max_wait_here() -> Optional[float]:
+    """Espera máxima de las llamadas del hilo actual (None: la del limitador)"""
+    return SHEETS_CONFIG.get('UI_MAX_WAIT_SECONDS', 2.0) if on_ui_thread() else None
+
+
+@contextmanager
+def background():
+    """
+    Marca como de baja prioridad las llamadas hechas dentro del bloque.
+
+    Se usa para las sincronizaciones automáticas: si la cuota escasea se
+    descartan para que las acciones del usuario sigan funcionando.
+    """
+    anterior = current_priority()
+    _priority_state.priority = BACKGROUND
+    try:
+        yield
+    finally:
+        _priority_state.priority = anterior
+
+
+def backoff_delay(attempt: int, base: Optional[float] = None, maximum: Optional[float] = None) -> float:
+    """
+    Espera antes del reintento número `attempt` (0-based).
+
+    Exponencial con jitter completo: aleatoria entre 0 y base * 2^attempt,
+    acotada a `maximum`, para que varios clientes no reintenten a la vez.
+    """
+    base = base if base is not None else SHEETS_CONFIG.get('RETRY_BASE_SECONDS', 1.0)
+    maximum = maximum if maximum is not None else SHEETS_CONFIG.get('RETRY_MAX_SECONDS', 32.0)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    Cubo de fichas: cada llamada a la API consume una ficha y el cubo se
+    rellena a ritmo constante (peticiones por minuto).
+
+    Las llamadas interactivas esperan a que haya ficha (hasta max_wait);
+    las de segundo plano no esperan y se rechazan si el cubo baja de la
+    reserva guardada para el usuario.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None, burst: Optional[int] = None,
+                 background_reserve: Optional[float] = None, max_wait: Optional[float] = None):
+        self.per_minute = per_minute if per_minute is not None else SHEETS_CONFIG.get('RATE_LIMIT_PER_MINUTE', 55)
+        self.capacity = burst if burst is not None else SHEETS_CONFIG.get('RATE_LIMIT_BURST', 10)
+        reserva = (background_reserve if background_reserve is not None
+                   else SHEETS_CONFIG.get('RATE_LIMIT_BACKGROUND_RESERVE', 0.3))
+        self.reserve = self.capacity * reserva
+        self.max_wait = max_wait if max_wait is not None else SHEETS_CONFIG.get('RATE_LIMIT_MAX_WAIT_SECONDS', 60.0)
+
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.waited_seconds = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Fichas por segundo"""
+        return self.per_minute / 60.0
+
+    def _refill(self):
+        ahora = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (ahora - self._updated) * self.rate)
+        self._updated = ahora
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def acquire(self, priority: Optional[str] = None, max_wait: Optional[float] = None):
+        """
+        Consume una ficha.
+
+        Args:
+            max_wait: Espera máxima de esta llamada (por defecto self.max_wait)
+
+        Raises:
+            RateLimitExceeded: Llamada de segundo plano sin cuota suficiente,
+                o interactiva que tendría que esperar más de max_wait
+        """
+        priority = priority or current_priority()
+        max_wait = max_wait if max_wait is not None else self.max_wait
+        esperado = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+
+                if priority == BACKGROUND and self._tokens - 1 < self.reserve:
+                    self.dropped += 1
+                    raise RateLimitExceeded("Cuota baja: llamada en segundo plano descartada")
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited_seconds += esperado
+                    return
+
+                espera = (1 - self._tokens) / self.rate
+
+            if esperado + espera > max_wait:
+                raise RateLimitExceeded(f"Cuota agotada: habría que esperar más de {max_wait:.0f}s")
+
+            if esperado == 0:
+                logger.info(f"⏳ Cuota de la API al límite, esperando {espera:.1f}s")
+            time.sleep(espera)
+            esperado += espera
+
+    def penalize(self):
+        """Vacía el cubo tras un 429: la cuota real está agotada aunque el cubo no lo sepa"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
@@ -0,0 +1,360 @@
+"""
+Decodificación de filas por encabezados
+Compila, a partir de la fila de encabezados, un plan por columna que crea
+los modelos de un lote de filas en una sola pasada
+"""
+import sys
+import threading
+import unicodedata
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, date
+from itertools import repeat
+from typing import List, Dict, Optional, Any, Callable, Tuple, Sequence
+import logging
+
+from src.models.compact import intern_text, RawJSON
+from src.models.solicitud_real import Solicitud
+from src.models.sesion import Sesion
+from src.utils.storage_backends import to_cell_text
+from src.utils.date_parser import DateParser, SAMPLE_SIZE
+from src.utils.typed_values import (
+    CONVERTERS, TEXT, INT, FLOAT, DATE, DATETIME, MONTH, date_converter, datetime_converter
+)
+
+logger = logging.getLogger(__name__)
+
+# Tipo adicional: texto JSON (detalles de servicio)
+JSON = 'json'
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    Columna de una hoja y campo del modelo que la recibe.
+
+    Las celdas vacías, las que no se pueden interpretar y las de columnas
+    que no están en la hoja toman `default` (o el resultado de
+    `default_factory`, si se da).
+    """
+    field: str
+    header: str
+    kind: str = TEXT
+    default: Any = ""
+    default_factory: Optional[Callable[[], Any]] = None
+    intern: bool = False  # Textos de pocas categorías (ver compact.intern_text)
+    aliases: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SheetSchema:
+    """Modelo de una hoja, sus columnas y los campos que no vienen de la hoja"""
+    model: type
+    columns: Tuple[Column, ...]
+    extra: Dict[str, Any]
+
+
+def normalize_header(header: Any) -> str:
+    """'Fecha Sesión ' -> 'fecha sesion' (sin tildes, mayúsculas ni espacios extra)"""
+    texto = unicodedata.normalize('NFKD', str(header))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.casefold().split())
+
+
+def _to_json(value: Any) -> Any:
+    # El texto se guarda sin interpretar (ver compact.lazy_json_field)
+    if isinstance(value, str):
+        return RawJSON(value)
+    if isinstance(value, dict):
+        return value
+    return None
+
+
+def _text_or_default(value: Any, default: Any, intern: bool) -> Any:
+    # Celdas vacías y valores sin formato (números, casillas) de columnas de texto
+    if value is None or value == "":
+        return default
+    texto = to_cell_text(value)
+    return sys.intern(texto) if intern else texto
+
+
+def _convert_memo(convertir: Callable[[Any], Any], crudos: List[Any]) -> List[Any]:
+    """
+    Convierte una columna analizando cada texto distinto una sola vez.
+
+    Fechas, cantidades y meses se repiten mucho entre filas. Solo se
+    recuerdan los textos: 1, 1.0 y True son la misma clave de diccionario
+    pero no el mismo valor de celda.
+    """
+    memo: Dict[str, Any] = {"": None}
+    valores = []
+    for v in crudos:
+        if type(v) is str:
+            r = memo.get(v, memo)
+            if r is memo:
+                r = memo[v] = convertir(v)
+        else:
+            r = convertir(v) if v is not None else None
+        valores.append(r)
+    return valores
+
+
+class RowCodec:
+    """
+    Decodificador de las filas de una hoja en modelos.
+
+    Se compila una vez por fila de encabezados: cada campo del modelo se
+    asocia a la posición de su columna por nombre, de modo que reordenar,
+    insertar o quitar columnas en la hoja no desplaza los datos. Si ningún
+    encabezado coincide (hoja sin encabezados) se usa el orden de las
+    columnas del esquema.
+
+    decode() convierte cada columna del lote de una vez (una función por
+    columna, sin decisiones por celda) y crea los modelos pasando todos los
+    campos al constructor, así que no se ejecuta ninguna fábrica por defecto.
+    Cada columna de fecha tiene su propio DateParser: detecta el formato de
+    la columna con las primeras filas y recuerda las fechas entre cargas.
+    """
+
+    def __init__(self, schema: SheetSchema, headers: Optional[Sequence[Any]] = None):
+        self.model = schema.model
+        columnas = {col.field: col for col in schema.columns}
+        campos = [f.name for f in fields(self.model)]
+        cubiertos = set(columnas) | set(schema.extra)
+        if cubiertos != set(campos):
+            raise ValueError(f"El esquema de {self.model.__name__} no cubre exactamente sus campos")
+
+        posiciones: Dict[str, int] = {}
+        for i, header in enumerate(headers or []):
+            nombre = normalize_header(header)
+            if nombre:
+                posiciones.setdefault(nombre, i)
+
+        por_nombre = any(normalize_header(nombre) in posiciones
+                         for col in schema.columns for nombre in (col.header,) + col.aliases)
+        if headers and not por_nombre:
+            logger.warning(f"⚠️ {self.model.__name__}: ningún encabezado reconocido, "
+                           f"se usa el orden de columnas por defecto")
+
+        # Posición de cada columna del esquema
+        indices: Dict[str, Optional[int]] = {}
+        for n, col in enumerate(schema.columns):
+            if por_nombre:
+                indices[col.field] = next((posiciones[normalize_header(nombre)]
+                                           for nombre in (col.header,) + col.aliases
+                                           if normalize_header(nombre) in posiciones), None)
+            else:
+                indices[col.field] = n
+
+        # Encabezado no reconocido (p. ej. renombrado): su posición habitual,
+        # si ninguna otra columna la ocupa
+        ocupadas = set(indices.values())
+        sin_nombre = []
+        for n, col in enumerate(schema.columns):
+            if indices[col.field] is None and n not in ocupadas and n < len(headers or []):
+                indices[col.field] = n
+                ocupadas.add(n)
+                sin_nombre.append(f"{col.header} -> '{headers[n]}'")
+            elif indices[col.field] is None:
+                sin_nombre.append(f"{col.header} -> valor por defecto")
+        if sin_nombre:
+            logger.warning(f"⚠️ {self.model.__name__}: columnas no encontradas por encabezado "
+                           f"({'; '.join(sin_nombre)})")
+
+        # Plan en el orden de los campos del modelo: (columna, posición) o valor fijo
+        self._plan: List[Tuple[Optional[Column], Optional[int], Any]] = [
+            (columnas[campo], indices[campo], None) if campo in columnas
+            else (None, None, schema.extra[campo])
+            for campo in campos
+        ]
+
+        # Analizadores de fecha por columna
+        self._date_parsers: Dict[str, DateParser] = {}
+        self._converters: Dict[str, Callable[[Any], Any]] = {}
+        for col in schema.columns:
+            if col.kind in (DATE, DATETIME):
+                parser = DateParser(name=f"{self.model.__name__}.{col.field}")
+                self._date_parsers[col.field] = parser
+                crear = date_converter if col.kind == DATE else datetime_converter
+                self._converters[col.field] = crear(parser)
+            elif col.kind != TEXT:
+                self._converters[col.field] = _to_json if col.kind == JSON else CONVERTERS[col.kind]
+
+        # Columnas que hay que leer de cada fila
+        self._width = max((indice + 1 for _, indice, _ in self._plan if indice is not None), default=0)
+
+        # Posición de la columna de ID (la primera del esquema)
+        self.id_index: Optional[int] = indices[schema.columns[0].field]
+
+    def decode(self, rows: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Crea un modelo por fila.
+
+        Args:
+            rows: Filas de datos (sin encabezados), con texto formateado o
+                valores sin formato (ver SheetsManager.get_many(typed=True))
+
+        Returns:
+            Modelos en el orden de las filas
+        """
+        n = len(rows)
+        if not n:
+            return []
+
+        # Filas a columnas de una vez (las filas cortas se rellenan antes)
+        ancho = self._width
+        completas = [row if len(row) >= ancho else tuple(row) + ("",) * (ancho - len(row))
+                     for row in rows]
+        celdas = list(zip(*completas)) if ancho else []
+
+        columnas = []
+        for col, indice, fijo in self._plan:
+            if col is None:
+                columnas.append(repeat(fijo, n))
+            elif indice is None:
+                columnas.append(self._defaults(col, n))
+            else:
+                columnas.append(self._convert(col, celdas[indice]))
+
+        # Todos los campos por posición: no se ejecutan las fábricas del modelo
+        return list(map(self.model, *columnas))
+
+    def decode_row(self, row: Sequence[Any]) -> Any:
+        """Crea el modelo de una sola fila"""
+        return self.decode([row])[0]
+
+    @staticmethod
+    def _defaults(col: Column, n: int) -> List[Any]:
+        if col.default_factory is not None:
+            return [col.default_factory() for _ in range(n)]
+        return [col.default] * n
+
+    def _convert(self, col: Column, crudos: Sequence[Any]) -> List[Any]:
+        if col.kind == TEXT and col.default_factory is None:
+            # Caso más común, en una sola pasada: textos no vacíos tal cual
+            defecto = col.default
+            if col.intern:
+                return [sys.intern(v) if type(v) is str and v else _text_or_default(v, defecto, True)
+                        for v in crudos]
+            return [v if type(v) is str and v else _text_or_default(v, defecto, False)
+                    for v in crudos]
+
+        if col.kind == TEXT:
+            valores = [(v if type(v) is str else to_cell_text(v)) if v is not None and v != "" else None
+                       for v in crudos]
+        elif col.kind in (JSON, DATE, DATETIME):
+            parser = self._date_parsers.get(col.field)
+            if parser is not None and parser.dominant_format is None:
+                parser.detect_once(crudos[:SAMPLE_SIZE])
+            # Las fechas ya se recuerdan en su analizador y los JSON no se
+            # interpretan aquí
+            convertir = self._converters[col.field]
+            valores = [convertir(v) if v is not None and v != "" else None for v in crudos]
+        else:
+            valores = _convert_memo(self._converters[col.field], crudos)
+
+        if col.intern:
+            valores = [intern_text(v) for v in valores]
+
+        # Vacíos y no interpretables: valor por defecto
+        if col.default_factory is not None:
+            fabrica = col.default_factory
+            return [fabrica() if v is None else v for v in valores]
+        defecto = col.default
+        return [defecto if v is None else v for v in valores]
+
+
+# === ESQUEMAS ===
+
+SOLICITUDES_SCHEMA = SheetSchema(
+    model=Solicitud,
+    columns=(
+        Column('id_solicitud', "ID de Solicitud"),
+        Column('fecha_solicitud', "Fecha de Solicitud", DATETIME, default_factory=datetime.now),
+        Column('estado', "Estado", default="⏳ Pendiente", intern=True),
+        Column('servicio_solicitado', "Servicio Solicitado", intern=True),
+        Column('coste_estimado_iva_0', "Coste_Estimado_IVA_0", FLOAT, default=0.0),
+        Column('detalles_servicio', "Detalles_Servicio", JSON, default_factory=dict),
+        Column('nombre_solicitante', "Nombre del Solicitante"),
+        Column('email', "Email"),
+        Column('telefono', "Telefono"),
+        Column('organismo_centro_solicitante', "Organismo/Centro Solicitante", intern=True),
+        Column('departamento_solicitante', "Departamento Solicitante", intern=True),
+        Column('investigador_principal', "Investigador Principal"),
+        Column('tipo_usuario', "Tipo de Usuario", default="UCM", intern=True),
+        Column('organismo_centro_facturacion', "Organismo/Centro Facturacion", intern=True),
+        Column('departamento_facturacion', "Departamento Facturacion", intern=True),
+        Column('cif', "CIF", intern=True),
+        Column('domicilio_fiscal', "Domicilio Fiscal", intern=True),
+        Column('domicilio_postal', "Domicilio Postal", intern=True),
+        Column('oficina_contable', "Oficina Contable", intern=True),
+        Column('organo_gestor', "Organo Gestor", intern=True),
+        Column('centro_gestor', "Centro Gestor", intern=True),
+        Column('proyecto', "Proyecto"),
+        Column('numero_contabilidad', "Numero de Contabilidad"),
+        Column('observaciones', "Observaciones"),
+    ),
+    extra={'creado_por': "", 'fecha_creacion': None},
+)
+
+SESIONES_SCHEMA = SheetSchema(
+    model=Sesion,
+    columns=(
+        Column('id_sesion', "ID Sesión", default_factory=lambda: f"IRC-Ses-{uuid.uuid4().hex[:7]}"),
+        Column('id_solicitud', "ID Solicitud", intern=True),
+        Column('fecha_sesion', "Fecha Sesión", DATE, default_factory=date.today),
+        Column('tipo_sesion', "Tipo", default="Realizada", intern=True),
+        Column('servicio', "Servicio", intern=True),
+        Column('solicitante', "Solicitante", intern=True),
+        Column('canisters_procesados', "Canisters Procesados", INT, default=0),
+        Column('dosis_aplicada_gy', "Dosis Aplicada (Gy)", FLOAT, default=0.0),
+        Column('mes_gestion', "Mes Gestión", MONTH, intern=True),
+        Column('dosimetros_gestionados', "Dosímetros Gestionados", INT, default=0),
+        Column('horas_contador', "Horas Contador", FLOAT, default=0.0),
+        Column('descripcion_residuos', "Descripción Residuos"),
+        Column('notas', "Notas"),
+        Column('operador', "Operador", intern=True),
+    ),
+    extra={'creado_por': "", 'fecha_creacion': None},
+)
+
+SHEET_SCHEMAS: Dict[str, SheetSchema] = {
+    'Solicitudes': SOLICITUDES_SCHEMA,
+    'Sesiones': SESIONES_SCHEMA,
+}
+
+# Hoja de cada modelo (ver default_codec)
+_MODEL_SHEETS: Dict[type, str] = {schema.model: nombre for nombre, schema in SHEET_SCHEMAS.items()}
+
+# Decodificadores compilados por (hoja, encabezados)
+_codecs: Dict[Tuple[str, Tuple[str, ...]], RowCodec] = {}
+_codecs_lock = threading.Lock()
+
+
+def get_codec(sheet_name: str, headers: Sequence[Any]) -> RowCodec:
+    """
+    Decodificador de una hoja para su fila de encabezados.
+
+    Se compila la primera vez y se reutiliza mientras los encabezados no
+    cambien. Los hilos del cargador comparten los decodificadores (y sus
+    analizadores de fecha): cada uno se compila una sola vez.
+    """
+    clave = (sheet_name, tuple(str(h) for h in headers))
+    codec = _codecs.get(clave)
+    if codec is None:
+        with _codecs_lock:
+            codec = _codecs.get(clave)
+            if codec is None:
+                codec = RowCodec(SHEET_SCHEMAS[sheet_name], headers)
+                _codecs[clave] = codec
+    return codec
+
+
+def default_codec(model: type) -> RowCodec:
+    """
+    Decodificador de un modelo con el orden de columnas por defecto.
+
+    Es el que usan Solicitud.from_sheet_row y Sesion.from_sheet_row para
+    filas sueltas: mismas conversiones que la carga por lotes.
+    """
+    return get_codec(_MODEL_SHEETS[model], ())
@@ -0,0 +1,80 @@
+"""
+Clientes de la API de Google Sheets por hilo
+httplib2.Http no es seguro entre hilos: cada hilo usa su propio cliente y
+todos comparten las mismas credenciales, que se renuevan con candado
+"""
+import threading
+from typing import Callable, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LockedCredentials:
+    """
+    Envoltorio de unas credenciales de google-auth compartidas entre hilos.
+
+    La renovación del token se hace con candado y una sola vez: si varios
+    hilos detectan a la vez que el token ha caducado (o reciben un 401),
+    el primero lo renueva y los demás reutilizan el token nuevo.
+    """
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._lock = threading.Lock()
+        # Token con el que cada hilo hizo su última petición
+        self._local = threading.local()
+
+    def refresh(self, request):
+        visto = getattr(self._local, 'token', None)
+        with self._lock:
+            if self._credentials.valid and self._credentials.token != visto:
+                # Otro hilo lo acaba de renovar
+                return
+            logger.debug("🔑 Renovando token de acceso")
+            self._credentials.refresh(request)
+
+    def before_request(self, request, method, url, headers):
+        # Equivalente a Credentials.before_request, con la renovación bajo candado
+        if not self._credentials.valid:
+            self.refresh(request)
+        self._credentials.apply(headers)
+        self._local.token = self._credentials.token
+
+    def __getattr__(self, name):
+        # token, valid, expired, scopes... se leen de las credenciales reales
+        return getattr(self._credentials, name)
+
+
+class ServicePool:
+    """
+    Un cliente de la API (service + transporte HTTP) por hilo.
+
+    El hilo de Tk y los hilos del cargador obtienen cada uno su cliente
+    con get(); se construye la primera vez que el hilo lo pide (con el
+    documento de descubrimiento local, sin red) y se reutiliza después.
+    Todos comparten las credenciales.
+    """
+
+    def __init__(self, credentials, builder: Callable[[Any], Any]):
+        """
+        Args:
+            credentials: Credenciales de google-auth
+            builder: Función credenciales_envueltas -> service (un transporte nuevo por llamada)
+        """
+        self.credentials = LockedCredentials(credentials)
+        self._builder = builder
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def get(self):
+        """Cliente de la API del hilo actual"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._builder(self.credentials)
+            self._local.service = service
+            with self._lock:
+                self.created += 1
+            logger.debug(f"Cliente de la API creado para el hilo {threading.current_thread().name}")
+        return service
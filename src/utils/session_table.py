@@ -0,0 +1,220 @@
+"""
+Tabla columnar de la hoja Sesiones
+Columnas NumPy para contar, sumar y agrupar sesiones sin recorrer List[Sesion]
+"""
+from datetime import date
+from typing import List, Dict, Optional, Any, Tuple
+import logging
+
+import numpy as np
+
+from src.models.sesion import Sesion
+
+logger = logging.getLogger(__name__)
+
+TIPO_REALIZADA = "Realizada"
+TIPO_PLANIFICADA = "Planificada"
+
+# Unidades de agrupación por fecha (agrupar_por_fecha)
+DIA = 'D'
+SEMANA = 'W'
+MES = 'M'
+ANIO = 'Y'
+
+# Días desde 1970-01-01 (la escala de datetime64[D])
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+_MAX = np.iinfo(np.int64).max
+
+
+def _codificar(valores: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Textos -> (códigos int32, categorías en orden de aparición)"""
+    categorias: Dict[str, int] = {}
+    codigos = np.fromiter((categorias.setdefault(v, len(categorias)) for v in valores),
+                          dtype=np.int32, count=len(valores))
+    return codigos, list(categorias)
+
+
+def _dias(fecha: date) -> int:
+    return fecha.toordinal() - _EPOCH_ORDINAL
+
+
+def _a_fecha(dias: int) -> Optional[date]:
+    return None if dias == _NAT else date.fromordinal(int(dias) + _EPOCH_ORDINAL)
+
+
+class SessionTable:
+    """
+    Sesiones en columnas (una posición por sesión, en el orden de la hoja).
+
+    - fechas: datetime64[D] (NaT si la sesión no tiene fecha válida)
+    - tipos, solicitudes, meses: códigos enteros de tipo_sesion,
+      id_solicitud y mes_gestion (categorías en categorias_tipo,
+      ids_solicitud y categorias_mes)
+    - canisters, horas, dosis: canisters_procesados, horas_contador y
+      dosis_aplicada_gy
+
+    Los filtros son máscaras booleanas (es_tipo, entre) que se combinan con
+    & y | y se pasan a los agregados; los agregados por solicitud devuelven
+    un array indexado por el código de id_solicitud.
+
+    Se construye una vez por carga de la hoja (DataStore.session_table); no
+    se modifica después.
+    """
+
+    def __init__(self, sesiones: List[Sesion]):
+        n = len(sesiones)
+        self.fechas = np.fromiter(
+            (_dias(s.fecha_sesion) if isinstance(s.fecha_sesion, date) else _NAT for s in sesiones),
+            dtype=np.int64, count=n
+        ).view('datetime64[D]')
+        self.tipos, self.categorias_tipo = _codificar([s.tipo_sesion for s in sesiones])
+        self.solicitudes, self.ids_solicitud = _codificar([s.id_solicitud for s in sesiones])
+        self.meses, self.categorias_mes = _codificar([s.mes_gestion or "" for s in sesiones])
+        self.canisters = np.fromiter((s.canisters_procesados or 0 for s in sesiones), dtype=np.int64, count=n)
+        self.horas = np.fromiter((s.horas_contador or 0.0 for s in sesiones), dtype=np.float64, count=n)
+        self.dosis = np.fromiter((s.dosis_aplicada_gy or 0.0 for s in sesiones), dtype=np.float64, count=n)
+        self._codigo_solicitud = {id_solicitud: i for i, id_solicitud in enumerate(self.ids_solicitud)}
+
+    def __len__(self) -> int:
+        return len(self.fechas)
+
+    def codigo_solicitud(self, id_solicitud: str) -> Optional[int]:
+        """Código de una solicitud (None si no tiene sesiones)"""
+        return self._codigo_solicitud.get(id_solicitud)
+
+    # === MÁSCARAS ===
+
+    def es_tipo(self, tipo_sesion: str) -> np.ndarray:
+        """Máscara de las sesiones de un tipo (Realizada, Planificada...)"""
+        if tipo_sesion not in self.categorias_tipo:
+            return np.zeros(len(self), dtype=bool)
+        return self.tipos == self.categorias_tipo.index(tipo_sesion)
+
+    def entre(self, inicio: date, fin: date) -> np.ndarray:
+        """Máscara de las sesiones con fecha entre inicio y fin (ambos incluidos)"""
+        return (self.fechas >= np.datetime64(inicio, 'D')) & (self.fechas <= np.datetime64(fin, 'D'))
+
+    def contar(self, mascara: Optional[np.ndarray] = None) -> int:
+        """Número de sesiones (de la máscara, o todas)"""
+        return len(self) if mascara is None else int(np.count_nonzero(mascara))
+
+    # === AGREGADOS POR SOLICITUD ===
+
+    def contar_por_solicitud(self, mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sesiones por solicitud"""
+        codigos = self.solicitudes if mascara is None else self.solicitudes[mascara]
+        return np.bincount(codigos, minlength=len(self.ids_solicitud))
+
+    def sumar_por_solicitud(self, columna: np.ndarray,
+                            mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Suma de una columna numérica por solicitud.
+
+        Las columnas enteras se suman como enteros (bincount suma en float64).
+        """
+        codigos, valores = self.solicitudes, columna
+        if mascara is not None:
+            codigos, valores = codigos[mascara], valores[mascara]
+        if np.issubdtype(columna.dtype, np.integer):
+            suma = np.zeros(len(self.ids_solicitud), dtype=columna.dtype)
+            np.add.at(suma, codigos, valores)
+            return suma
+        return np.bincount(codigos, weights=valores, minlength=len(self.ids_solicitud))
+
+    def ultima_fecha_por_solicitud(self, mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fecha más reciente por solicitud (NaT si no hay ninguna)"""
+        return self._fecha_por_solicitud(np.maximum, _NAT, mascara)
+
+    def primera_fecha_por_solicitud(self, mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fecha más antigua por solicitud (NaT si no hay ninguna)"""
+        return self._fecha_por_solicitud(np.minimum, _MAX, mascara)
+
+    def _fecha_por_solicitud(self, ufunc, vacio: int, mascara: Optional[np.ndarray]) -> np.ndarray:
+        validas = ~np.isnat(self.fechas)
+        if mascara is not None:
+            validas &= mascara
+        resultado = np.full(len(self.ids_solicitud), vacio, dtype=np.int64)
+        ufunc.at(resultado, self.solicitudes[validas], self.fechas[validas].view(np.int64))
+        resultado[resultado == _MAX] = _NAT
+        return resultado.view('datetime64[D]')
+
+    def distintos_por_solicitud(self, codigos: np.ndarray,
+                                mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Valores distintos de una columna de códigos por solicitud
+        (p. ej. meses gestionados con self.meses).
+        """
+        solicitudes = self.solicitudes if mascara is None else self.solicitudes[mascara]
+        valores = codigos if mascara is None else codigos[mascara]
+        # Un entero por pareja (solicitud, valor); se cuentan las parejas únicas
+        ancho = int(codigos.max()) + 1 if len(codigos) else 1
+        parejas = np.unique(solicitudes.astype(np.int64) * ancho + valores)
+        return np.bincount(parejas // ancho, minlength=len(self.ids_solicitud))
+
+    def resumen_por_solicitud(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Totales de cada solicitud con sesiones, como sesion.resumir_sesiones.
+
+        Todas las solicitudes se resumen con unas pocas operaciones sobre
+        las columnas en lugar de filtrar sus sesiones una a una.
+        """
+        realizadas = self.es_tipo(TIPO_REALIZADA)
+        planificadas = self.es_tipo(TIPO_PLANIFICADA)
+        con_mes = realizadas.copy()
+        if "" in self.categorias_mes:
+            con_mes &= self.meses != self.categorias_mes.index("")
+
+        n_realizadas = self.contar_por_solicitud(realizadas).tolist()
+        n_planificadas = self.contar_por_solicitud(planificadas).tolist()
+        ultimas = self.ultima_fecha_por_solicitud(realizadas).view(np.int64).tolist()
+        proximas = self.primera_fecha_por_solicitud(planificadas).view(np.int64).tolist()
+        canisters = self.sumar_por_solicitud(self.canisters, realizadas).tolist()
+        horas = self.sumar_por_solicitud(self.horas, realizadas).tolist()
+        meses = self.distintos_por_solicitud(self.meses, con_mes).tolist()
+
+        return {
+            id_solicitud: {
+                'realizadas': n_realizadas[i],
+                'planificadas': n_planificadas[i],
+                'ultima_sesion': _a_fecha(ultimas[i]),
+                'proxima_sesion': _a_fecha(proximas[i]),
+                'canisters': canisters[i],
+                'horas': horas[i],
+                'meses': meses[i],
+            }
+            for i, id_solicitud in enumerate(self.ids_solicitud)
+        }
+
+    # === AGRUPACIÓN POR FECHA ===
+
+    def agrupar_por_fecha(self, inicio: date, periodos: int, unidad: str = MES,
+                          mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sesiones por periodo, para `periodos` periodos consecutivos.
+
+        Args:
+            inicio: Fecha del primer periodo (con SEMANA, su primer día:
+                las semanas se cuentan de 7 en 7 días desde inicio)
+            periodos: Número de periodos
+            unidad: DIA, SEMANA, MES o ANIO
+            mascara: Sesiones que se cuentan (por defecto, todas)
+
+        Returns:
+            Array de `periodos` enteros; las sesiones fuera del intervalo no cuentan
+        """
+        validas = ~np.isnat(self.fechas)
+        if mascara is not None:
+            validas &= mascara
+        fechas = self.fechas[validas]
+
+        if unidad == SEMANA:
+            posicion = (fechas - np.datetime64(inicio, 'D')).astype(np.int64) // 7
+        else:
+            escala = 'D' if unidad == DIA else unidad
+            tipo = f'datetime64[{escala}]'
+            posicion = (fechas.astype(tipo)
+                        - np.datetime64(inicio, 'D').astype(tipo)).astype(np.int64)
+
+        dentro = (posicion >= 0) & (posicion < periodos)
+        return np.bincount(posicion[dentro], minlength=periodos)[:periodos]
@@ -6,45 +6,130 @@ import os
 import json
 import pickle
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Callable
 from datetime import datetime, timedelta
 import logging
-
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google.oauth2 import service_account
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import threading
+from contextlib import contextmanager
 
 from config import (
     SHEETS_CONFIG, 
     CREDENTIALS_FILE, 
     TOKEN_FILE, 
     SERVICE_ACCOUNT_FILE,
+    SQLITE_DB_FILE,
+    SNAPSHOTS_DIR,
+    JOURNAL_FILE,
+    APP_CONFIG,
     DATA_DIR
 )
+from src.constants_real import HEADERS_SOLICITUDES
+from src.models.sesion import Sesion
+from src.utils.a1_notation import parse_range, split_sheet, column_letter
+from src.utils.cache import SheetCache
+from src.utils.circuit_breaker import CircuitBreaker, ONLINE
+from src.utils.metrics import api_metrics
+from src.utils.service_pool import ServicePool
+from src.utils.single_flight import SingleFlight
+from src.utils.snapshot_store import SnapshotStore, diff_rows, has_changes
+from src.utils.mutation_queue import MutationQueue
+from src.utils.write_journal import WriteJournal, UPSERT, DELETE, DONE, CONFLICT, DISCARDED
+from src.utils.storage_backends import (
+    StorageBackend,
+    StorageError,
+    OfflineError,
+    SheetsBackend,
+    SQLiteBackend,
+    to_cell_text,
+    trim_row,
+    grid_last_column,
+)
 
 logger = logging.getLogger(__name__)
 
+# Rango lógico de una hoja completa (clave de caché). La lectura real se
+# dimensiona con la cuadrícula de la hoja, ver _sheet_range()
+FULL_RANGE = "A:ZZ"
+
+# Lectura de una hoja completa cuando no hay metadatos de su cuadrícula
+FALLBACK_RANGE = "A:Z"
+
+# Clave de caché de una hoja completa leída sin formato (get_many(typed=True)).
+# No es un rango A1 válido, así que cualquier escritura en la hoja la invalida
+TYPED_RANGE = "A:ZZ#typed"
+
+
+def _build_service(creds):
+    """
+    Crea un cliente de la API de Sheets con su propio transporte HTTP.
+    
+    Las librerías de Google se importan aquí (y no al cargar el módulo) para
+    que importar la aplicación no cueste tiempo ni toque la red. El documento
+    de descubrimiento se toma de la copia incluida en googleapiclient en vez
+    de descargarlo. Se llama una vez por hilo (ver ServicePool).
+    """
+    import google_auth_httplib2
+    from googleapiclient.discovery import build
+    from googleapiclient.http import build_http
+    
+    transporte = build_http()
+    # Timeout corto: sin red, una llamada no bloquea más de esto (ver CircuitBreaker)
+    transporte.timeout = SHEETS_CONFIG.get('HTTP_TIMEOUT_SECONDS', 20)
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=transporte)
+    return build('sheets', 'v4', http=http,
+                 static_discovery=True, cache_discovery=False)
+
 
 class SheetsManager:
     """Gestor de conexión y operaciones con Google Sheets"""
     
     def __init__(self):
-        self.service = None
+        # Clientes de la API, uno por hilo (ver la propiedad service)
+        self.services: Optional[ServicePool] = None
         self.spreadsheet_id = None
-        self.cache = {}
-        self.cache_timestamp = {}
-        self.cache_ttl = timedelta(minutes=5)
+        # La hoja completa es la copia local: fuera de la LRU (ver SheetCache)
+        self.cache = SheetCache(pinned=(FULL_RANGE,))
+        self.snapshots = SnapshotStore(SNAPSHOTS_DIR)
+        # Índice de clave primaria por hoja: {hoja: {id (columna A): fila 1-based}}
+        self.row_index: Dict[str, Dict[str, int]] = {}
+        # Siguiente bloque de muestra de la sincronización incremental, por hoja
+        self._sync_cursor: Dict[str, int] = {}
+        # Lote de mutaciones activo (por hilo), ver batch()
+        self._batch_state = threading.local()
+        # Diario de escrituras pendientes de enviar (ver save_record)
+        self.journal = WriteJournal(JOURNAL_FILE)
+        # Envío del diario en curso y aviso de cambios llegados durante él
+        self._replay_lock = threading.Lock()
+        self._replaying = False
+        self._replay_again = False
+        # Lecturas en curso, compartidas entre hilos (ver read_range y get_many)
+        self._flight = SingleFlight()
+        # Estado de la conexión con Google Sheets (ver is_online)
+        self.breaker = CircuitBreaker()
+        self.backend: StorageBackend = SheetsBackend(self)
         self._load_config()
         
+        if SHEETS_CONFIG.get('BACKEND') == 'sqlite':
+            self.use_sqlite()
+            return
+        
         # Intentar autenticar automáticamente
         try:
             self.authenticate('auto')
         except Exception as e:
             logger.debug(f"No se pudo autenticar automáticamente: {e}")
         
+    @property
+    def service(self):
+        """Cliente de la API del hilo actual (None si no hay autenticación)"""
+        return self.services.get() if self.services is not None else None
+    
+    def _set_credentials(self, creds):
+        """Sustituye las credenciales; cada hilo creará su cliente al usarlas"""
+        self.services = ServicePool(creds, _build_service)
+        # Se crea ya el del hilo actual para detectar fallos al autenticar
+        self.services.get()
+    
     def _load_config(self):
         """Carga la configuración guardada"""
         config_file = DATA_DIR / "sheets_config.json"
@@ -60,7 +145,37 @@ class SheetsManager:
         Returns:
             bool: True si está autenticado
         """
-        return self.service is not None
+        return self.backend.is_ready()
+    
+    def set_backend(self, backend: StorageBackend):
+        """
+        Cambia el backend de almacenamiento.
+        
+        Args:
+            backend: Instancia de StorageBackend (SheetsBackend, SQLiteBackend...)
+        """
+        self.backend = backend
+        self.clear_cache()
+        logger.info(f"💾 Backend de almacenamiento: {backend.name}")
+    
+    def use_sqlite(self, db_path: Optional[Path] = None):
+        """
+        Trabaja contra la base de datos SQLite local.
+        
+        Args:
+            db_path: Ruta de la base de datos (por defecto SQLITE_DB_FILE)
+        """
+        self.set_backend(SQLiteBackend(
+            db_path or SQLITE_DB_FILE,
+            headers={
+                SHEETS_CONFIG['SHEET_SOLICITUDES']: HEADERS_SOLICITUDES,
+                SHEETS_CONFIG['SHEET_SESIONES']: Sesion.get_sheet_headers(),
+            }
+        ))
+    
+    def use_sheets(self):
+        """Vuelve a trabajar contra Google Sheets"""
+        self.set_backend(SheetsBackend(self))
                 
     def _save_config(self):
         """Guarda la configuración"""
@@ -115,12 +230,14 @@ class SheetsManager:
             if not SERVICE_ACCOUNT_FILE.exists():
                 return False
                 
+            from google.oauth2 import service_account
+            
             creds = service_account.Credentials.from_service_account_file(
                 str(SERVICE_ACCOUNT_FILE),
                 scopes=SHEETS_CONFIG['SCOPES']
             )
             
-            self.service = build('sheets', 'v4', credentials=creds)
+            self._set_credentials(creds)
             return True
             
         except Exception as e:
@@ -133,6 +250,9 @@ class SheetsManager:
             if not TOKEN_FILE.exists():
                 return False
                 
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+            
             creds = Credentials.from_authorized_user_file(
                 str(TOKEN_FILE),
                 SHEETS_CONFIG['SCOPES']
@@ -146,7 +266,7 @@ class SheetsManager:
                     token.write(creds.to_json())
             
             if creds and creds.valid:
-                self.service = build('sheets', 'v4', credentials=creds)
+                self._set_credentials(creds)
                 return True
                 
             return False
@@ -162,6 +282,8 @@ class SheetsManager:
                 logger.error(f"No se encontró {CREDENTIALS_FILE}")
                 return False
             
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            
             flow = InstalledAppFlow.from_client_secrets_file(
                 str(CREDENTIALS_FILE),
                 SHEETS_CONFIG['SCOPES']
@@ -173,7 +295,7 @@ class SheetsManager:
             with open(TOKEN_FILE, 'w') as token:
                 token.write(creds.to_json())
             
-            self.service = build('sheets', 'v4', credentials=creds)
+            self._set_credentials(creds)
             return True
             
         except Exception as e:
@@ -188,19 +310,48 @@ class SheetsManager:
     def test_connection(self) -> bool:
         """Prueba la conexión con el spreadsheet"""
         try:
-            if not self.service or not self.spreadsheet_id:
-                return False
-                
-            self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            return True
+            return self.backend.test_connection()
             
-        except HttpError as e:
+        except StorageError as e:
             logger.error(f"Error al probar conexión: {e}")
             return False
     
+    # === CONEXIÓN ===
+    
+    def is_online(self) -> bool:
+        """
+        Indica si hay conexión con el almacenamiento.
+        
+        Tras varios fallos de red seguidos se considera que no la hay: las
+        lecturas se sirven al momento desde la copia local y las escrituras
+        quedan en el diario, hasta que la sonda en segundo plano detecta que
+        la red ha vuelto. Con SQLite siempre hay conexión.
+        """
+        return self.backend.name != 'sheets' or self.breaker.is_online()
+    
+    def connection_state(self) -> str:
+        """'online' u 'offline' (ver is_online)"""
+        return ONLINE if self.is_online() else self.breaker.state
+    
+    def add_connection_listener(self, callback: Callable[[str], None]):
+        """
+        Registra una función que recibe 'online'/'offline' en cada cambio.
+        
+        Se llama desde el hilo que detecta el cambio (no el de Tk).
+        """
+        self.breaker.add_listener(callback)
+    
+    def check_connection_now(self):
+        """Sin conexión: comprueba ya si ha vuelto en vez de esperar a la sonda"""
+        self.breaker.probe_now()
+    
+    def _offline_copy(self, sheet_name: str, range_name: str,
+                      error: StorageError) -> Optional[List[List[Any]]]:
+        """Copia local (aunque haya caducado) si el error es por falta de conexión"""
+        if not isinstance(error, OfflineError) and self.is_online():
+            return None
+        return self.cache.peek(sheet_name, range_name, allow_expired=True)
+    
     def read_range(self, sheet_name: str, range_name: str) -> List[List[Any]]:
         """
         Lee un rango de celdas del sheet.
@@ -213,32 +364,44 @@ class SheetsManager:
             Lista de listas con los valores
         """
         try:
-            cache_key = f"{sheet_name}!{range_name}"
-            
             # Verificar caché
-            if cache_key in self.cache:
-                if datetime.now() - self.cache_timestamp[cache_key] < self.cache_ttl:
-                    logger.debug(f"Cache hit para {cache_key}")
-                    return self.cache[cache_key]
+            cached = self.cache.get(sheet_name, range_name)
+            if cached is not None:
+                return cached
             
-            # Leer del sheet
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{sheet_name}!{range_name}"
-            ).execute()
+            # Si otro hilo ya está leyendo este rango, se espera a su lectura
+            return self._flight.do((sheet_name, range_name),
+                                   lambda: self._fetch_range(sheet_name, range_name))
             
-            values = result.get('values', [])
-            
-            # Actualizar caché
-            self.cache[cache_key] = values
-            self.cache_timestamp[cache_key] = datetime.now()
-            
-            return values
-            
-        except HttpError as e:
-            logger.error(f"Error al leer rango {sheet_name}!{range_name}: {e}")
+        except StorageError as e:
+            # Sin conexión: la copia local al momento, sin esperar a la red
+            local = self._offline_copy(sheet_name, range_name, e)
+            if local is not None:
+                logger.debug(f"Sin conexión: {sheet_name}!{range_name} desde la copia local")
+                return local
+            if isinstance(e, OfflineError):
+                logger.debug(f"Sin conexión ni copia local de {sheet_name}!{range_name}")
+            else:
+                logger.error(f"Error al leer rango {sheet_name}!{range_name}: {e}")
             return []
     
+    def _fetch_range(self, sheet_name: str, range_name: str) -> List[List[Any]]:
+        """Lee un rango del backend y lo guarda en caché (ver read_range)"""
+        # Puede haberlo guardado una lectura que acaba de terminar
+        cached = self.cache.peek(sheet_name, range_name)
+        if cached is not None:
+            return cached
+        
+        # Leer del backend (la hoja completa, con el tamaño real de la cuadrícula)
+        rango_real = self._sheet_range(sheet_name) if range_name == FULL_RANGE else range_name
+        values = self.backend.read_range(sheet_name, rango_real)
+        
+        # Actualizar caché
+        if range_name == FULL_RANGE:
+            return self._store_full(sheet_name, values)
+        self.cache.put(sheet_name, range_name, values)
+        return values
+    
     def write_range(self, sheet_name: str, range_name: str, values: List[List[Any]]) -> bool:
         """
         Escribe valores en un rango de celdas.
@@ -251,25 +414,26 @@ class SheetsManager:
         Returns:
             bool: True si escritura exitosa
         """
+        queue = self._active_batch()
+        if queue is not None:
+            fila_ini, _, col_ini, _ = parse_range(range_name)
+            for offset, row in enumerate(values):
+                queue.update(sheet_name, fila_ini + offset, col_ini, row)
+            return True
+        
         try:
-            body = {'values': values}
-            
-            result = self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{sheet_name}!{range_name}",
-                valueInputOption='USER_ENTERED',
-                body=body
-            ).execute()
+            updated_cells = self.backend.write_range(sheet_name, range_name, values)
             
-            # Invalidar caché
-            cache_key = f"{sheet_name}!{range_name}"
-            if cache_key in self.cache:
-                del self.cache[cache_key]
+            # Reflejar la escritura en caché e índice
+            fila_ini, _, col_ini, _ = parse_range(range_name)
+            self._apply_locally(sheet_name, [], [
+                (sheet_name, fila_ini + offset, col_ini, row) for offset, row in enumerate(values)
+            ])
             
-            logger.info(f"✅ Escritura exitosa: {result.get('updatedCells', 0)} celdas")
+            logger.info(f"✅ Escritura exitosa: {updated_cells} celdas")
             return True
             
-        except HttpError as e:
+        except StorageError as e:
             logger.error(f"Error al escribir en {sheet_name}!{range_name}: {e}")
             return False
     
@@ -284,27 +448,31 @@ class SheetsManager:
         Returns:
             bool: True si append exitoso
         """
+        queue = self._active_batch()
+        if queue is not None:
+            queue.append(sheet_name, values)
+            return True
+        
         try:
-            body = {'values': values}
-            
-            result = self.service.spreadsheets().values().append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{sheet_name}!A1",
-                valueInputOption='USER_ENTERED',
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
-            
-            # Limpiar caché para esta hoja
-            cache_key = f"{self.spreadsheet_id}_{sheet_name}"
-            if cache_key in self.cache:
-                del self.cache[cache_key]
-                del self.cache_timestamp[cache_key]
+            updated_range = self.backend.append_rows(sheet_name, values)
+            
+            # Reflejar las filas nuevas (posición según updates.updatedRange)
+            try:
+                fila_inicio = parse_range(split_sheet(updated_range)[1])[0]
+            except ValueError:
+                fila_inicio = None
+            
+            if fila_inicio is None:
+                self.invalidate_sheet(sheet_name)
+            else:
+                self._apply_locally(sheet_name, [], [
+                    (sheet_name, fila_inicio + offset, 0, row) for offset, row in enumerate(values)
+                ])
             
             logger.info(f"✅ Añadidas {len(values)} filas a {sheet_name}")
             return True
             
-        except HttpError as e:
+        except StorageError as e:
             logger.error(f"Error al añadir filas en {sheet_name}: {e}")
             return False
     
@@ -333,29 +501,19 @@ class SheetsManager:
         Returns:
             bool: True si actualización exitosa
         """
+        queue = self._active_batch()
+        if queue is not None:
+            queue.update(sheet_name, row_index, 0, row)
+            return True
+        
         try:
-            # Convertir índice a rango
-            range_name = f"{sheet_name}!A{row_index}:Z{row_index}"
-            
-            body = {'values': [row]}
-            
-            result = self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption='USER_ENTERED',
-                body=body
-            ).execute()
-            
-            # Limpiar caché
-            cache_key = f"{self.spreadsheet_id}_{sheet_name}"
-            if cache_key in self.cache:
-                del self.cache[cache_key]
-                del self.cache_timestamp[cache_key]
+            self.backend.update_row(sheet_name, row_index, row)
+            self._apply_locally(sheet_name, [], [(sheet_name, row_index, 0, row)])
             
             logger.info(f"✅ Actualizada fila {row_index} en {sheet_name}")
             return True
             
-        except HttpError as e:
+        except StorageError as e:
             logger.error(f"Error al actualizar fila {row_index} en {sheet_name}: {e}")
             return False
     
@@ -370,63 +528,1233 @@ class SheetsManager:
         Returns:
             bool: True si eliminación exitosa
         """
+        queue = self._active_batch()
+        if queue is not None:
+            queue.delete(sheet_name, row_index)
+            return True
+        
         try:
-            # Obtener sheet ID
-            spreadsheet = self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            sheet_id = None
-            for sheet in spreadsheet['sheets']:
-                if sheet['properties']['title'] == sheet_name:
-                    sheet_id = sheet['properties']['sheetId']
-                    break
-            
-            if sheet_id is None:
-                logger.error(f"No se encontró la hoja {sheet_name}")
-                return False
-            
-            # Eliminar fila (índice 0-based para la API de batchUpdate)
-            requests = [{
-                'deleteDimension': {
-                    'range': {
-                        'sheetId': sheet_id,
-                        'dimension': 'ROWS',
-                        'startIndex': row_index - 1,  # 0-based
-                        'endIndex': row_index
-                    }
-                }
-            }]
-            
-            body = {'requests': requests}
-            
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id,
-                body=body
-            ).execute()
-            
-            # Limpiar caché
-            cache_key = f"{self.spreadsheet_id}_{sheet_name}"
-            if cache_key in self.cache:
-                del self.cache[cache_key]
-                del self.cache_timestamp[cache_key]
+            self.backend.delete_row(sheet_name, row_index)
+            self._apply_locally(sheet_name, [row_index], [])
             
             logger.info(f"✅ Eliminada fila {row_index} en {sheet_name}")
             return True
             
-        except HttpError as e:
+        except StorageError as e:
             logger.error(f"Error al eliminar fila {row_index} en {sheet_name}: {e}")
             return False
     
+    # === LOTES DE MUTACIONES ===
+    
+    def _active_batch(self) -> Optional[MutationQueue]:
+        return getattr(self._batch_state, 'queue', None)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa las escrituras en un único lote.
+        
+        Dentro del bloque, append_row(s), update_row, write_range y delete_row
+        (y update_by_id/delete_by_id) se encolan en lugar de ejecutarse. Al
+        salir se envían como un spreadsheets().batchUpdate (borrados de abajo
+        arriba) más un values().batchUpdate. Si el bloque lanza una excepción
+        no se envía nada.
+        
+        El lote no es atómico: son dos llamadas y, si falla la segunda (o la
+        primera sin respuesta clara), la hoja remota puede haber quedado a
+        medias. En ese caso lote.ok es False y la caché y el índice de las
+        hojas afectadas se descartan, para que nada escriba por número de
+        fila sobre posiciones que pueden haberse desplazado.
+        
+        Los índices de fila se refieren a la hoja tal y como estaba al empezar
+        el lote.
+        
+        Uso:
+            with sheets_manager.batch() as lote:
+                sheets_manager.update_by_id('Solicitudes', id1, fila1)
+                sheets_manager.append_row('Sesiones', fila2)
+            if not lote.ok:
+                ...
+        """
+        actual = self._active_batch()
+        if actual is not None:
+            # Lote anidado: se integra en el exterior
+            yield actual
+            return
+        
+        queue = MutationQueue()
+        self._batch_state.queue = queue
+        try:
+            yield queue
+        except Exception:
+            self._batch_state.queue = None
+            raise
+        
+        self._batch_state.queue = None
+        if len(queue):
+            self._flush_batch(queue)
+    
+    def _last_data_row(self, sheet_name: str) -> int:
+        """Última fila con datos (1-based), usando la caché si es posible"""
+        cached = self.cache.peek(sheet_name, FULL_RANGE)
+        if cached is not None:
+            return max(len(cached), 1)
+        return max(len(self.backend.read_range(sheet_name, "A:A")), 1)
+    
+    def _flush_batch(self, queue: MutationQueue):
+        """Envía un lote y actualiza caché e índice sin volver a leer"""
+        try:
+            last_rows = {
+                sheet_name: self._last_data_row(sheet_name)
+                for sheet_name in queue.sheets if queue.needs_last_row(sheet_name)
+            }
+            plan = queue.plan(last_rows)
+            self.backend.apply_batch(plan['deletes'], plan['updates'], plan['required_rows'])
+            
+        except StorageError as e:
+            queue.ok = False
+            queue.error = str(e)
+            logger.error(f"Error al aplicar lote de {len(queue)} operaciones: {e}")
+            self._discard_after_failed_batch(queue.sheets)
+            return
+        
+        for sheet_name in queue.sheets:
+            self._apply_locally(
+                sheet_name,
+                plan['deletes'].get(sheet_name, []),
+                [u for u in plan['updates'] if u[0] == sheet_name]
+            )
+        
+        logger.info(f"📦 Lote aplicado: {len(queue)} operaciones en {', '.join(queue.sheets)}")
+    
+    def _discard_after_failed_batch(self, sheet_names: List[str]):
+        """
+        Descarta caché e índice de filas tras un lote fallido.
+        
+        Los borrados y ampliaciones pueden haberse aplicado aunque fallen las
+        escrituras de valores: los números de fila guardados ya no son fiables.
+        """
+        for sheet_name in sheet_names:
+            self.invalidate_sheet(sheet_name)
+    
+    def _apply_locally(self, sheet_name: str, deletes: List[int],
+                       updates: List[Tuple[str, int, int, List[Any]]]):
+        """
+        Refleja una escritura ya confirmada en la caché y en el índice de filas.
+        
+        La hoja completa en caché se modifica en el sitio (sin volver a leer),
+        también si ha caducado, para que la copia local no pierda la
+        escritura; el resto de rangos cacheados afectados se invalidan.
+        
+        Args:
+            deletes: Filas eliminadas, de mayor a menor
+            updates: (hoja, fila, columna, valores) en su posición final
+        """
+        full = self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True)
+        vigente = self.cache.peek(sheet_name, FULL_RANGE) is not None
+        
+        if deletes:
+            # Los borrados desplazan filas: ningún rango parcial sigue siendo válido
+            self.cache.invalidate_sheet(sheet_name, keep=FULL_RANGE)
+        else:
+            for _, fila, columna, nuevos in updates:
+                fin = column_letter(columna + max(len(nuevos), 1) - 1)
+                self.cache.invalidate_range(
+                    sheet_name, f"{column_letter(columna)}{fila}:{fin}{fila}"
+                )
+        
+        if full is not None:
+            values = [list(row) for row in full]
+            for fila in deletes:
+                if fila - 1 < len(values):
+                    del values[fila - 1]
+            for _, fila, columna, nuevos in updates:
+                while len(values) < fila:
+                    values.append([])
+                row = values[fila - 1]
+                if len(row) < columna + len(nuevos):
+                    row.extend([""] * (columna + len(nuevos) - len(row)))
+                row[columna:columna + len(nuevos)] = [to_cell_text(v) for v in nuevos]
+                values[fila - 1] = trim_row(row)
+            
+            # replace() conserva la antigüedad: una copia caducada lo sigue estando
+            self.cache.replace(sheet_name, FULL_RANGE, values)
+            self._save_snapshot(sheet_name, values)
+            if vigente:
+                self._build_row_index(sheet_name, values)
+                return
+        
+        # Sin la hoja vigente en caché, se mantiene solo el índice
+        for fila in deletes:
+            self._index_deleted(sheet_name, fila)
+        for _, fila, columna, nuevos in updates:
+            if columna == 0:
+                self._index_updated(sheet_name, fila, nuevos)
+    
+    # === ESCRITURAS CON DIARIO (TRABAJO SIN CONEXIÓN) ===
+    
+    def _journal_target(self) -> str:
+        """Destino de las entradas del diario (backend y base de datos actuales)"""
+        if self.backend.name == 'sheets':
+            return f"sheets:{self.spreadsheet_id}"
+        return f"{self.backend.name}:{getattr(self.backend, 'db_path', '')}"
+    
+    @staticmethod
+    def _normalize_row(row: Optional[List[Any]]) -> Optional[List[str]]:
+        """Fila como texto y sin celdas vacías al final (para comparar versiones)"""
+        if row is None:
+            return None
+        return trim_row([to_cell_text(v) for v in row])
+    
+    @staticmethod
+    def _apply_by_id(values: List[List[Any]], cambios: Dict[str, Optional[List[Any]]]) -> List[List[Any]]:
+        """
+        Aplica cambios por ID sobre una hoja completa (sin modificar la original).
+        
+        Args:
+            values: Hoja completa (con encabezados)
+            cambios: {id: fila nueva, o None para borrar}; los IDs que no
+                existen se añaden al final
+        """
+        values = list(values)
+        posiciones = {str(row[0]): i for i, row in enumerate(values) if i > 0 and row and row[0]}
+        
+        borrar = set()
+        for record_id, row in cambios.items():
+            i = posiciones.get(record_id)
+            if row is None:
+                if i is not None:
+                    borrar.add(i)
+            elif i is None:
+                values.append(list(row))
+            else:
+                values[i] = list(row)
+        
+        if borrar:
+            values = [row for i, row in enumerate(values) if i not in borrar]
+        return values
+    
+    def _overlay_pending(self, sheet_name: str, values: List[List[Any]]) -> List[List[Any]]:
+        """Aplica a una hoja los cambios del diario que aún no se han enviado"""
+        pendientes = self.journal.pending(self._journal_target(), sheet_name)
+        if not pendientes or not values:
+            return values
+        
+        cambios = {}
+        for entrada in pendientes:
+            cambios[entrada['id']] = entrada['row'] if entrada['op'] == UPSERT else None
+        return self._apply_by_id(values, cambios)
+    
+    def _set_local_rows(self, sheet_name: str, cambios: Dict[str, Optional[List[Any]]]):
+        """Refleja cambios por ID en la hoja en caché (sin red), conservando su antigüedad"""
+        full = self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True)
+        if full is None:
+            # Se aplicarán sobre la próxima lectura completa (_store_full)
+            return
+        
+        values = self._apply_by_id(full, cambios)
+        self.cache.invalidate_sheet(sheet_name, keep=FULL_RANGE)
+        self.cache.replace(sheet_name, FULL_RANGE, values)
+        self._build_row_index(sheet_name, values)
+        self._save_snapshot(sheet_name, values)
+    
+    def get_local_data(self, sheet_name: str) -> Optional[List[List[Any]]]:
+        """Hoja completa tal como está en local (aunque la caché haya caducado), sin red"""
+        return self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True)
+    
+    def _local_row(self, sheet_name: str, record_id: str) -> Tuple[Optional[List[Any]], bool]:
+        """
+        Fila actual de un registro según la copia local, sin red.
+        
+        Returns:
+            (fila o None si no existe, False si no hay copia local de la hoja)
+        """
+        full = self.get_local_data(sheet_name)
+        if full is None:
+            # No se descarga: save_record y delete_record no esperan a la red
+            return None, False
+        for row in full[1:]:
+            if row and str(row[0]) == record_id:
+                return self._normalize_row(row), True
+        return None, True
+    
+    def save_record(self, sheet_name: str, row: List[Any]) -> bool:
+        """
+        Guarda un registro (alta o modificación por su ID) sin esperar a la red.
+        
+        El cambio se anota en el diario local, se aplica en la caché al
+        momento y se envía después con replay_journal(). Si no hay conexión
+        queda pendiente y se reenvía al volver.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            row: Fila completa; la columna A es el ID
+            
+        Returns:
+            bool: True si el cambio quedó registrado
+        """
+        if not row or not row[0]:
+            logger.error(f"No se puede guardar en {sheet_name} una fila sin ID")
+            return False
+        
+        record_id = str(row[0])
+        fila = self._normalize_row(row)
+        base, base_known = self._local_row(sheet_name, record_id)
+        try:
+            self.journal.record(self._journal_target(), UPSERT, sheet_name, record_id,
+                                fila, base, base_known)
+        except OSError as e:
+            logger.error(f"No se pudo anotar el cambio de {record_id} en el diario: {e}")
+            return False
+        
+        self._set_local_rows(sheet_name, {record_id: fila})
+        logger.info(f"📝 {sheet_name}: {record_id} guardado en local (pendiente de enviar)")
+        return True
+    
+    def delete_record(self, sheet_name: str, record_id: str) -> bool:
+        """
+        Elimina un registro por su ID sin esperar a la red (ver save_record).
+        
+        Returns:
+            bool: True si el borrado quedó registrado
+        """
+        record_id = str(record_id)
+        base, base_known = self._local_row(sheet_name, record_id)
+        try:
+            self.journal.record(self._journal_target(), DELETE, sheet_name, record_id,
+                                None, base, base_known)
+        except OSError as e:
+            logger.error(f"No se pudo anotar el borrado de {record_id} en el diario: {e}")
+            return False
+        
+        self._set_local_rows(sheet_name, {record_id: None})
+        logger.info(f"📝 {sheet_name}: {record_id} eliminado en local (pendiente de enviar)")
+        return True
+    
+    def pending_writes(self) -> int:
+        """Número de cambios del diario pendientes de enviar"""
+        return len(self.journal.pending(self._journal_target()))
+    
+    def replay_journal(self) -> Dict[str, Any]:
+        """
+        Envía en orden los cambios pendientes del diario, en un solo lote.
+        
+        Los cambios de un mismo registro se agrupan: se compara la fila
+        remota actual con la que vio el usuario antes del primer cambio
+        (base). Si coinciden se envía la versión final; si otra persona la
+        ha modificado (o borrado) entretanto, el cambio no se envía y queda
+        marcado como conflicto, y la caché vuelve a la versión remota.
+        
+        Solo hacen falta tres llamadas: columna de IDs de cada hoja, filas
+        remotas de los registros afectados y el lote de escritura.
+        
+        Si se llama mientras otro envío está en curso, este último vuelve a
+        pasar por el diario al terminar (los cambios nuevos no esperan al
+        siguiente reintento) y la llamada devuelve 'running': True sin
+        enviar nada.
+        
+        Returns:
+            {'applied': n, 'conflicts': [entradas sin resolver], 'pending': n,
+             'error': str|None, 'running': bool}
+        """
+        with self._replay_lock:
+            if self._replaying:
+                self._replay_again = True
+                return {'applied': 0, 'conflicts': [], 'pending': self.pending_writes(),
+                        'error': None, 'running': True}
+            self._replaying = True
+        
+        aplicados = 0
+        try:
+            while True:
+                resultado = self._replay_pass()
+                aplicados += resultado['applied']
+                with self._replay_lock:
+                    # Sin conexión no se insiste: lo nuevo irá en el reintento
+                    otra = self._replay_again and not resultado['error']
+                    self._replay_again = False
+                    if not otra:
+                        # En la misma sección que el aviso: ninguno se pierde
+                        self._replaying = False
+                        break
+        except Exception:
+            with self._replay_lock:
+                self._replaying = False
+            raise
+        
+        resultado['applied'] = aplicados
+        resultado['running'] = False
+        return resultado
+    
+    def _replay_pass(self) -> Dict[str, Any]:
+        """Una pasada de replay_journal sobre las entradas pendientes en este momento"""
+        pendientes = self.journal.pending(self._journal_target())
+        if not pendientes:
+            return {'applied': 0, 'conflicts': [], 'pending': 0, 'error': None}
+
+        # Cambios agrupados por registro, en orden de primera aparición
+        grupos: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for entrada in pendientes:
+            grupos.setdefault((entrada['sheet'], entrada['id']), []).append(entrada)
+        hojas = list(dict.fromkeys(sheet_name for sheet_name, _ in grupos))
+
+        try:
+            # 1) Posición actual de cada ID
+            columnas = self.backend.batch_read([(sheet_name, "A1:A") for sheet_name in hojas])
+            posiciones = {
+                sheet_name: {str(row[0]): n for n, row in enumerate(ids, start=1)
+                             if n > 1 and row and row[0]}
+                for sheet_name, ids in zip(hojas, columnas)
+            }
+            last_rows = {sheet_name: max(len(ids), 1) for sheet_name, ids in zip(hojas, columnas)}
+
+            # 2) Versión remota de los registros afectados
+            existentes = [(sheet_name, record_id) for sheet_name, record_id in grupos
+                          if record_id in posiciones[sheet_name]]
+            remotas: Dict[Tuple[str, str], List[Any]] = {}
+            if existentes:
+                ultima_col = {sheet_name: self._last_column(sheet_name) for sheet_name in hojas}
+                rangos = []
+                for sheet_name, record_id in existentes:
+                    fila = posiciones[sheet_name][record_id]
+                    rangos.append((sheet_name, f"A{fila}:{ultima_col[sheet_name]}{fila}"))
+                filas = self.backend.batch_read(rangos)
+                for clave, valores in zip(existentes, filas):
+                    remotas[clave] = self._normalize_row(valores[0] if valores else [])
+        except StorageError as e:
+            logger.warning(f"📴 Sin conexión: {len(pendientes)} cambios pendientes de enviar ({e})")
+            return {'applied': 0, 'conflicts': [], 'pending': len(pendientes), 'error': str(e)}
+
+        # 3) Decidir qué se envía
+        queue = MutationQueue()
+        enviadas, hechas, conflictos = [], [], []
+        for (sheet_name, record_id), entradas in grupos.items():
+            seqs = [entrada['seq'] for entrada in entradas]
+            remota = remotas.get((sheet_name, record_id))
+            final = entradas[-1]
+            deseada = final['row'] if final['op'] == UPSERT else None
+
+            if remota == deseada:
+                # Ya aplicado (p. ej. un envío anterior sin confirmar)
+                hechas.extend(seqs)
+            elif (entradas[0].get('base_known', True)
+                  and remota != self._normalize_row(entradas[0]['base'])):
+                conflictos.append((sheet_name, record_id, seqs, remota))
+            elif deseada is None:
+                queue.delete(sheet_name, posiciones[sheet_name][record_id])
+                enviadas.extend(seqs)
+            elif remota is None:
+                queue.append(sheet_name, [deseada])
+                enviadas.extend(seqs)
+            else:
+                # Celdas sobrantes de la versión remota se vacían
+                relleno = [""] * max(0, len(remota) - len(deseada))
+                queue.update(sheet_name, posiciones[sheet_name][record_id], 0, deseada + relleno)
+                enviadas.extend(seqs)
+
+        # Los conflictos no dependen del envío: se anotan y la caché
+        # vuelve a la versión remota
+        for sheet_name, record_id, seqs, remota in conflictos:
+            logger.warning(f"⚠️ Conflicto en {sheet_name}/{record_id}: modificado por otra persona")
+            self.journal.mark(seqs, CONFLICT, remote=remota)
+            self._set_local_rows(sheet_name, {record_id: remota})
+        self.journal.mark(hechas, DONE)
+
+        error = None
+        if len(queue):
+            try:
+                plan = queue.plan(last_rows)
+                self.backend.apply_batch(plan['deletes'], plan['updates'], plan['required_rows'])
+                self.journal.mark(enviadas, DONE)
+                logger.info(f"📤 Enviados {len(enviadas)} cambios pendientes en {len(queue)} operaciones")
+                self._reload_sent_rows(plan['updates'])
+            except StorageError as e:
+                error = str(e)
+                logger.warning(f"📴 No se pudieron enviar los cambios pendientes: {e}")
+                self._discard_after_failed_batch(queue.sheets)
+
+        self.journal.compact()
+        return {
+            'applied': 0 if error else len(enviadas),
+            # Todos los conflictos sin resolver, también los de envíos anteriores
+            'conflicts': self.journal.conflicts(self._journal_target()),
+            'pending': self.pending_writes(),
+            'error': error,
+        }
+    
+    def _reload_sent_rows(self, updates: List[Tuple[str, int, int, List[Any]]]):
+        """
+        Vuelve a leer (en una sola llamada) las filas recién enviadas y las
+        deja en local tal como las guardó Sheets.
+        
+        Con USER_ENTERED Sheets reformatea lo escrito ('2024-01-05' pasa a
+        '05/01/2024', '150.0' a '150'). Si la copia local conservara el
+        texto enviado, la siguiente edición del registro tomaría como base
+        una fila distinta de la remota y daría un conflicto falso. A las
+        entradas anotadas durante el envío se les corrige la base; su fila
+        local, más reciente, no se toca.
+        
+        Args:
+            updates: (hoja, fila, columna, valores) del lote enviado
+        """
+        if self.backend.name != 'sheets':
+            return
+        enviadas = [(sheet_name, fila, self._normalize_row(valores))
+                    for sheet_name, fila, columna, valores in updates if columna == 0 and valores]
+        if not enviadas:
+            return
+        
+        try:
+            leidas = self.backend.batch_read([
+                (sheet_name, f"A{fila}:{self._last_column(sheet_name)}{fila}")
+                for sheet_name, fila, _ in enviadas
+            ])
+        except StorageError as e:
+            # La próxima sincronización traerá el formato de Sheets
+            logger.debug(f"No se pudieron releer las filas enviadas: {e}")
+            return
+        
+        pendientes: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for entrada in self.journal.pending(self._journal_target()):
+            pendientes.setdefault((entrada['sheet'], entrada['id']), []).append(entrada)
+        
+        cambios: Dict[str, Dict[str, List[Any]]] = {}
+        for (sheet_name, _, enviada), valores in zip(enviadas, leidas):
+            remota = self._normalize_row(valores[0] if valores else [])
+            record_id = enviada[0]
+            if remota == enviada or not remota or remota[0] != record_id:
+                # Sin reformatear, o la fila ya es de otro registro
+                continue
+            nuevas = pendientes.get((sheet_name, record_id))
+            if nuevas:
+                self.journal.rebase([e['seq'] for e in nuevas
+                                     if self._normalize_row(e.get('base')) == enviada], remota)
+            else:
+                cambios.setdefault(sheet_name, {})[record_id] = remota
+        
+        for sheet_name, filas in cambios.items():
+            self._set_local_rows(sheet_name, filas)
+    
+    def resolve_conflict(self, sheet_name: str, record_id: str, keep_local: bool) -> bool:
+        """
+        Resuelve un conflicto detectado al enviar el diario.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            record_id: ID del registro en conflicto
+            keep_local: True para volver a enviar la versión local sobre la
+                remota actual; False para descartarla
+            
+        Returns:
+            bool: True si se resolvió
+        """
+        entradas = [e for e in self.journal.conflicts(self._journal_target())
+                    if e['sheet'] == sheet_name and e['id'] == str(record_id)]
+        if not entradas:
+            return False
+        
+        try:
+            self.journal.mark([e['seq'] for e in entradas], DISCARDED)
+            final = entradas[-1]
+            if keep_local:
+                # La base pasa a ser la versión remota que causó el conflicto
+                self.journal.record(self._journal_target(), final['op'], sheet_name, final['id'],
+                                    final['row'], final.get('remote'))
+                self._set_local_rows(sheet_name, {final['id']: final['row'] if final['op'] == UPSERT else None})
+        except OSError as e:
+            logger.error(f"No se pudo resolver el conflicto de {record_id}: {e}")
+            return False
+        
+        self.journal.compact()
+        return True
+    
+    # === HOJAS COMPLETAS E INSTANTÁNEAS ===
+    
+    def _store_full(self, sheet_name: str, values: List[List[Any]]) -> List[List[Any]]:
+        """
+        Guarda una hoja completa recién descargada: caché, índice e instantánea.
+        
+        Returns:
+            Los valores guardados, con los cambios pendientes del diario aplicados
+        """
+        values = self._overlay_pending(sheet_name, values)
+        self.cache.put(sheet_name, FULL_RANGE, values)
+        self._build_row_index(sheet_name, values)
+        self._save_snapshot(sheet_name, values)
+        return values
+    
+    def _snapshots_enabled(self) -> bool:
+        # Con SQLite los datos ya son locales: no hace falta instantánea
+        return (APP_CONFIG.get('SNAPSHOTS_ENABLED', True)
+                and self.backend.name == 'sheets'
+                and bool(self.spreadsheet_id))
+    
+    def _save_snapshot(self, sheet_name: str, values: List[List[Any]]):
+        if self._snapshots_enabled():
+            self.snapshots.save(self.spreadsheet_id, sheet_name, values)
+    
+    def warm_start(self, sheet_names: List[str]) -> List[str]:
+        """
+        Carga en caché las instantáneas guardadas en disco.
+        
+        Permite pintar la interfaz al instante con la última copia buena;
+        después conviene llamar a sync_many() en segundo plano, que solo
+        descarga lo que haya cambiado desde la instantánea.
+        
+        Args:
+            sheet_names: Hojas a cargar
+            
+        Returns:
+            Lista de hojas cargadas desde instantánea
+        """
+        if not self._snapshots_enabled():
+            return []
+        
+        cargadas = []
+        for sheet_name in sheet_names:
+            snapshot = self.snapshots.load(self.spreadsheet_id, sheet_name)
+            if snapshot is None:
+                continue
+            
+            values, timestamp = snapshot
+            values = self._overlay_pending(sheet_name, values)
+            # Se guarda como lectura reciente: la red la sustituirá enseguida
+            self.cache.put(sheet_name, FULL_RANGE, values)
+            self._build_row_index(sheet_name, values)
+            cargadas.append(sheet_name)
+            logger.info(f"⚡ {sheet_name}: {len(values) - 1} filas desde instantánea "
+                        f"({timestamp.strftime('%d/%m/%Y %H:%M')})")
+        
+        return cargadas
+    
+    def fetch_fresh(self, sheet_names: List[str]) -> Dict[str, List[List[Any]]]:
+        """
+        Descarga varias hojas completas, en una sola llamada, sin pasar por la caché.
+        
+        No modifica ningún estado del gestor, por lo que puede llamarse desde
+        un hilo en segundo plano; el resultado se aplica con apply_refresh().
+        
+        Returns:
+            Diccionario {hoja: filas}
+            
+        Raises:
+            StorageError: Si falla la descarga
+        """
+        valores = self.backend.batch_read([(nombre, self._sheet_range(nombre))
+                                           for nombre in sheet_names])
+        return dict(zip(sheet_names, valores))
+    
+    def apply_refresh(self, sheet_name: str, values: List[List[Any]]) -> Dict[str, List[str]]:
+        """
+        Sustituye la hoja en caché por una versión recién descargada.
+        
+        Returns:
+            Diferencias respecto a la versión anterior
+            ({'added': [...], 'changed': [...], 'removed': [...]})
+        """
+        anterior = self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True) or []
+        
+        # Las lecturas parciales pueden haber quedado desfasadas
+        self.cache.invalidate_sheet(sheet_name)
+        return diff_rows(anterior, self._store_full(sheet_name, values))
+    
+    # === SINCRONIZACIÓN INCREMENTAL ===
+    
+    def _sync_base(self, sheet_name: str) -> Optional[List[List[Any]]]:
+        """Última versión conocida de una hoja (caché aunque haya caducado, o instantánea)"""
+        base = self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True)
+        if base is None and self._snapshots_enabled():
+            snapshot = self.snapshots.load(self.spreadsheet_id, sheet_name)
+            if snapshot is not None:
+                base = snapshot[0]
+        return base
+    
+    def _needs_full_read(self, sheet_name: str, authoritative: bool = False) -> bool:
+        """
+        La hoja se lee completa: no hay versión anterior con la que comparar
+        o, si se pide un resultado fiable, no tiene columna de checksum (los
+        bloques de muestra tardan varias sincronizaciones en ver una edición)
+        """
+        if self.backend.name != 'sheets':
+            return True
+        if authoritative and not SHEETS_CONFIG.get('SYNC_CHECKSUM_COLUMNS', {}).get(sheet_name):
+            return True
+        # La instantánea, si la hay, se carga en sync_sheet
+        return (self.cache.peek(sheet_name, FULL_RANGE, allow_expired=True) is None
+                and not self._snapshots_enabled())
+    
+    def _sample_blocks(self, sheet_name: str, total_blocks: int) -> List[int]:
+        """
+        Bloques que se descargan completos en esta sincronización.
+        
+        Rotan en cada llamada para que, sin columna de checksum, cualquier
+        edición se detecte como mucho en total_blocks / SYNC_SAMPLE_BLOCKS
+        sincronizaciones. El último bloque (filas recientes) va siempre.
+        """
+        muestras = min(SHEETS_CONFIG.get('SYNC_SAMPLE_BLOCKS', 2), total_blocks)
+        cursor = self._sync_cursor.get(sheet_name, 0) % total_blocks
+        self._sync_cursor[sheet_name] = cursor + muestras
+        
+        bloques = {(cursor + k) % total_blocks for k in range(muestras)}
+        bloques.add(total_blocks - 1)
+        return sorted(bloques)
+    
+    def sync_sheet(self, sheet_name: str) -> Dict[str, List[str]]:
+        """
+        Actualiza una hoja en caché descargando solo las filas que han cambiado.
+        
+        En lugar de la hoja completa se pide, en una sola llamada batchGet:
+        - La columna de IDs (A): detecta altas, bajas y filas movidas
+        - La fila de encabezados
+        - La columna de checksum, si está configurada en
+          SHEETS_CONFIG['SYNC_CHECKSUM_COLUMNS']: detecta cualquier edición
+        - Sin checksum, unos bloques de muestra completos que rotan en cada
+          llamada, más el último bloque (donde suelen estar las filas recientes)
+        Después se descargan, también juntos, los bloques con filas nuevas o
+        con checksum distinto. Con una edición en una hoja de miles de filas
+        se mueven unos kilobytes en vez de la hoja entera.
+        
+        Sin versión anterior (caché o instantánea) o con el backend SQLite se
+        lee la hoja completa.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            
+        Returns:
+            Diferencias respecto a la versión anterior
+            ({'added': [...], 'changed': [...], 'removed': [...]})
+            
+        Raises:
+            StorageError: Si falla la lectura
+        """
+        # Dos sincronizaciones simultáneas de la misma hoja comparten resultado
+        return self._flight.do(('sync', sheet_name), lambda: self._sync_sheet(sheet_name))
+    
+    def _sync_sheet(self, sheet_name: str) -> Dict[str, List[str]]:
+        """Implementación de sync_sheet (fuera del single-flight)"""
+        base = self._sync_base(sheet_name) if self.backend.name == 'sheets' else None
+        if not base:
+            return self.apply_refresh(sheet_name, self.fetch_fresh([sheet_name])[sheet_name])
+        
+        ultima_columna = self._last_column(sheet_name)
+        bloque = max(1, SHEETS_CONFIG.get('SYNC_BLOCK_SIZE', 250))
+        
+        headers = [str(h).strip() for h in base[0]] if base else []
+        checksum = SHEETS_CONFIG.get('SYNC_CHECKSUM_COLUMNS', {}).get(sheet_name)
+        col_checksum = headers.index(checksum) if checksum in headers else None
+        
+        # 1) Sondeo: IDs, checksum y bloques de muestra en una sola llamada
+        # Con checksum no hace falta muestrear: detecta cualquier edición
+        total_bloques = max(1, -(-(len(base) - 1) // bloque))
+        muestras = self._sample_blocks(sheet_name, total_bloques) if col_checksum is None else []
+        
+        rangos = ["A1:A", f"A1:{ultima_columna}1"]
+        if col_checksum is not None:
+            letra = column_letter(col_checksum)
+            rangos.append(f"{letra}1:{letra}")
+        for b in muestras:
+            inicio = 2 + b * bloque
+            rangos.append(f"A{inicio}:{ultima_columna}{inicio + bloque - 1}")
+        
+        respuesta = self.backend.batch_read([(sheet_name, rango) for rango in rangos])
+        ids = [str(row[0]) if row and row[0] else "" for row in respuesta[0]]
+        checksums = None
+        if col_checksum is not None:
+            checksums = [str(row[0]) if row and row[0] else "" for row in respuesta[2]]
+        
+        # Filas ya frescas: encabezados y bloques de muestra (1-based)
+        frescas: Dict[int, List[Any]] = {1: respuesta[1][0] if respuesta[1] else []}
+        for b, filas in zip(muestras, respuesta[len(rangos) - len(muestras):]):
+            inicio = 2 + b * bloque
+            for n in range(inicio, inicio + bloque):
+                if n - inicio < len(filas):
+                    frescas[n] = filas[n - inicio]
+                elif n <= len(ids):
+                    frescas[n] = []
+        
+        total_filas = max([len(ids)] + [n for n, row in frescas.items() if row])
+        
+        # 2) Filas que hay que volver a descargar
+        base_por_id = {str(row[0]): row for row in base[1:] if row and row[0]}
+        checksum_base = {}
+        if col_checksum is not None:
+            checksum_base = {id_fila: str(row[col_checksum]) if len(row) > col_checksum else ""
+                             for id_fila, row in base_por_id.items()}
+        
+        vistos = set()
+        repetidos = {id_fila for id_fila in ids[1:] if id_fila in vistos or vistos.add(id_fila)}
+        
+        nuevas: Dict[int, List[Any]] = {}
+        pendientes: List[int] = []
+        for n in range(2, total_filas + 1):
+            if n in frescas:
+                continue
+            id_fila = ids[n - 1] if n <= len(ids) else ""
+            anterior = base_por_id.get(id_fila)
+            if anterior is None or id_fila in repetidos:
+                # Fila nueva, sin ID o con ID repetido: no se puede reutilizar
+                pendientes.append(n)
+            elif checksums is not None and checksums[n - 1] != checksum_base.get(id_fila):
+                pendientes.append(n)
+            else:
+                nuevas[n] = anterior
+        
+        if pendientes:
+            # Bloques de filas consecutivas (huecos pequeños se unen)
+            tramos = [[pendientes[0], pendientes[0]]]
+            for n in pendientes[1:]:
+                if n - tramos[-1][1] <= 5:
+                    tramos[-1][1] = n
+                else:
+                    tramos.append([n, n])
+            
+            valores = self.backend.batch_read([
+                (sheet_name, f"A{inicio}:{ultima_columna}{fin}") for inicio, fin in tramos
+            ])
+            for (inicio, fin), filas in zip(tramos, valores):
+                for n in range(inicio, fin + 1):
+                    frescas[n] = filas[n - inicio] if n - inicio < len(filas) else []
+        
+        nuevas.update(frescas)
+        values = self._store_full(sheet_name, [nuevas.get(n, []) for n in range(1, total_filas + 1)])
+        
+        diff = diff_rows(base, values)
+        logger.info(f"🔄 {sheet_name}: sincronización incremental "
+                    f"({len(rangos)} rangos de sondeo, {len(pendientes)} filas descargadas; "
+                    f"+{len(diff['added'])} ~{len(diff['changed'])} -{len(diff['removed'])})")
+        
+        if has_changes(diff):
+            # Las lecturas parciales pueden haber quedado desfasadas
+            self.cache.invalidate_sheet(sheet_name, keep=FULL_RANGE)
+        return diff
+    
+    def sync_many(self, sheet_names: List[str],
+                  authoritative: bool = False) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Sincroniza varias hojas de forma incremental (ver sync_sheet).
+        
+        Las hojas sin versión anterior (o todas, con el backend SQLite) se
+        leen completas juntas, en una sola llamada.
+        
+        Args:
+            sheet_names: Hojas a sincronizar
+            authoritative: El resultado debe reflejar cualquier edición
+                remota (botón Actualizar): las hojas sin columna de checksum
+                se leen completas en vez de por muestras
+        
+        Returns:
+            Diccionario {hoja: diferencias}
+            
+        Raises:
+            StorageError: Si falla la lectura de alguna hoja
+        """
+        completas = [sheet_name for sheet_name in sheet_names
+                     if self._needs_full_read(sheet_name, authoritative)]
+        diffs = {}
+        if completas:
+            for sheet_name, values in self.fetch_fresh(completas).items():
+                diffs[sheet_name] = self.apply_refresh(sheet_name, values)
+        for sheet_name in sheet_names:
+            if sheet_name not in diffs:
+                diffs[sheet_name] = self.sync_sheet(sheet_name)
+        return diffs
+    
+    # === METADATOS DE HOJAS ===
+    
+    def get_sheet_info(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene los metadatos de una hoja (ID, tamaño de cuadrícula, encabezados).
+        
+        Los metadatos se guardan en caché en el backend y solo se vuelven a
+        descargar cuando se pide una hoja que no está en caché.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            
+        Returns:
+            Diccionario con 'sheet_id', 'title', 'row_count', 'column_count'
+            y 'headers', o None si no existe
+        """
+        try:
+            return self.backend.get_sheet_info(sheet_name)
+        except StorageError as e:
+            logger.error(f"Error al obtener metadatos de {sheet_name}: {e}")
+            return None
+    
+    def _sheet_range(self, sheet_name: str) -> str:
+        """
+        Rango A1 que cubre una hoja completa.
+        
+        Las columnas salen de la cuadrícula real (metadatos en caché) y las
+        filas quedan abiertas: la API devuelve hasta la última fila con
+        datos, así que no hay límite de filas ni se pierden las añadidas
+        desde que se cargaron los metadatos.
+        """
+        try:
+            info = self.backend.get_sheet_info(sheet_name)
+        except StorageError as e:
+            logger.debug(f"Sin metadatos de {sheet_name}: {e}")
+            info = None
+        
+        ultima = grid_last_column(info)
+        if ultima is None:
+            return FALLBACK_RANGE
+        return f"A1:{ultima}"
+    
+    def _last_column(self, sheet_name: str) -> str:
+        """Letra de la última columna de la hoja (según _sheet_range)"""
+        fin = parse_range(self._sheet_range(sheet_name))[3]
+        return column_letter(fin if fin is not None else 25)
+    
+    def get_headers(self, sheet_name: str) -> List[Any]:
+        """
+        Obtiene la fila de encabezados de una hoja.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            
+        Returns:
+            Lista con los encabezados (vacía si no se pudo leer)
+        """
+        cached = self.cache.peek(sheet_name, FULL_RANGE)
+        if cached:
+            return cached[0]
+        
+        try:
+            return self.backend.get_headers(sheet_name)
+        except StorageError as e:
+            logger.error(f"Error al leer encabezados de {sheet_name}: {e}")
+            return []
+    
+    # === ÍNDICE DE FILAS POR ID ===
+    
+    def _build_row_index(self, sheet_name: str, values: List[List[Any]]):
+        """Construye el índice id -> fila a partir de la hoja completa"""
+        index = {}
+        for fila, row in enumerate(values[1:], start=2):
+            if row and row[0]:
+                index[str(row[0])] = fila
+        self.row_index[sheet_name] = index
+    
+    def _index_updated(self, sheet_name: str, row_index: int, row: List[Any]):
+        """Actualiza el índice si cambia el ID de una fila"""
+        index = self.row_index.get(sheet_name)
+        if index is None or not row or not row[0]:
+            return
+        
+        for id_anterior, fila in list(index.items()):
+            if fila == row_index and id_anterior != str(row[0]):
+                del index[id_anterior]
+        index[str(row[0])] = row_index
+    
+    def _index_deleted(self, sheet_name: str, row_index: int):
+        """Quita la fila eliminada y desplaza las inferiores"""
+        index = self.row_index.get(sheet_name)
+        if index is None:
+            return
+        
+        for id_fila, fila in list(index.items()):
+            if fila == row_index:
+                del index[id_fila]
+            elif fila > row_index:
+                index[id_fila] = fila - 1
+    
+    def find_row(self, sheet_name: str, record_id: str) -> Optional[int]:
+        """
+        Busca la fila de un registro por su ID (columna A).
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            record_id: ID del registro
+            
+        Returns:
+            Índice de la fila (1-based, incluyendo encabezados) o None
+        """
+        if sheet_name not in self.row_index:
+            # Cargar la hoja construye el índice
+            self.get_all_data(sheet_name)
+        
+        return self.row_index.get(sheet_name, {}).get(str(record_id))
+    
+    def _verified_row(self, sheet_name: str, record_id: str) -> Optional[int]:
+        """
+        Fila de un registro comprobada contra la hoja antes de escribir en ella.
+        
+        El índice sale de la caché: si otra persona ha borrado o insertado
+        filas desde la última lectura, la posición puede ser de otro
+        registro. Se lee solo la celda del ID (lectura mínima) y, si no
+        coincide, se recarga la hoja y se vuelve a buscar.
+        
+        Returns:
+            Índice de la fila (1-based) o None si no se encontró o no se pudo comprobar
+        """
+        row_index = self.find_row(sheet_name, record_id)
+        if row_index is None:
+            logger.error(f"No se encontró {record_id} en {sheet_name}")
+            return None
+        
+        try:
+            celda = self.backend.read_range(sheet_name, f"A{row_index}")
+        except StorageError as e:
+            logger.error(f"Error al comprobar fila {row_index} en {sheet_name}: {e}")
+            return None
+        
+        if not celda or not celda[0] or str(celda[0][0]) != str(record_id):
+            # Índice desactualizado (cambios remotos): recargar y reintentar
+            logger.warning(f"⚠️ Índice desactualizado en {sheet_name}, recargando")
+            self.invalidate_sheet(sheet_name)
+            row_index = self.find_row(sheet_name, record_id)
+            if row_index is None:
+                logger.error(f"No se encontró {record_id} en {sheet_name}")
+        
+        return row_index
+    
+    def update_by_id(self, sheet_name: str, record_id: str, row: List[Any]) -> bool:
+        """
+        Actualiza la fila de un registro localizándola por su ID.
+        
+        Antes de escribir se comprueba la celda del ID (ver _verified_row):
+        sobrescribir la fila de otro registro no se puede deshacer.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            record_id: ID del registro
+            row: Lista con los nuevos valores
+            
+        Returns:
+            bool: True si actualización exitosa
+        """
+        row_index = self._verified_row(sheet_name, record_id)
+        if row_index is None:
+            return False
+        
+        return self.update_row(sheet_name, row_index, row)
+    
+    def delete_by_id(self, sheet_name: str, record_id: str) -> bool:
+        """
+        Elimina la fila de un registro localizándola por su ID.
+        
+        Antes de borrar se comprueba la celda del ID (ver _verified_row), ya
+        que eliminar una fila equivocada no se puede deshacer.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            record_id: ID del registro
+            
+        Returns:
+            bool: True si eliminación exitosa
+        """
+        row_index = self._verified_row(sheet_name, record_id)
+        if row_index is None:
+            return False
+        
+        return self.delete_row(sheet_name, row_index)
+    
     def clear_cache(self):
         """Limpia la caché"""
-        self.cache = {}
-        self.cache_timestamp = {}
+        self.cache.clear()
+        self.row_index = {}
         logger.info("🧹 Caché limpiada")
     
-    def get_all_data(self, sheet_name: str) -> List[List[Any]]:
-        """Obtiene todos los datos de una hoja"""
-        return self.read_range(sheet_name, "A1:Z10000")
+    def invalidate_sheet(self, sheet_name: str):
+        """
+        Descarta los datos en caché de una hoja (la próxima lectura irá al backend).
+        
+        La hoja completa se conserva como copia local caducada (datos sin
+        conexión, base de la sincronización); el índice de filas se descarta.
+        
+        Args:
+            sheet_name: Nombre de la hoja
+        """
+        self.cache.invalidate_sheet(sheet_name)
+        self.row_index.pop(sheet_name, None)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la caché (entradas, aciertos, fallos, lecturas compartidas...)"""
+        stats = self.cache.stats()
+        stats['coalesced'] = self._flight.shared
+        return stats
+    
+    def api_diagnostics(self) -> Dict[str, Any]:
+        """
+        Métricas para el diagnóstico de rendimiento.
+        
+        Returns:
+            {'api': métricas por método de la API, 'cache': cache_stats(),
+             'quota': estado del limitador de cuota (solo con Google Sheets)}
+        """
+        diagnostico = {'api': api_metrics.snapshot(), 'cache': self.cache_stats(), 'quota': None}
+        limiter = getattr(self.backend, 'limiter', None)
+        if limiter is not None:
+            diagnostico['quota'] = {
+                'tokens': limiter.available(),
+                'waited_seconds': limiter.waited_seconds,
+                'dropped': limiter.dropped,
+            }
+        return diagnostico
+    
+    def reset_diagnostics(self):
+        """Pone a cero las métricas de la API y los contadores de caché"""
+        api_metrics.reset()
+        self.cache.reset_stats()
+        self._flight.shared = 0
+    
+    def get_all_data(self, sheet_name: str, typed: bool = False) -> List[List[Any]]:
+        """Obtiene todos los datos de una hoja (typed: ver get_many)"""
+        if typed:
+            return self.get_many([sheet_name], typed=True)[sheet_name]
+        return self.read_range(sheet_name, FULL_RANGE)
+    
+    def get_many(self, sheet_names: List[str], strict: bool = False,
+                 typed: bool = False) -> Dict[str, List[List[Any]]]:
+        """
+        Obtiene todos los datos de varias hojas con una sola petición (batchGet).
+        
+        Las hojas que ya están en caché no se vuelven a pedir; el resto se
+        descargan juntas y se guardan en caché igual que con get_all_data.
+        Si otro hilo ya está descargando alguna de ellas, se espera a esa
+        descarga en lugar de repetirla.
+        
+        Con typed=True se leen los valores sin formato
+        (valueRenderOption=UNFORMATTED_VALUE, dateTimeRenderOption=SERIAL_NUMBER):
+        números como número y fechas como número de serie, que RowCodec
+        decodifica sin analizar texto. Se guardan en una entrada
+        de caché aparte (TYPED_RANGE); el índice de filas, las instantáneas y
+        la sincronización incremental siguen usando los valores con formato.
+        
+        Args:
+            sheet_names: Nombres de las hojas
+            strict: Si es True los errores se propagan (StorageError) en
+                lugar de devolver hojas vacías
+            typed: Leer los valores sin formato
+            
+        Returns:
+            Diccionario {nombre_hoja: filas}
+        """
+        clave_rango = TYPED_RANGE if typed else FULL_RANGE
+        resultado = {}
+        pendientes = []
+        
+        for sheet_name in sheet_names:
+            cached = self.cache.get(sheet_name, clave_rango)
+            if cached is not None:
+                resultado[sheet_name] = cached
+                continue
+            pendientes.append(sheet_name)
+        
+        if pendientes:
+            def descargar(claves: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[List[Any]]]:
+                descargadas = {}
+                faltan = []
+                for clave in claves:
+                    cached = self.cache.peek(*clave)
+                    if cached is not None:
+                        descargadas[clave] = cached
+                    else:
+                        faltan.append(clave[0])
+                if faltan:
+                    valores = self.backend.batch_read([(nombre, self._sheet_range(nombre))
+                                                       for nombre in faltan], typed=typed)
+                    for sheet_name, values in zip(faltan, valores):
+                        if typed:
+                            values = self._overlay_pending(sheet_name, values)
+                            self.cache.put(sheet_name, TYPED_RANGE, values)
+                        else:
+                            values = self._store_full(sheet_name, values)
+                        descargadas[(sheet_name, clave_rango)] = values
+                return descargadas
+            
+            try:
+                # Misma clave que get_all_data: ambas se agrupan entre sí
+                leidas = self._flight.do_many([(nombre, clave_rango) for nombre in pendientes], descargar)
+                for sheet_name in pendientes:
+                    resultado[sheet_name] = leidas[(sheet_name, clave_rango)]
+                    
+            except StorageError as e:
+                # Sin conexión se sirve la copia local de las hojas que la tengan
+                locales = {nombre: self._offline_copy(nombre, clave_rango, e) for nombre in pendientes}
+                if typed:
+                    # La copia con formato también vale: RowCodec acepta ambas
+                    locales = {nombre: local if local is not None else self._offline_copy(nombre, FULL_RANGE, e)
+                               for nombre, local in locales.items()}
+                sin_copia = [nombre for nombre, local in locales.items() if local is None]
+                if sin_copia:
+                    logger.error(f"Error al leer hojas {', '.join(sin_copia)}: {e}")
+                elif not isinstance(e, OfflineError):
+                    logger.warning(f"{e}: se usa la copia local de {', '.join(pendientes)}")
+                if strict and sin_copia:
+                    raise
+                for sheet_name in pendientes:
+                    resultado[sheet_name] = locales[sheet_name] if locales[sheet_name] is not None else []
+        
+        return resultado
+    
+    def read_columns(self, sheet_name: str, columns: List[str]) -> Dict[str, List[Any]]:
+        """
+        Lee solo algunas columnas de una hoja (proyección), por nombre de encabezado.
+        
+        Pensado para vistas que solo agregan (recuentos, sumas): no descarga
+        columnas largas como Notas o Detalles_Servicio. Si la hoja completa
+        está en caché se proyecta desde ella; si no, las columnas que falten
+        se piden juntas con batchGet y se guardan en caché por separado
+        (una entrada por columna, invalidada como cualquier otro rango).
+        
+        Args:
+            sheet_name: Nombre de la hoja
+            columns: Nombres de columna tal como aparecen en los encabezados
+            
+        Returns:
+            Diccionario {columna: valores de las filas de datos}, todas con la
+            misma longitud. Las columnas que no existen no aparecen.
+        """
+        headers = [str(h).strip() for h in self.get_headers(sheet_name)]
+        posiciones = {}
+        for nombre in columns:
+            if nombre in headers:
+                posiciones[nombre] = headers.index(nombre)
+            else:
+                logger.debug(f"La columna '{nombre}' no existe en {sheet_name}")
+        
+        if not posiciones:
+            return {}
+        
+        # Hoja completa en caché: proyección local, sin red
+        full = self.cache.peek(sheet_name, FULL_RANGE)
+        if full is not None:
+            return {
+                nombre: [row[i] if len(row) > i else "" for row in full[1:]]
+                for nombre, i in posiciones.items()
+            }
+        
+        rangos = {nombre: f"{column_letter(i)}2:{column_letter(i)}" for nombre, i in posiciones.items()}
+        resultado: Dict[str, List[Any]] = {}
+        pendientes = []
+        for nombre, rango in rangos.items():
+            cached = self.cache.get(sheet_name, rango)
+            if cached is not None:
+                resultado[nombre] = cached
+            else:
+                pendientes.append(nombre)
+        
+        if pendientes:
+            try:
+                valores = self.backend.batch_read([(sheet_name, rangos[nombre]) for nombre in pendientes])
+            except StorageError as e:
+                logger.error(f"Error al leer columnas de {sheet_name}: {e}")
+                return {}
+            
+            for nombre, values in zip(pendientes, valores):
+                # [[v], [v], [], ...] -> [v, v, "", ...]
+                columna = [row[0] if row else "" for row in values]
+                self.cache.put(sheet_name, rangos[nombre], columna)
+                resultado[nombre] = columna
+        
+        # La API recorta las celdas vacías del final de cada columna
+        filas = max(len(valores) for valores in resultado.values())
+        return {
+            nombre: valores + [""] * (filas - len(valores))
+            for nombre, valores in resultado.items()
+        }
     
     def search_by_column(self, sheet_name: str, column_index: int, search_value: str) -> List[List[Any]]:
         """
@@ -491,5 +1819,44 @@ class SheetsManager:
         logger.info(f"✅ Spreadsheet ID configurado: {spreadsheet_id}")
 
 
-# Instancia global del gestor
-sheets_manager = SheetsManager()
+class _LazySheetsManager:
+    """
+    Sustituto de la instancia global que crea el SheetsManager real (y
+    autentica) la primera vez que se usa.
+    
+    Así importar cualquier módulo no autentica, no renueva tokens ni abre
+    el navegador de OAuth antes de que exista la ventana.
+    """
+    
+    def __init__(self):
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+    
+    def _get(self) -> SheetsManager:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = SheetsManager()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+    
+    @property
+    def initialized(self) -> bool:
+        """Indica si el gestor real ya se ha creado"""
+        return self._instance is not None
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+    
+    def __repr__(self):
+        estado = "creado" if self.initialized else "pendiente"
+        return f"<SheetsManager global ({estado})>"
+
+
+# Instancia global del gestor (se crea en el primer uso)
+sheets_manager = _LazySheetsManager()
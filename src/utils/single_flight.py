@@ -0,0 +1,96 @@
+"""
+Agrupación de lecturas concurrentes idénticas (single-flight)
+Si varias llamadas piden a la vez lo mismo, solo una va a la red
+"""
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Any, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Deduplica llamadas en curso por clave.
+
+    La primera llamada con una clave ejecuta la función; las que llegan
+    mientras tanto (desde otros hilos) esperan a su mismo Future y reciben
+    el mismo resultado o la misma excepción. Al terminar la clave se libera:
+    no es una caché, la siguiente llamada vuelve a ejecutar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.shared = 0
+
+    def _claim(self, keys: List[Hashable]) -> Tuple[Dict[Hashable, Future], Dict[Hashable, Future]]:
+        """Reparte las claves entre propias (a ejecutar) y ajenas (a esperar)"""
+        propias, ajenas = {}, {}
+        with self._lock:
+            for key in keys:
+                if key in self._inflight:
+                    ajenas[key] = self._inflight[key]
+                    self.shared += 1
+                else:
+                    propias[key] = self._inflight[key] = Future()
+        return propias, ajenas
+
+    def _release(self, futures: Dict[Hashable, Future]):
+        with self._lock:
+            for key in futures:
+                self._inflight.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta fn() o espera a la ejecución en curso con la misma clave.
+
+        Raises:
+            La excepción de fn(), también en las llamadas que esperaban
+        """
+        propias, ajenas = self._claim([key])
+        if ajenas:
+            logger.debug(f"Lectura compartida con otra en curso: {key}")
+            return ajenas[key].result()
+
+        future = propias[key]
+        try:
+            resultado = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            self._release(propias)
+            raise
+
+        future.set_result(resultado)
+        self._release(propias)
+        return resultado
+
+    def do_many(self, keys: List[Hashable],
+                fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Versión por lotes: fn recibe solo las claves que no están en curso y
+        devuelve {clave: resultado}; el resto se espera.
+
+        Returns:
+            {clave: resultado} para todas las claves
+        """
+        propias, ajenas = self._claim(list(dict.fromkeys(keys)))
+        resultados: Dict[Hashable, Any] = {}
+
+        if propias:
+            try:
+                resultados = dict(fn(list(propias)))
+            except BaseException as e:
+                for future in propias.values():
+                    future.set_exception(e)
+                self._release(propias)
+                raise
+
+            for key, future in propias.items():
+                future.set_result(resultados.get(key))
+            self._release(propias)
+
+        for key, future in ajenas.items():
+            resultados[key] = future.result()
+        return resultados
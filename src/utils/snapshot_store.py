@@ -0,0 +1,117 @@
+"""
+Instantáneas en disco de las hojas
+Guardan la última copia buena de cada hoja para arrancar sin esperar a la red
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def diff_rows(old: List[List[Any]], new: List[List[Any]]) -> Dict[str, List[str]]:
+    """
+    Compara dos versiones de una hoja por ID (columna A).
+
+    Args:
+        old: Filas anteriores (con encabezados)
+        new: Filas nuevas (con encabezados)
+
+    Returns:
+        {'added': [ids], 'changed': [ids], 'removed': [ids]}
+    """
+    antiguas = {str(row[0]): row for row in old[1:] if row and row[0]}
+    nuevas = {str(row[0]): row for row in new[1:] if row and row[0]}
+
+    return {
+        'added': [id_fila for id_fila in nuevas if id_fila not in antiguas],
+        'changed': [id_fila for id_fila, row in nuevas.items()
+                    if id_fila in antiguas and antiguas[id_fila] != row],
+        'removed': [id_fila for id_fila in antiguas if id_fila not in nuevas],
+    }
+
+
+def has_changes(diff: Dict[str, List[str]]) -> bool:
+    """Indica si un diff de diff_rows contiene algún cambio"""
+    return any(diff.values())
+
+
+class SnapshotStore:
+    """
+    Guarda una instantánea por hoja como JSON comprimido (gzip).
+
+    Cada fichero incluye el spreadsheet_id y el momento de la descarga; una
+    instantánea de otro spreadsheet se ignora.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        # Varios hilos del cargador pueden guardar la misma hoja a la vez
+        self._lock = threading.Lock()
+
+    def _path(self, sheet_name: str) -> Path:
+        nombre = "".join(c if c.isalnum() else "_" for c in sheet_name)
+        return self.directory / f"{nombre}.json.gz"
+
+    def save(self, spreadsheet_id: str, sheet_name: str, values: List[List[Any]],
+             timestamp: Optional[datetime] = None) -> bool:
+        """
+        Guarda la instantánea de una hoja (escritura atómica).
+
+        Returns:
+            bool: True si se guardó correctamente
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            destino = self._path(sheet_name)
+            temporal = destino.with_suffix('.tmp')
+
+            contenido = {
+                'spreadsheet_id': spreadsheet_id,
+                'sheet': sheet_name,
+                'timestamp': (timestamp or datetime.now()).isoformat(),
+                'values': values,
+            }
+            with self._lock:
+                with gzip.open(temporal, 'wt', encoding='utf-8', compresslevel=6) as f:
+                    json.dump(contenido, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(temporal, destino)
+            return True
+
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"No se pudo guardar la instantánea de {sheet_name}: {e}")
+            return False
+
+    def load(self, spreadsheet_id: str, sheet_name: str) -> Optional[Tuple[List[List[Any]], datetime]]:
+        """
+        Carga la instantánea de una hoja.
+
+        Returns:
+            (valores, momento de la descarga) o None si no hay una válida
+        """
+        ruta = self._path(sheet_name)
+        if not ruta.exists():
+            return None
+
+        try:
+            with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+                contenido = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Instantánea de {sheet_name} no válida: {e}")
+            return None
+
+        if contenido.get('spreadsheet_id') != spreadsheet_id:
+            return None
+
+        return contenido['values'], datetime.fromisoformat(contenido['timestamp'])
+
+    def clear(self):
+        """Elimina todas las instantáneas"""
+        if self.directory.exists():
+            for ruta in self.directory.glob("*.json.gz"):
+                ruta.unlink()
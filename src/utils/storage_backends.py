@@ -0,0 +1,753 @@
+"""
+Backends de almacenamiento para SheetsManager
+Permiten trabajar contra Google Sheets o contra una base de datos SQLite local
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Tuple
+import logging
+
+from config import SHEETS_CONFIG
+from src.utils.a1_notation import parse_range, column_letter
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.metrics import api_metrics, method_name
+from src.utils.rate_limiter import (
+    TokenBucket, RateLimitExceeded, RETRYABLE_STATUS, BACKGROUND,
+    current_priority, backoff_delay, max_wait_here
+)
+
+logger = logging.getLogger(__name__)
+
+
+def to_cell_text(value: Any) -> str:
+    """Normaliza un valor como lo devolvería Sheets (texto formateado)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def trim_row(row: List[Any]) -> List[Any]:
+    """Elimina las celdas vacías del final (como hace la API de Sheets)"""
+    fin = len(row)
+    while fin and row[fin - 1] == "":
+        fin -= 1
+    return row[:fin]
+
+
+def grid_last_column(info: Optional[Dict[str, Any]], min_width: int = 0) -> Optional[str]:
+    """
+    Letra de la última columna de la cuadrícula de una hoja.
+
+    Args:
+        info: Metadatos de la hoja (get_sheet_info)
+        min_width: Columnas que debe cubrir como mínimo (p. ej. una fila más
+            ancha que la cuadrícula)
+
+    Returns:
+        Letra de la columna o None si los metadatos no traen las columnas
+    """
+    if not info or not info.get('column_count'):
+        return None
+    return column_letter(max(info['column_count'], min_width) - 1)
+
+
+class StorageError(Exception):
+    """Error de lectura/escritura en un backend de almacenamiento"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class OfflineError(StorageError):
+    """Sin conexión: la llamada no se ha intentado (ver CircuitBreaker)"""
+
+
+class StorageBackend:
+    """
+    Interfaz común de almacenamiento.
+
+    Los rangos usan notación A1 sin el nombre de la hoja y los índices de
+    fila son 1-based incluyendo la fila de encabezados, igual que en Sheets.
+    Los errores se notifican con StorageError.
+    """
+
+    name = "base"
+
+    def is_ready(self) -> bool:
+        """Indica si el backend puede atender peticiones"""
+        raise NotImplementedError
+
+    def test_connection(self) -> bool:
+        """Comprueba que el almacenamiento responde"""
+        raise NotImplementedError
+
+    def read_range(self, sheet_name: str, range_name: str, typed: bool = False) -> List[List[Any]]:
+        """
+        Lee un rango de celdas.
+
+        Args:
+            typed: Valores sin formato: números como número y fechas como
+                número de serie (ver typed_values). Los backends que guardan
+                texto lo ignoran.
+        """
+        raise NotImplementedError
+
+    def batch_read(self, ranges: List[Tuple[str, str]], typed: bool = False) -> List[List[List[Any]]]:
+        """
+        Lee varios rangos en una sola operación.
+
+        Args:
+            ranges: Lista de tuplas (nombre_hoja, rango_a1)
+            typed: Valores sin formato (ver read_range)
+
+        Returns:
+            Valores de cada rango, en el mismo orden
+        """
+        return [self.read_range(sheet_name, range_name, typed) for sheet_name, range_name in ranges]
+
+    def write_range(self, sheet_name: str, range_name: str, values: List[List[Any]]) -> int:
+        """Escribe un rango de celdas. Retorna el número de celdas escritas"""
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name: str, values: List[List[Any]]) -> str:
+        """Añade filas al final de la hoja. Retorna el rango A1 escrito"""
+        raise NotImplementedError
+
+    def update_row(self, sheet_name: str, row_index: int, row: List[Any]) -> None:
+        """Sustituye el contenido de una fila"""
+        raise NotImplementedError
+
+    def apply_batch(self, deletes: Dict[str, List[int]],
+                    updates: List[Tuple[str, int, int, List[Any]]],
+                    required_rows: Dict[str, int]) -> None:
+        """
+        Aplica un lote planificado por MutationQueue.
+
+        Args:
+            deletes: Filas a eliminar por hoja, de mayor a menor
+            updates: (hoja, fila, columna 0-based, valores) ya en su posición final
+            required_rows: Filas que debe tener cada hoja tras el lote
+        """
+        raise NotImplementedError
+
+    def get_sheet_info(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene los metadatos de una hoja.
+
+        Returns:
+            Diccionario con 'sheet_id', 'title', 'row_count', 'column_count'
+            y 'headers' (o None si la hoja no existe)
+        """
+        raise NotImplementedError
+
+    def get_headers(self, sheet_name: str) -> List[Any]:
+        """Obtiene la fila de encabezados de una hoja"""
+        values = self.read_range(sheet_name, "1:1")
+        return values[0] if values else []
+
+    def delete_row(self, sheet_name: str, row_index: int) -> None:
+        """Elimina una fila desplazando hacia arriba las inferiores"""
+        raise NotImplementedError
+
+
+class SheetsBackend(StorageBackend):
+    """Backend sobre la API v4 de Google Sheets"""
+
+    name = "sheets"
+
+    # Máscara de campos: solo las propiedades de cada pestaña, sin datos
+    METADATA_FIELDS = 'sheets(properties(sheetId,title,gridProperties(rowCount,columnCount)))'
+
+    def __init__(self, manager):
+        # El servicio y el spreadsheet_id se leen del gestor en cada llamada
+        # porque pueden cambiar (re-autenticación, cambio de base de datos)
+        self.manager = manager
+        # Caché de metadatos por título de hoja
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._metadata_spreadsheet_id: Optional[str] = None
+        # Cuota de peticiones compartida por todas las llamadas
+        self.limiter = TokenBucket()
+        self.max_retries = SHEETS_CONFIG.get('MAX_RETRIES', 5)
+
+    @property
+    def service(self):
+        return self.manager.service
+
+    @property
+    def spreadsheet_id(self) -> Optional[str]:
+        return self.manager.spreadsheet_id
+
+    def _execute(self, request, idempotent: bool = True) -> Dict[str, Any]:
+        """
+        Ejecuta una petición respetando la cuota y reintentando los fallos
+        transitorios (429 y 5xx) con espera exponencial.
+        
+        Desde el hilo de la interfaz la espera total (cuota más reintentos)
+        no pasa de UI_MAX_WAIT_SECONDS: si haría falta esperar más, la
+        llamada falla en vez de congelar la ventana.
+        
+        Cada intento se registra en api_metrics (método, latencia, bytes).
+        Los fallos de red alimentan el cortacircuitos del gestor: con la
+        conexión marcada como caída no se intenta la llamada (OfflineError)
+        y una llamada en curso deja de reintentar en cuanto se marca.
+        
+        Args:
+            request: Petición de googleapiclient
+            idempotent: False para peticiones que no se pueden repetir sin
+                riesgo (altas, borrados de filas); solo se reintentan ante 429,
+                que garantiza que la petición no se aplicó
+        """
+        # Import diferido: googleapiclient solo se carga si se usa este backend
+        from googleapiclient.errors import HttpError
+        from google.auth.exceptions import TransportError
+        from httplib2 import ServerNotFoundError
+        
+        breaker = self.manager.breaker
+        
+        metodo = method_name(request)
+        # Tamaño de la respuesta: se mide el contenido antes de decodificarlo
+        tamano = [0]
+        postproc = getattr(request, 'postproc', None)
+        if postproc is not None:
+            def medir(resp, content):
+                tamano[0] = len(content or b"")
+                return postproc(resp, content)
+            request.postproc = medir
+        
+        # Espera máxima del hilo actual (None: sin límite propio)
+        limite = max_wait_here()
+        esperado = 0.0
+        intento = 0
+        while True:
+            try:
+                breaker.check()
+            except CircuitOpenError as e:
+                raise OfflineError(str(e)) from e
+            antes = time.monotonic()
+            try:
+                self.limiter.acquire(max_wait=None if limite is None else max(0.0, limite - esperado))
+            except RateLimitExceeded as e:
+                raise StorageError(str(e), status=429) from e
+            esperado += time.monotonic() - antes
+
+            inicio = time.perf_counter()
+            try:
+                resultado = request.execute()
+                api_metrics.record(metodo, time.perf_counter() - inicio, tamano[0])
+                breaker.record_success()
+                return resultado
+            except HttpError as e:
+                api_metrics.record(metodo, time.perf_counter() - inicio, ok=False)
+                # El servidor ha respondido: hay conexión
+                breaker.record_success()
+                status = getattr(e.resp, 'status', None)
+                error = StorageError(str(e), status=status)
+                causa = e
+                if status == 429:
+                    self.limiter.penalize()
+                reintentable = status == 429 or (idempotent and status in RETRYABLE_STATUS)
+            except (OSError, ServerNotFoundError, TransportError) as e:
+                # Cortes de red, DNS y timeouts (también al renovar el token)
+                api_metrics.record(metodo, time.perf_counter() - inicio, ok=False)
+                breaker.record_failure()
+                error = StorageError(f"Error de conexión: {e}")
+                causa = e
+                # Si con este fallo (o la sonda) se ha marcado la conexión
+                # como caída, no se insiste
+                reintentable = idempotent and breaker.is_online()
+
+            # Las llamadas en segundo plano no insisten: ceden la cuota al usuario
+            if not reintentable or intento >= self.max_retries or current_priority() == BACKGROUND:
+                raise error from causa
+
+            espera = max(backoff_delay(intento), self._retry_after(causa))
+            if limite is not None and esperado + espera > limite:
+                # Hilo de la interfaz: mejor fallar que congelar la ventana
+                raise error from causa
+            
+            api_metrics.record_retry(metodo)
+            logger.warning(f"⚠️ Error {error.status or 'de red'} en la API, "
+                           f"reintento {intento + 1}/{self.max_retries} en {espera:.1f}s")
+            time.sleep(espera)
+            esperado += espera
+            intento += 1
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Segundos indicados por la cabecera Retry-After, si la hay"""
+        resp = getattr(error, 'resp', None)
+        try:
+            return float(resp.get('retry-after', 0)) if resp is not None else 0.0
+        except (TypeError, ValueError, AttributeError):
+            return 0.0
+
+    # --- metadatos ---
+
+    def _load_metadata(self):
+        """Descarga títulos, IDs y tamaños de todas las hojas (una petición ligera)"""
+        result = self._execute(self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields=self.METADATA_FIELDS
+        ))
+
+        metadata = {}
+        for sheet in result.get('sheets', []):
+            props = sheet['properties']
+            grid = props.get('gridProperties', {})
+            anterior = self._metadata.get(props['title'], {})
+            metadata[props['title']] = {
+                'sheet_id': props['sheetId'],
+                'title': props['title'],
+                'row_count': grid.get('rowCount', 0),
+                'column_count': grid.get('columnCount', 0),
+                'headers': anterior.get('headers'),
+            }
+
+        self._metadata = metadata
+        self._metadata_spreadsheet_id = self.spreadsheet_id
+        logger.debug(f"Metadatos cargados: {', '.join(metadata)}")
+
+    def invalidate_metadata(self):
+        """Descarta los metadatos en caché"""
+        self._metadata = {}
+        self._metadata_spreadsheet_id = None
+
+    def get_sheet_info(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        # Otro spreadsheet: los metadatos anteriores no sirven
+        if self._metadata_spreadsheet_id != self.spreadsheet_id:
+            self.invalidate_metadata()
+
+        info = self._metadata.get(sheet_name)
+        if info is None:
+            # Solo se refresca cuando la hoja no está en caché
+            self._load_metadata()
+            info = self._metadata.get(sheet_name)
+        return info
+
+    def _sheet_id(self, sheet_name: str) -> int:
+        info = self.get_sheet_info(sheet_name)
+        if info is None:
+            raise StorageError(f"No se encontró la hoja {sheet_name}")
+        return info['sheet_id']
+
+    def get_headers(self, sheet_name: str) -> List[Any]:
+        info = self.get_sheet_info(sheet_name)
+        if info is not None and info.get('headers') is not None:
+            return info['headers']
+        return super().get_headers(sheet_name)
+
+    def _remember_headers(self, sheet_name: str, range_name: str, values: List[List[Any]]):
+        """Guarda los encabezados si la lectura incluye la fila 1 completa"""
+        info = self._metadata.get(sheet_name)
+        if info is None or not values:
+            return
+        try:
+            fila_ini, _, col_ini, col_fin = parse_range(range_name)
+        except ValueError:
+            return
+        if fila_ini == 1 and col_ini == 0 and (col_fin is None or col_fin + 1 >= info['column_count']):
+            info['headers'] = values[0]
+
+    # --- interfaz StorageBackend ---
+
+    def is_ready(self) -> bool:
+        # Sin construir el cliente del hilo actual: basta con tener credenciales
+        return self.manager.services is not None
+
+    def test_connection(self) -> bool:
+        if not self.is_ready() or not self.spreadsheet_id:
+            return False
+
+        # La comprobación refresca también la caché de metadatos
+        self._load_metadata()
+        return True
+
+    @staticmethod
+    def _render_options(typed: bool) -> Dict[str, str]:
+        """Parámetros de lectura: sin formato y fechas como número de serie"""
+        if not typed:
+            return {}
+        return {'valueRenderOption': 'UNFORMATTED_VALUE', 'dateTimeRenderOption': 'SERIAL_NUMBER'}
+
+    def read_range(self, sheet_name: str, range_name: str, typed: bool = False) -> List[List[Any]]:
+        result = self._execute(self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{sheet_name}!{range_name}",
+            **self._render_options(typed)
+        ))
+        values = result.get('values', [])
+        if not typed:
+            self._remember_headers(sheet_name, range_name, values)
+        return values
+
+    def batch_read(self, ranges: List[Tuple[str, str]], typed: bool = False) -> List[List[List[Any]]]:
+        # Una sola petición values().batchGet para todos los rangos
+        result = self._execute(self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[f"{sheet_name}!{range_name}" for sheet_name, range_name in ranges],
+            **self._render_options(typed)
+        ))
+        value_ranges = result.get('valueRanges', [])
+        resultado = [vr.get('values', []) for vr in value_ranges]
+        if not typed:
+            for (sheet_name, range_name), values in zip(ranges, resultado):
+                self._remember_headers(sheet_name, range_name, values)
+        return resultado
+
+    def write_range(self, sheet_name: str, range_name: str, values: List[List[Any]]) -> int:
+        result = self._execute(self.service.spreadsheets().values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{sheet_name}!{range_name}",
+            valueInputOption='USER_ENTERED',
+            body={'values': values}
+        ))
+        return result.get('updatedCells', 0)
+
+    def append_rows(self, sheet_name: str, values: List[List[Any]]) -> str:
+        result = self._execute(self.service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{sheet_name}!A1",
+            valueInputOption='USER_ENTERED',
+            insertDataOption='INSERT_ROWS',
+            body={'values': values}
+        ), idempotent=False)
+
+        # INSERT_ROWS amplía la cuadrícula
+        info = self._metadata.get(sheet_name)
+        if info is not None:
+            info['row_count'] += len(values)
+
+        return result.get('updates', {}).get('updatedRange', '')
+
+    def update_row(self, sheet_name: str, row_index: int, row: List[Any]) -> None:
+        # Hasta la última columna de la cuadrícula (como SheetsManager._sheet_range)
+        try:
+            info = self.get_sheet_info(sheet_name)
+        except StorageError as e:
+            logger.debug(f"Sin metadatos de {sheet_name}: {e}")
+            info = None
+        ultima = grid_last_column(info, len(row)) or column_letter(max(len(row), 26) - 1)
+
+        self._execute(self.service.spreadsheets().values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{sheet_name}!A{row_index}:{ultima}{row_index}",
+            valueInputOption='USER_ENTERED',
+            body={'values': [row]}
+        ))
+
+    def delete_row(self, sheet_name: str, row_index: int) -> None:
+        # El sheetId sale de la caché de metadatos
+        sheet_id = self._sheet_id(sheet_name)
+
+        # Eliminar fila (índice 0-based para la API de batchUpdate)
+        requests = [{
+            'deleteDimension': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'dimension': 'ROWS',
+                    'startIndex': row_index - 1,  # 0-based
+                    'endIndex': row_index
+                }
+            }
+        }]
+
+        self._execute(self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={'requests': requests}
+        ), idempotent=False)
+
+        info = self._metadata.get(sheet_name)
+        if info is not None:
+            info['row_count'] -= 1
+
+    def apply_batch(self, deletes: Dict[str, List[int]],
+                    updates: List[Tuple[str, int, int, List[Any]]],
+                    required_rows: Dict[str, int]) -> None:
+        # Dos llamadas, no atómicas: si falla la segunda, la estructura ya ha
+        # cambiado (ver SheetsManager.batch)
+        # 1) Estructura: borrados de abajo arriba y ampliación de cuadrícula
+        requests = []
+        for sheet_name, filas in deletes.items():
+            sheet_id = self._sheet_id(sheet_name)
+            for fila in filas:
+                requests.append({
+                    'deleteDimension': {
+                        'range': {
+                            'sheetId': sheet_id,
+                            'dimension': 'ROWS',
+                            'startIndex': fila - 1,  # 0-based
+                            'endIndex': fila
+                        }
+                    }
+                })
+
+        ampliaciones = {}
+        for sheet_name, necesarias in required_rows.items():
+            info = self.get_sheet_info(sheet_name)
+            if info is None:
+                raise StorageError(f"No se encontró la hoja {sheet_name}")
+            disponibles = info['row_count'] - len(deletes.get(sheet_name, []))
+            if necesarias > disponibles:
+                ampliaciones[sheet_name] = necesarias - disponibles
+                requests.append({
+                    'appendDimension': {
+                        'sheetId': info['sheet_id'],
+                        'dimension': 'ROWS',
+                        'length': necesarias - disponibles
+                    }
+                })
+
+        if requests:
+            self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': requests}
+            ), idempotent=False)
+            for sheet_name in set(deletes) | set(ampliaciones):
+                info = self._metadata.get(sheet_name)
+                if info is not None:
+                    info['row_count'] += ampliaciones.get(sheet_name, 0) - len(deletes.get(sheet_name, []))
+
+        # 2) Valores: todas las escrituras en un único values().batchUpdate
+        if updates:
+            data = [
+                {
+                    'range': f"{sheet_name}!{column_letter(columna)}{fila}",
+                    'values': [valores]
+                }
+                for sheet_name, fila, columna, valores in updates
+            ]
+            self._execute(self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'valueInputOption': 'USER_ENTERED', 'data': data}
+            ))
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend local sobre SQLite.
+
+    Cada hoja se guarda como filas numeradas cuyo contenido es la lista de
+    valores serializada en JSON, de modo que los rangos A1 se resuelven igual
+    que en Sheets (valores como texto, sin celdas vacías al final).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path, headers: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            db_path: Ruta del fichero de base de datos (':memory:' para pruebas)
+            headers: Encabezados iniciales por hoja, se escriben si la hoja está vacía
+        """
+        self.db_path = str(db_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS filas (
+                hoja TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                valores TEXT NOT NULL,
+                PRIMARY KEY (hoja, fila)
+            )
+        """)
+        self._conn.commit()
+
+        for sheet_name, header in (headers or {}).items():
+            if not self._last_row(sheet_name):
+                self._put_row(sheet_name, 1, header)
+        self._conn.commit()
+
+    # --- utilidades internas ---
+
+    def _last_row(self, sheet_name: str) -> int:
+        cursor = self._conn.execute(
+            "SELECT MAX(fila) FROM filas WHERE hoja = ?", (sheet_name,)
+        )
+        return cursor.fetchone()[0] or 0
+
+    def _get_row(self, sheet_name: str, fila: int) -> List[str]:
+        cursor = self._conn.execute(
+            "SELECT valores FROM filas WHERE hoja = ? AND fila = ?", (sheet_name, fila)
+        )
+        resultado = cursor.fetchone()
+        return json.loads(resultado[0]) if resultado else []
+
+    def _put_row(self, sheet_name: str, fila: int, row: List[Any]):
+        valores = trim_row([to_cell_text(v) for v in row])
+        self._conn.execute(
+            "INSERT OR REPLACE INTO filas (hoja, fila, valores) VALUES (?, ?, ?)",
+            (sheet_name, fila, json.dumps(valores, ensure_ascii=False))
+        )
+
+    def _write_cells(self, sheet_name: str, fila: int, col_ini: int, nuevos: List[Any]):
+        actual = self._get_row(sheet_name, fila)
+        if len(actual) < col_ini + len(nuevos):
+            actual.extend([""] * (col_ini + len(nuevos) - len(actual)))
+        actual[col_ini:col_ini + len(nuevos)] = [to_cell_text(v) for v in nuevos]
+        self._put_row(sheet_name, fila, actual)
+
+    def _delete_row(self, sheet_name: str, fila: int):
+        self._conn.execute(
+            "DELETE FROM filas WHERE hoja = ? AND fila = ?", (sheet_name, fila)
+        )
+        # Desplazar en dos pasos para no chocar con la clave primaria
+        self._conn.execute(
+            "UPDATE filas SET fila = -(fila - 1) WHERE hoja = ? AND fila > ?",
+            (sheet_name, fila)
+        )
+        self._conn.execute(
+            "UPDATE filas SET fila = -fila WHERE hoja = ? AND fila < 0", (sheet_name,)
+        )
+
+    # --- interfaz StorageBackend ---
+
+    def is_ready(self) -> bool:
+        return True
+
+    def test_connection(self) -> bool:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    def read_range(self, sheet_name: str, range_name: str, typed: bool = False) -> List[List[Any]]:
+        # Se guarda texto: typed no cambia nada, RowCodec acepta ambos
+        try:
+            fila_ini, fila_fin, col_ini, col_fin = parse_range(range_name)
+            with self._lock:
+                cursor = self._conn.execute(
+                    "SELECT fila, valores FROM filas WHERE hoja = ? AND fila >= ? AND fila <= ? "
+                    "ORDER BY fila",
+                    (sheet_name, fila_ini, fila_fin if fila_fin is not None else 2 ** 31)
+                )
+                filas = cursor.fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            raise StorageError(str(e)) from e
+
+        # Reconstruir el bloque respetando huecos intermedios
+        values = []
+        siguiente = fila_ini
+        fin_col = col_fin + 1 if col_fin is not None else None
+        for fila, valores in filas:
+            values.extend([] for _ in range(fila - siguiente))
+            values.append(trim_row(json.loads(valores)[col_ini:fin_col]))
+            siguiente = fila + 1
+
+        # Sheets no devuelve las filas vacías del final
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def write_range(self, sheet_name: str, range_name: str, values: List[List[Any]]) -> int:
+        try:
+            fila_ini, _, col_ini, _ = parse_range(range_name)
+            celdas = 0
+            with self._lock:
+                for offset, nuevos in enumerate(values):
+                    self._write_cells(sheet_name, fila_ini + offset, col_ini, nuevos)
+                    celdas += len(nuevos)
+                self._conn.commit()
+            return celdas
+        except (sqlite3.Error, ValueError) as e:
+            raise StorageError(str(e)) from e
+
+    def append_rows(self, sheet_name: str, values: List[List[Any]]) -> str:
+        try:
+            with self._lock:
+                inicio = self._last_row(sheet_name) + 1
+                for offset, row in enumerate(values):
+                    self._put_row(sheet_name, inicio + offset, row)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+        ancho = max((len(row) for row in values), default=1)
+        fin = inicio + len(values) - 1
+        return f"{sheet_name}!A{inicio}:{column_letter(max(ancho, 1) - 1)}{fin}"
+
+    def update_row(self, sheet_name: str, row_index: int, row: List[Any]) -> None:
+        # Igual que en Sheets: solo se sobrescriben las celdas enviadas
+        self.write_range(sheet_name, f"A{row_index}", [row])
+
+    def delete_row(self, sheet_name: str, row_index: int) -> None:
+        try:
+            with self._lock:
+                self._delete_row(sheet_name, row_index)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    def apply_batch(self, deletes: Dict[str, List[int]],
+                    updates: List[Tuple[str, int, int, List[Any]]],
+                    required_rows: Dict[str, int]) -> None:
+        # Todo el lote en una transacción
+        try:
+            with self._lock:
+                try:
+                    for sheet_name, filas in deletes.items():
+                        for fila in filas:
+                            self._delete_row(sheet_name, fila)
+                    for sheet_name, fila, columna, valores in updates:
+                        self._write_cells(sheet_name, fila, columna, valores)
+                    self._conn.commit()
+                except sqlite3.Error:
+                    self._conn.rollback()
+                    raise
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    def get_sheet_info(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        # Se calcula siempre a partir de la base de datos (no hay caché)
+        try:
+            with self._lock:
+                filas = self._last_row(sheet_name)
+                if not filas:
+                    return None
+                cursor = self._conn.execute(
+                    "SELECT MAX(json_array_length(valores)) FROM filas WHERE hoja = ?",
+                    (sheet_name,)
+                )
+                columnas = cursor.fetchone()[0] or 0
+                headers = self._get_row(sheet_name, 1)
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+        return {
+            'sheet_id': None,
+            'title': sheet_name,
+            'row_count': filas,
+            'column_count': columnas,
+            'headers': headers,
+        }
+
+    def import_sheet(self, sheet_name: str, values: List[List[Any]]) -> None:
+        """
+        Reemplaza el contenido completo de una hoja (p. ej. copia desde Sheets).
+
+        Args:
+            sheet_name: Nombre de la hoja
+            values: Todas las filas, incluyendo encabezados
+        """
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM filas WHERE hoja = ?", (sheet_name,))
+                for fila, row in enumerate(values, start=1):
+                    self._put_row(sheet_name, fila, row)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    def close(self):
+        """Cierra la conexión"""
+        with self._lock:
+            self._conn.close()
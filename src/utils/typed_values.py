@@ -0,0 +1,129 @@
+"""
+Decodificación de valores de celda a tipos nativos
+Conversores por tipo de columna (números de serie de fecha, celdas numéricas),
+sin excepciones; los usa row_codec
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Any, Callable
+import logging
+
+from src.utils.storage_backends import to_cell_text
+from src.utils.date_parser import DateParser, date_parser
+
+logger = logging.getLogger(__name__)
+
+# Tipos de columna
+TEXT = 'text'
+INT = 'int'
+FLOAT = 'float'
+DATE = 'date'
+DATETIME = 'datetime'
+MONTH = 'month'  # "YYYY-MM"
+
+# Día 0 de los números de serie de Sheets (dateTimeRenderOption=SERIAL_NUMBER)
+SERIAL_EPOCH = datetime(1899, 12, 30)
+_SERIAL_EPOCH_ORDINAL = SERIAL_EPOCH.toordinal()
+
+# Formatos de texto aceptados (celdas leídas con formato o datos de SQLite)
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)')
+_MONTH_RE = re.compile(r'(\d{4})-(\d{1,2})')
+
+
+def serial_to_date(serial: float) -> date:
+    """Número de serie de Sheets -> date (se descarta la hora)"""
+    return date.fromordinal(_SERIAL_EPOCH_ORDINAL + int(serial))
+
+
+def serial_to_datetime(serial: float) -> datetime:
+    """Número de serie de Sheets -> datetime (la parte decimal es la hora)"""
+    return SERIAL_EPOCH + timedelta(days=serial)
+
+
+def _is_number(value: Any) -> bool:
+    # bool es subclase de int, pero una casilla de verificación no es un número
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# --- conversores por tipo (una llamada por celda, sin try/except) ---
+
+def _to_text(value: Any) -> Any:
+    # Las celdas sin formato pueden llegar como número (teléfonos, CIF numéricos...)
+    return value if type(value) is str else to_cell_text(value)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if _is_number(value):
+        return float(value)
+    if isinstance(value, str):
+        texto = value.strip()
+        if _NUMBER_RE.fullmatch(texto):
+            return float(texto.replace(',', '.'))
+    return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if _is_number(value):
+        return int(value)
+    numero = _to_float(value)
+    return int(numero) if numero is not None else None
+
+
+def datetime_converter(parser: DateParser) -> Callable[[Any], Optional[datetime]]:
+    """Conversor a datetime que interpreta los textos con `parser`"""
+    def _to_datetime(value: Any) -> Optional[datetime]:
+        if isinstance(value, str):
+            return parser.parse(value) if value else None
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        if _is_number(value):
+            return serial_to_datetime(value)
+        return None
+    return _to_datetime
+
+
+def date_converter(parser: DateParser) -> Callable[[Any], Optional[date]]:
+    """Conversor a date que interpreta los textos con `parser`"""
+    def _to_date(value: Any) -> Optional[date]:
+        if isinstance(value, str):
+            return parser.parse_date(value) if value else None
+        if _is_number(value):
+            return serial_to_date(value)
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return None
+    return _to_date
+
+
+# Con el analizador general; row_codec usa uno por columna
+_to_datetime = datetime_converter(date_parser)
+_to_date = date_converter(date_parser)
+
+
+def _to_month(value: Any) -> Any:
+    # Sheets convierte "2025-01" en fecha al escribir con USER_ENTERED
+    if _is_number(value):
+        return serial_to_date(value).strftime("%Y-%m")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m")
+    if isinstance(value, str):
+        texto = value.strip()
+        m = _MONTH_RE.match(texto)
+        if m and 1 <= int(m.group(2)) <= 12:
+            return f"{m.group(1)}-{int(m.group(2)):02d}"
+        return texto
+    return _to_text(value)
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    TEXT: _to_text,
+    INT: _to_int,
+    FLOAT: _to_float,
+    DATE: _to_date,
+    DATETIME: _to_datetime,
+    MONTH: _to_month,
+}
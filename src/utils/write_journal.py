@@ -0,0 +1,196 @@
+"""
+Diario local de escrituras (write-ahead journal)
+Registra cada cambio antes de enviarlo para no perderlo si falla la conexión
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Operaciones registradas
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# Estados de una entrada
+PENDING = 'pending'
+DONE = 'done'
+CONFLICT = 'conflict'
+DISCARDED = 'discarded'
+
+
+class WriteJournal:
+    """
+    Fichero JSONL de solo añadir con las intenciones de escritura.
+
+    Cada línea es una entrada nueva o un cambio de estado de una anterior:
+        {"seq": 1, "ts": "...", "target": "sheets:<id>", "op": "upsert",
+         "sheet": "Solicitudes", "id": "SOL-001", "row": [...], "base": [...]}
+        {"seq": 1, "status": "done"}
+        {"seq": 1, "status": "conflict", "remote": [...]}
+
+    "base" es la fila tal como la veía el usuario antes de editar (None si el
+    registro es nuevo); al reenviar sirve para detectar si otra persona la ha
+    modificado entretanto. Si no había copia local con la que comparar se
+    anota "base_known": false y el cambio se envía sin esa comprobación.
+    "target" identifica la base de datos de destino, para no enviar cambios
+    a otra si se cambia la configuración. Las líneas se escriben con fsync,
+    así que una entrada registrada sobrevive a un cierre inesperado.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._next_seq = 1
+        self._load()
+
+    def _load(self):
+        """Reconstruye el estado de las entradas a partir del fichero"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for numero, linea in enumerate(f, start=1):
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        # Última línea a medias tras un cierre inesperado
+                        logger.warning(f"Línea {numero} del diario no válida, se ignora")
+                        continue
+                    self._apply(registro)
+        except OSError as e:
+            logger.error(f"No se pudo leer el diario de escrituras: {e}")
+
+        pendientes = len(self.pending())
+        if pendientes:
+            logger.info(f"📒 Diario de escrituras: {pendientes} cambios pendientes de enviar")
+
+    def _apply(self, registro: Dict[str, Any]):
+        seq = registro.get('seq')
+        if seq is None:
+            return
+        if 'op' in registro:
+            entrada = dict(registro)
+            entrada.setdefault('status', PENDING)
+            self._entries[seq] = entrada
+            self._next_seq = max(self._next_seq, seq + 1)
+        elif seq in self._entries:
+            self._entries[seq].update(registro)
+
+    def _write(self, registros: List[Dict[str, Any]]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, target: str, op: str, sheet_name: str, record_id: str,
+               row: Optional[List[Any]] = None, base: Optional[List[Any]] = None,
+               base_known: bool = True) -> Dict[str, Any]:
+        """
+        Registra una intención de escritura (queda pendiente).
+
+        Args:
+            target: Base de datos de destino
+            op: UPSERT (alta o modificación por ID) o DELETE
+            sheet_name: Hoja afectada
+            record_id: ID del registro (columna A)
+            row: Fila completa (solo UPSERT)
+            base: Fila antes del cambio, None si el registro es nuevo
+            base_known: False si no se sabe cómo era la fila antes del
+                cambio (sin copia local); base se ignora
+
+        Returns:
+            La entrada registrada
+
+        Raises:
+            OSError: Si no se pudo escribir en disco
+        """
+        with self._lock:
+            entrada = {
+                'seq': self._next_seq,
+                'ts': datetime.now().isoformat(timespec='seconds'),
+                'target': target,
+                'op': op,
+                'sheet': sheet_name,
+                'id': str(record_id),
+                'row': row,
+                'base': base,
+            }
+            if not base_known:
+                entrada['base_known'] = False
+            self._write([entrada])
+            self._next_seq += 1
+            self._entries[entrada['seq']] = dict(entrada, status=PENDING)
+            return self._entries[entrada['seq']]
+
+    def mark(self, seqs: List[int], status: str, **extra):
+        """Cambia el estado de varias entradas (DONE, CONFLICT, DISCARDED)"""
+        if not seqs:
+            return
+        with self._lock:
+            registros = [dict(extra, seq=seq, status=status) for seq in seqs if seq in self._entries]
+            self._write(registros)
+            for registro in registros:
+                self._entries[registro['seq']].update(registro)
+
+    def rebase(self, seqs: List[int], base: List[Any]):
+        """Sustituye la fila base de varias entradas pendientes"""
+        if not seqs:
+            return
+        with self._lock:
+            registros = [{'seq': seq, 'base': base} for seq in seqs if seq in self._entries]
+            self._write(registros)
+            for registro in registros:
+                self._entries[registro['seq']].update(registro)
+
+    def _select(self, status: str, target: Optional[str], sheet_name: Optional[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [e for seq, e in sorted(self._entries.items())
+                    if e['status'] == status
+                    and (target is None or e.get('target') == target)
+                    and (sheet_name is None or e['sheet'] == sheet_name)]
+
+    def pending(self, target: Optional[str] = None, sheet_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entradas pendientes de enviar, en orden"""
+        return self._select(PENDING, target, sheet_name)
+
+    def conflicts(self, target: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entradas que no se enviaron por conflicto con un cambio remoto"""
+        return self._select(CONFLICT, target, None)
+
+    def compact(self):
+        """
+        Reescribe el fichero solo con las entradas vivas (pendientes o en
+        conflicto). Escritura atómica: un fallo deja el fichero anterior.
+        """
+        with self._lock:
+            vivas = {seq: e for seq, e in self._entries.items() if e['status'] in (PENDING, CONFLICT)}
+            if len(vivas) == len(self._entries):
+                return
+
+            try:
+                if not vivas:
+                    if self.path.exists():
+                        self.path.unlink()
+                else:
+                    temporal = self.path.with_suffix('.tmp')
+                    with open(temporal, 'w', encoding='utf-8') as f:
+                        for seq in sorted(vivas):
+                            f.write(json.dumps(vivas[seq], ensure_ascii=False, separators=(',', ':')) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temporal, self.path)
+                self._entries = vivas
+            except OSError as e:
+                logger.warning(f"No se pudo compactar el diario de escrituras: {e}")